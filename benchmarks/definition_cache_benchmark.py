@@ -0,0 +1,114 @@
+"""
+Benchmark: Generating pipeline definitions cold (building every step) vs. warm (from the definition cache).
+
+A cold run builds all steps (packaging and uploading each step's code) and serializes the definition. A warm run creates a new `PipelineFacade` with the same configs and code, which only fingerprints configs and code and then reads the cached definition. AWS is replaced by moto.
+
+Requires moto, which is not a dependency of this package:
+    pip install "moto[s3,sagemaker,sts]"
+    python benchmarks/definition_cache_benchmark.py --steps 10 100 1000
+"""
+from typing import Any
+from functools import cached_property
+from pathlib import Path
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from loguru import logger
+from moto import mock_aws
+
+from sm_pipelines_oo.config_loader.interface import ConfigLoaderInterface
+from sm_pipelines_oo.pipeline import PipelineFacade
+
+
+class InMemoryConfigLoader(ConfigLoaderInterface):
+    def __init__(self, shared_config_dict: dict[str, Any], step_config_dicts: list[dict[str, Any]]):
+        self._shared_config_dict = shared_config_dict
+        self._step_config_dicts = step_config_dicts
+
+    @cached_property
+    def shared_config_as_dict(self) -> dict[str, Any]:
+        return self._shared_config_dict
+
+    @cached_property
+    def step_configs_as_dicts(self) -> list[dict[str, Any]]:
+        return [{**config, 'shared_config': self._shared_config_dict} for config in self._step_config_dicts]
+
+
+def _create_source_dir(root: Path) -> Path:
+    source_dir = root / 'code'
+    source_dir.mkdir()
+    (source_dir / 'process.py').write_text('print("processing")\n')
+    return source_dir
+
+
+def _create_loader(n_steps: int, source_dir: Path) -> InMemoryConfigLoader:
+    shared_config_dict = {
+        'project_name': 'benchmark',
+        'project_version': '0',
+        'region': 'us-east-1',
+        'project_bucket_name': 'benchmark-bucket',
+        'role_name': 'benchmark_role',
+    }
+    step_config_dicts = [
+        {
+            'step_name': f'step_{i}',
+            'step_factory_class': 'FrameworkProcessor',
+            'processor_init_config': {
+                'framework_version': '1.2-1',
+                'estimator_cls_name': 'SKLearn',
+                'instance_count': 1,
+                'instance_type': 'ml.m5.large',
+            },
+            'processor_run_config': {
+                'code': 'process.py',
+                'source_dir': str(source_dir),
+                # Chain steps, so that definitions contain property references, as real pipelines do.
+                'inputs': {'input': f's3://benchmark-bucket/data/step_{i - 1}'},
+                'outputs': {'output': f's3://benchmark-bucket/data/step_{i}'},
+            },
+        }
+        for i in range(n_steps)
+    ]
+    return InMemoryConfigLoader(shared_config_dict, step_config_dicts)
+
+
+def _time_definition(loader_factory, cache_dir: Path) -> tuple[float, str]:
+    start = time.perf_counter()
+    definition = PipelineFacade(
+        env='dev',
+        custom_config_loader=loader_factory(),
+        definition_cache_dir=str(cache_dir),
+    ).definition()
+    return time.perf_counter() - start, definition
+
+
+def run_benchmark(n_steps: int) -> tuple[float, float]:
+    with mock_aws(), tempfile.TemporaryDirectory() as tmp_dir:
+        source_dir = _create_source_dir(Path(tmp_dir))
+        cache_dir = Path(tmp_dir) / 'cache'
+        cold_duration, cold_definition = _time_definition(lambda: _create_loader(n_steps, source_dir), cache_dir)
+        warm_duration, warm_definition = _time_definition(lambda: _create_loader(n_steps, source_dir), cache_dir)
+        assert warm_definition == cold_definition
+        return cold_duration, warm_duration
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, nargs='+', default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    # Per-step logs would drown the results.
+    logger.remove()
+    logger.add(sys.stderr, level='WARNING')
+    print(f'{"steps":>6}  {"cold":>9}  {"warm":>9}')
+    for n_steps in args.steps:
+        cold_duration, warm_duration = run_benchmark(n_steps)
+        print(f'{n_steps:>6}  {cold_duration:8.2f}s  {warm_duration:8.3f}s  (x{cold_duration / warm_duration:.0f})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: Sequential vs. concurrent step construction in `StepFactoryFacade`.
+
+Under a PipelineSession, FrameworkProcessor defers packaging and uploading code until the pipeline definition is generated, so constructing steps is mostly CPU-bound. The exception is sharing code artifacts (`share_code_artifacts=True`): Then each `StepFactory` packages its `source_dir` and uploads it through the `CodeArtifactStore` while its step is created, which is the I/O-bound work that concurrent construction helps with. So this benchmarks the library's `StepFactory` with a code artifact store, with different code for each step.
+
+S3 is replaced by moto, with an artificial round-trip latency per request so the numbers resemble talking to the real service.
+
+Requires moto, which is not a dependency of this package:
+    pip install "moto[s3]"
+    python benchmarks/step_construction_benchmark.py --steps 60 --workers 1 8 16
+"""
+from typing import Any
+from pathlib import Path
+import argparse
+import tempfile
+import time
+
+import boto3
+from moto import mock_aws
+from sagemaker.workflow.pipeline_context import PipelineSession
+
+from sm_pipelines_oo.shared_config_schema import SharedConfig
+from sm_pipelines_oo.steps.code_artifact_store import CodeArtifactStore
+from sm_pipelines_oo.steps.step_factory_facade import StepFactoryFacade
+
+
+BUCKET_NAME = 'benchmark-bucket'
+
+
+def _create_source_dir(root: Path, step_name: str) -> Path:
+    """Code of a single step. Content differs between steps, so each step uploads its own artifact."""
+    source_dir = root / step_name
+    source_dir.mkdir()
+    (source_dir / 'process.py').write_text(f'STEP_NAME = {step_name!r}\n')
+    for i in range(20):
+        (source_dir / f'module_{i}.py').write_text(f'VALUE = {i}\n' * 200)
+    return source_dir
+
+
+def _create_step_config_dicts(n_steps: int, root: Path) -> list[dict[str, Any]]:
+    return [
+        {
+            'step_name': f'step_{i}',
+            'step_factory_class': 'FrameworkProcessor',
+            'processor_init_config': {
+                'framework_version': '1.2-1',
+                'estimator_cls_name': 'SKLearn',
+                'instance_count': 1,
+                'instance_type': 'ml.m5.large',
+            },
+            'processor_run_config': {
+                'code': 'process.py',
+                'source_dir': str(_create_source_dir(root, f'step_{i}')),
+                'inputs': {'input': f's3://{BUCKET_NAME}/data/input_{i}'},
+                'outputs': {'output': f's3://{BUCKET_NAME}/data/output_{i}'},
+            },
+        }
+        for i in range(n_steps)
+    ]
+
+
+def run_benchmark(n_steps: int, workers: list[int], latency: float) -> dict[int, float]:
+    with mock_aws(), tempfile.TemporaryDirectory() as tmp_dir:
+        boto_session = boto3.Session(region_name='us-east-1')
+        s3_client = boto_session.client('s3')
+        s3_client.create_bucket(Bucket=BUCKET_NAME)
+        # Emulate network latency of each S3 request.
+        s3_client.meta.events.register('before-send.s3', lambda **kwargs: time.sleep(latency))
+        pipeline_session = PipelineSession(boto_session=boto_session, default_bucket=BUCKET_NAME)
+        shared_config = SharedConfig(
+            project_name='benchmark', project_version='0', region='us-east-1', project_bucket_name=BUCKET_NAME,
+        )
+
+        step_config_dicts = _create_step_config_dicts(n_steps, Path(tmp_dir))
+        durations: dict[int, float] = {}
+        # Untimed warm-up, so that one-time costs (e.g. importing the SageMaker SDK's processors, or looking up image URIs) don't count against the first run.
+        for max_workers in [0, *workers]:
+            facade = StepFactoryFacade(
+                step_config_dicts=step_config_dicts if max_workers else step_config_dicts[:1],
+                role_arn='arn:aws:iam::123456789012:role/benchmark',
+                pipeline_session=pipeline_session,
+                shared_config=shared_config,
+                max_workers=max_workers or 1,
+                # A new store for every run, so each run uploads all artifacts again (under a separate prefix).
+                code_artifact_store=CodeArtifactStore(
+                    s3_client=s3_client, bucket_name=BUCKET_NAME, prefix=f'code_artifacts/workers_{max_workers}',
+                ),
+            )
+            start = time.perf_counter()
+            steps = facade.create_all_steps()
+            if not max_workers:
+                continue
+            durations[max_workers] = time.perf_counter() - start
+            assert [step.name for step in steps] == [config['step_name'] for config in step_config_dicts]
+        return durations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, default=60)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--latency', type=float, default=0.05, help='Emulated S3 latency per request (seconds)')
+    args = parser.parse_args()
+
+    durations = run_benchmark(args.steps, args.workers, args.latency)
+    baseline = durations[args.workers[0]]
+    print(f'{args.steps} steps, {args.latency * 1000:.0f} ms emulated S3 latency')
+    for max_workers, duration in durations.items():
+        print(f'  max_workers={max_workers:>3}: {duration:6.2f} s  (x{baseline / duration:.1f})')
+
+
+if __name__ == '__main__':
+    main()
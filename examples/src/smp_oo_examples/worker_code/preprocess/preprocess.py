@@ -19,8 +19,10 @@ def transform(df: pd.DataFrame) -> pd.DataFrame:
 
 
 if __name__ == '__main__':
-    INPUT_PATH = '/opt/ml/processing/input_3/input.parquet'
-    OUTPUT_PATH = f'/opt/ml/processing/output_1/{os.environ["OUTPUT_FILENAME"]}'
+    # Set when running locally (see `DevPipelineFacade.run_locally()`)
+    PROCESSING_DIR = os.environ.get('SM_PROCESSING_DIR', '/opt/ml/processing')
+    INPUT_PATH = f'{PROCESSING_DIR}/input_3/input.parquet'
+    OUTPUT_PATH = f'{PROCESSING_DIR}/output_1/{os.environ["OUTPUT_FILENAME"]}'
 
     # logger.info("Starting preprocess")
     df_in = pd.read_parquet(INPUT_PATH)
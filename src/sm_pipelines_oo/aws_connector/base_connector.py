@@ -1,23 +1,32 @@
+# Required to not make boto3-stubs and the SageMaker SDK runtime dependencies: https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING
 from functools import cached_property
 
 from loguru import logger
-import boto3
-from sagemaker.local.local_session import LocalSession
-from sagemaker.session import Session, get_execution_role
-from sagemaker.workflow.pipeline_context import PipelineSession, LocalPipelineSession
 
 from sm_pipelines_oo.shared_config_schema import SharedConfig, Environment
 from sm_pipelines_oo.aws_connector.interface import AWSConnectorInterface
 
 if TYPE_CHECKING:
+    # Note: boto3 and the SageMaker SDK are imported lazily (i.e., when a client or session is first created), because importing them is slow.
+    import boto3
+    from sagemaker.local.local_session import LocalSession
+    from sagemaker.session import Session
+    from sagemaker.workflow.pipeline_context import PipelineSession, LocalPipelineSession
     from mypy_boto3_sagemaker.client import SageMakerClient
     from mypy_boto3_s3.client import S3Client
     from mypy_boto3_sagemaker_runtime.client import SageMakerRuntimeClient
     from mypy_boto3_sts.client import STSClient
 
 
+# Sessions and clients that only depend on the account and region, and can thus be shared between connectors (see `adopt_resources()`). Note: The role ARN is not among them, since it depends on the project's role name.
+_SHAREABLE_RESOURCES: tuple[str, ...] = (
+    '_boto_session', '_sm_runtime_client', 'sm_client', 's3_client', 'aws_account_id', 'sm_session', 'pipeline_session',
+)
+
+
 class BaseConnector(AWSConnectorInterface):
     """
     ABC that only implments methods shared between "normal" and local AWSConnector.
@@ -32,6 +41,8 @@ class BaseConnector(AWSConnectorInterface):
 
     @cached_property
     def _boto_session(self) -> boto3.Session:
+        import boto3
+
         return boto3.Session(region_name=self.shared_config.region)
 
     @cached_property
@@ -41,7 +52,13 @@ class BaseConnector(AWSConnectorInterface):
 
     @cached_property
     def sm_client(self) -> 'SageMakerClient':
-        return self._boto_session.client("sagemaker")
+        from botocore.config import Config
+
+        # Deploying and polling jobs can run into SageMaker's (fairly low) rate limits, so retry more often than by default, and slow down adaptively when throttled.
+        return self._boto_session.client(
+            "sagemaker",
+            config=Config(retries={'max_attempts': 10, 'mode': 'adaptive'}),
+        )
 
     @cached_property
     def s3_client(self) -> 'S3Client':
@@ -50,6 +67,8 @@ class BaseConnector(AWSConnectorInterface):
     @cached_property
     def aws_account_id(self) -> str:
         # todo: use value in configs, if specified?
+        import boto3
+
         sts_client: 'STSClient' = boto3.client("sts")
         return sts_client.get_caller_identity()["Account"]
 
@@ -59,6 +78,8 @@ class BaseConnector(AWSConnectorInterface):
         - Constructs role arn from role name
         - If role name (or AWS account ID) is not set, returns default role arn.
         """
+        from sagemaker.session import get_execution_role
+
         provided_role_name: str | None = self.shared_config.role_name
 
         if provided_role_name is None:
@@ -72,6 +93,18 @@ class BaseConnector(AWSConnectorInterface):
     def default_bucket(self) -> str:
         return self.sm_session.default_bucket()  # type: ignore
 
+    def adopt_resources(self, other: BaseConnector) -> None:
+        """
+        Reuses the sessions and clients that `other` already created, rather than creating (and authenticating) them again, e.g. when building many pipelines in the same process.
+        Both connectors must be of the same kind and region. (Since both use the same credentials, they are also in the same account.)
+        """
+        if type(other) is not type(self) or other.shared_config.region != self.shared_config.region:
+            raise ValueError('Can only adopt resources of a connector of the same kind and region.')
+        for resource_name in _SHAREABLE_RESOURCES:
+            # Cached properties are stored in the instance dict once created.
+            if resource_name in other.__dict__:
+                self.__dict__[resource_name] = other.__dict__[resource_name]
+
 
     # Abstract methods
     # ================
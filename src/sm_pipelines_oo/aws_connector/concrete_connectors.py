@@ -3,15 +3,15 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 from functools import cached_property
 
-from loguru import logger
-import boto3
-from sagemaker.local.local_session import LocalSession
-from sagemaker.session import Session, get_execution_role
-from sagemaker.workflow.pipeline_context import PipelineSession, LocalPipelineSession
-
 from sm_pipelines_oo.shared_config_schema import SharedConfig, Environment
 from sm_pipelines_oo.aws_connector.base_connector import BaseConnector
 
+if TYPE_CHECKING:
+    # Note: The SageMaker SDK is imported lazily (i.e., when a session is first created), because importing it is slow.
+    from sagemaker.local.local_session import LocalSession
+    from sagemaker.session import Session
+    from sagemaker.workflow.pipeline_context import PipelineSession, LocalPipelineSession
+
 
 class AWSConnector(BaseConnector):
     """
@@ -24,6 +24,8 @@ class AWSConnector(BaseConnector):
         Use for running individual step directly (i.e. outside of pipeline. Implies that a step actor's (e.g., processor's) .run() method will return `None` and actually run the step. See
             https://github.com/aws/sagemaker-python-sdk/blob/8462f1a1975da59304da4441aea956a43deec380/src/sagemaker/processing.py#L1763
         """
+        from sagemaker.session import Session
+
         return Session(
             boto_session=self._boto_session,
         )
@@ -34,6 +36,8 @@ class AWSConnector(BaseConnector):
         For running pipeline. Implies that a step actor's (e.g., processor's) .run() method will return  pipeline step args rather than running the step and returning `None`. See
             https://github.com/aws/sagemaker-python-sdk/blob/8462f1a1975da59304da4441aea956a43deec380/src/sagemaker/processing.py#L1763
         """
+        from sagemaker.workflow.pipeline_context import PipelineSession
+
         return PipelineSession(
             boto_session=self._boto_session,
             sagemaker_client=self.sm_client,
@@ -49,10 +53,14 @@ class LocalRunConnector(BaseConnector):
     """
     @cached_property
     def sm_session(self) -> LocalSession:
+        from sagemaker.local.local_session import LocalSession
+
         return  LocalSession()
 
     @cached_property
     def pipeline_session(self) -> LocalPipelineSession:
+        from sagemaker.workflow.pipeline_context import LocalPipelineSession
+
         return LocalPipelineSession()
 
 
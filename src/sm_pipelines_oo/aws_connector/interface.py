@@ -1,11 +1,12 @@
+# Required to not make boto3-stubs and the SageMaker SDK runtime dependencies: https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING
 
-from sagemaker.local.local_session import LocalSession
-from sagemaker.session import Session
-from sagemaker.workflow.pipeline_context import PipelineSession, LocalPipelineSession
-
 if TYPE_CHECKING:
+    from sagemaker.local.local_session import LocalSession
+    from sagemaker.session import Session
+    from sagemaker.workflow.pipeline_context import PipelineSession, LocalPipelineSession
     from mypy_boto3_sagemaker.client import SageMakerClient
     from mypy_boto3_s3.client import S3Client
 
@@ -0,0 +1,174 @@
+"""
+Batch builder for building and exporting the definitions of many pipelines (e.g. all projects in all environments, for a release) in one go.
+
+Each target (a config root and an environment) is built by its own `PipelineFacade`, but:
+- Targets are built concurrently, in a pool of `max_workers` processes. (Building steps is mostly CPU-bound, e.g. serializing definitions, so threads would not help much.)
+- Within each worker process, pipelines in the same region share their sessions and clients (see `BaseConnector.adopt_resources()`), so that the caller's identity is resolved and clients are created once per process and region, rather than once per pipeline.
+- With a definition cache, unchanged targets are exported without building any step (see `PipelineDefinitionCache`).
+Failures of individual targets don't stop the others. All outcomes are summarized in a single report.
+
+Note: Targets are built in the working directory of the batch, so relative paths in configs can't depend on it. Like the config root (which is relative to its package root), relative `source_dir`s are resolved against the folder that contains the target's config root.
+"""
+# Required to not make pipeline module (and thus the SageMaker SDK) a runtime dependency of this module: https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+import time
+
+from loguru import logger
+
+from sm_pipelines_oo.shared_config_schema import Environment
+
+if TYPE_CHECKING:
+    from sm_pipelines_oo.aws_connector.interface import AWSConnectorInterface
+
+
+# Targets and results
+# ===================
+
+@dataclass(frozen=True)
+class BuildTarget:
+    config_root: str
+    env: Environment
+
+    def __str__(self) -> str:
+        return f'{self.config_root} ({self.env})'
+
+
+@dataclass(frozen=True)
+class _BuildOptions:
+    definition_cache_dir: str | None
+    export: bool
+    compress: bool
+    step_construction_workers: int
+
+
+@dataclass
+class TargetResult:
+    target: BuildTarget
+    pipeline_name: str | None = None
+    definition_sha256: str | None = None
+    definition_uri: str | None = None  # None unless exported
+    duration: float = 0.0  # seconds
+    error: str | None = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchBuildReport:
+    results: list[TargetResult]
+    duration: float = 0.0  # seconds, of the whole batch
+
+    @property
+    def succeeded(self) -> bool:
+        return all(result.succeeded for result in self.results)
+
+    @property
+    def failed_results(self) -> list[TargetResult]:
+        return [result for result in self.results if not result.succeeded]
+
+    def format(self) -> str:
+        lines: list[str] = [
+            f'Pipelines: {len(self.results) - len(self.failed_results)} of {len(self.results)} built '
+            f'in {self.duration:.1f} s'
+        ]
+        for result in self.results:
+            if result.succeeded:
+                line = f'- {result.target}: {result.pipeline_name} ({result.duration:.1f} s'
+                line += f', exported to {result.definition_uri})' if result.definition_uri else ')'
+            else:
+                line = f'- {result.target}: FAILED: {result.error}'
+            lines.append(line)
+        return '\n'.join(lines)
+
+
+# Building a single target (in a worker process)
+# ==============================================
+
+# Connector of the last pipeline built in this process, per kind of connector and region. Each new pipeline adopts its sessions and clients.
+_connector_pool: dict[tuple[bool, str], AWSConnectorInterface] = {}
+
+
+def _build_target(target: BuildTarget, options: _BuildOptions) -> TargetResult:
+    # Avoid importing the SageMaker SDK in the parent process.
+    from sm_pipelines_oo.config_loader.implementations.file_loaders import YamlConfigLoader
+    from sm_pipelines_oo.pipeline import PipelineFacade
+    from sm_pipelines_oo.pipeline_definition import hash_definition
+
+    start = time.perf_counter()
+    try:
+        config_loader = YamlConfigLoader(
+            env=target.env,
+            config_root_folder=target.config_root,
+            source_dir_root=str(Path(target.config_root).resolve().parent),
+        )
+        pool_key = (target.env == 'local', config_loader.shared_config_as_dict['region'])
+        pipeline_facade = PipelineFacade(
+            env=target.env,
+            custom_config_loader=config_loader,
+            step_construction_workers=options.step_construction_workers,
+            definition_cache_dir=options.definition_cache_dir,
+            shared_aws_connector=_connector_pool.get(pool_key),
+        )
+        _connector_pool[pool_key] = pipeline_facade.aws_connector
+        definition: str = pipeline_facade.definition()
+        definition_uri: str | None = None
+        if options.export:
+            definition_uri = pipeline_facade.export_pipeline_definition_to_s3(
+                compress=options.compress, definition=definition,
+            ).as_uri()
+    except Exception as error:
+        logger.exception(f'Building {target} failed.')
+        return TargetResult(target, duration=time.perf_counter() - start, error=f'{type(error).__name__}: {error}')
+    return TargetResult(
+        target=target,
+        pipeline_name=pipeline_facade.pipeline_name,
+        definition_sha256=hash_definition(definition),
+        definition_uri=definition_uri,
+        duration=time.perf_counter() - start,
+    )
+
+
+# Builder
+# =======
+
+class BatchBuilder:
+    def __init__(
+        self,
+        targets: list[BuildTarget],
+        # Number of worker processes. With 1, targets are built one after another in the current process.
+        max_workers: int | None = None,
+        # Strongly recommended, so that unchanged pipelines are not rebuilt. Can be shared by all targets.
+        definition_cache_dir: str | None = '.sm_pipelines_oo_cache/definitions',
+        # If False, definitions are only generated (e.g. to check that all configs are valid).
+        export: bool = True,
+        compress: bool = False,
+        # Threads for creating the steps of each pipeline (see `PipelineFacade`)
+        step_construction_workers: int = 1,
+    ):
+        self._targets = targets
+        self._max_workers = max_workers
+        self._options = _BuildOptions(
+            definition_cache_dir=definition_cache_dir,
+            export=export,
+            compress=compress,
+            step_construction_workers=step_construction_workers,
+        )
+
+    def build(self) -> BatchBuildReport:
+        """Builds (and exports) all targets, and returns a report with one result per target, in the order of the targets."""
+        start = time.perf_counter()
+        results: list[TargetResult]
+        if self._max_workers == 1:
+            results = [_build_target(target, self._options) for target in self._targets]
+        else:
+            with ProcessPoolExecutor(max_workers=self._max_workers) as executor:
+                results = list(executor.map(_build_target, self._targets, [self._options] * len(self._targets)))
+        report = BatchBuildReport(results, duration=time.perf_counter() - start)
+        logger.info(report.format())
+        return report
@@ -0,0 +1,107 @@
+"""
+Command line interface. Run `sm-pipelines-oo --help` for usage.
+
+Note: Keep imports inside the command functions, so that each command only pays the import cost of what it actually uses.
+"""
+from typing import get_args
+import argparse
+import sys
+
+
+def _compile_config(args: argparse.Namespace) -> None:
+    from sm_pipelines_oo.config_loader.implementations.bundle_loader import compile_config_bundle
+
+    compile_config_bundle(
+        config_root_folder=args.config_root,
+        bundle_path=args.output,
+    )
+
+
+def _definition(args: argparse.Namespace) -> None:
+    from sm_pipelines_oo.config_loader.implementations.file_loaders import YamlConfigLoader
+    from sm_pipelines_oo.pipeline import PipelineFacade
+
+    # If configs and code didn't change, the cached definition is returned without building any session or step.
+    definition: str = PipelineFacade(
+        env=args.env,
+        custom_config_loader=YamlConfigLoader(env=args.env, config_root_folder=args.config_root),
+        definition_cache_dir=args.cache_dir,
+    ).definition()
+    if args.output is None:
+        sys.stdout.write(definition)
+    else:
+        with open(args.output, 'w') as file:
+            file.write(definition)
+
+
+def _build_all(args: argparse.Namespace) -> None:
+    from sm_pipelines_oo.batch_builder import BatchBuilder
+
+    report = BatchBuilder(
+        targets=args.targets,
+        max_workers=args.workers,
+        definition_cache_dir=args.cache_dir,
+        export=not args.no_export,
+        compress=args.compress,
+    ).build()
+    sys.stdout.write(report.format() + '\n')
+    if not report.succeeded:
+        sys.exit(1)
+
+
+def _parse_build_target(value: str):
+    from sm_pipelines_oo.batch_builder import BuildTarget
+    from sm_pipelines_oo.shared_config_schema import Environment
+
+    config_root, _, env = value.rpartition(':')
+    if not config_root or env not in get_args(Environment):
+        raise argparse.ArgumentTypeError(
+            f'Expected CONFIG_ROOT:ENV with ENV one of {", ".join(get_args(Environment))}, got {value}.'
+        )
+    return BuildTarget(config_root=config_root, env=env)  # type: ignore[arg-type]
+
+
+def main(argv: list[str] | None = None) -> None:
+    from sm_pipelines_oo.shared_config_schema import Environment
+
+    parser = argparse.ArgumentParser(prog='sm-pipelines-oo')
+    subparsers = parser.add_subparsers(required=True)
+
+    compile_config_parser = subparsers.add_parser(
+        'compile-config',
+        help='Validate the configs of all environments and write them into a single bundle file.',
+    )
+    compile_config_parser.add_argument('--config-root', default='config')
+    compile_config_parser.add_argument('--output', default='config.bundle')
+    compile_config_parser.set_defaults(func=_compile_config)
+
+    definition_parser = subparsers.add_parser(
+        'definition',
+        help='Print (or write) the JSON definition of the pipeline of an environment, reusing cached definitions.',
+    )
+    definition_parser.add_argument('env', choices=get_args(Environment))
+    definition_parser.add_argument('--config-root', default='config')
+    definition_parser.add_argument('--cache-dir', default='.sm_pipelines_oo_cache/definitions')
+    definition_parser.add_argument('--output', help='File to write the definition to. Defaults to stdout.')
+    definition_parser.set_defaults(func=_definition)
+
+    build_all_parser = subparsers.add_parser(
+        'build-all',
+        help='Build (and export) the pipelines of several config roots and environments in parallel, and print a summary.',
+    )
+    build_all_parser.add_argument(
+        '--target', dest='targets', action='append', required=True, type=_parse_build_target,
+        metavar='CONFIG_ROOT:ENV', help='Can be given several times.',
+    )
+    build_all_parser.add_argument('--workers', type=int, help='Number of worker processes. Defaults to the number of CPUs.')
+    build_all_parser.add_argument('--cache-dir', default='.sm_pipelines_oo_cache/definitions')
+    build_all_parser.add_argument('--no-export', action='store_true', help='Only generate definitions, without exporting them to S3.')
+    build_all_parser.add_argument('--compress', action='store_true')
+    build_all_parser.set_defaults(func=_build_all)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
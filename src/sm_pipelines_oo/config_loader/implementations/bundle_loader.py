@@ -0,0 +1,230 @@
+"""
+Precompiled config bundles for deployment.
+
+Configs are fixed at build time, so there is no need to parse YAML and validate it with pydantic every time a deployment container starts. Instead, `compile_config_bundle()` loads and validates the configs of every environment once (at build time) and writes the validated models into a single binary file. At runtime, `BundleConfigLoader` memory-maps this file and only deserializes the environment it needs.
+
+Bundle layout:
+- Header: magic bytes + offset and length of the index
+- One pickled `_BundledEnvironment` per environment
+- Index (pickled): versions the bundle was compiled with (of pydantic and this package, as well as a hash of the schema of each config model), and offset/length of each environment's payload
+
+Note: Bundles are pickle files, so only load bundles that you built yourself.
+"""
+from typing import Any, get_args
+from pathlib import Path
+from functools import cached_property
+from dataclasses import dataclass
+import hashlib
+import importlib
+import importlib.metadata
+import json
+import mmap
+import pickle
+import struct
+
+import pydantic
+from pydantic_settings import BaseSettings
+from loguru import logger
+
+from sm_pipelines_oo.config_loader.interface import ConfigLoaderInterface
+from sm_pipelines_oo.config_loader.implementations.file_loaders import BaseConfigLoader, YamlConfigLoader
+from sm_pipelines_oo.shared_config_schema import Environment, SharedConfig
+from sm_pipelines_oo.steps.interfaces import StepFactoryLookupTable
+
+
+_MAGIC = b'SMPOOCB1'
+# Magic bytes, followed by offset and length of index (unsigned 64 bit ints, little endian)
+_HEADER = struct.Struct('<8sQQ')
+_DISTRIBUTION_NAME = 'sm-pipelines-oo'
+
+
+def _package_version() -> str | None:
+    """Returns the installed version of this package, or None if it is not installed (e.g. when run from a source checkout)."""
+    try:
+        return importlib.metadata.version(_DISTRIBUTION_NAME)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def _schema_hash(config_model: type[BaseSettings]) -> str:
+    """Hash of a config model's JSON schema, which changes whenever fields are added, removed or changed."""
+    return hashlib.sha256(json.dumps(config_model.model_json_schema(), sort_keys=True).encode()).hexdigest()
+
+
+def _model_path(config_model: type[BaseSettings]) -> str:
+    return f'{config_model.__module__}:{config_model.__qualname__}'
+
+
+def _import_model(model_path: str) -> type[BaseSettings]:
+    module_name, _, qualname = model_path.partition(':')
+    model: Any = importlib.import_module(module_name)
+    for attribute in qualname.split('.'):
+        model = getattr(model, attribute)
+    return model
+
+
+@dataclass
+class _BundledEnvironment:
+    """Everything we store for one environment."""
+    # Raw dictionaries, as returned by ConfigLoaderInterface
+    shared_config_dict: dict[str, Any]
+    step_config_dicts: list[dict[str, Any]]
+    # Validated models
+    shared_config: SharedConfig
+    step_configs: list[BaseSettings]
+
+
+# Compiling the bundle (at build time)
+# ====================================
+
+def _validate_step_config(
+    step_config_dict: dict[str, Any],
+    shared_config: SharedConfig,
+    stepfactory_lookup_table: StepFactoryLookupTable,
+) -> BaseSettings:
+    """Validates step config, using the pydantic model of the step factory that the config specifies."""
+    stepfactory_cls = stepfactory_lookup_table[step_config_dict['step_factory_class']]
+    config_model: type[BaseSettings] | None = getattr(stepfactory_cls, '_config_model', None)
+    if config_model is None:
+        raise ValueError(
+            f'Step factory {stepfactory_cls.__name__} does not define a `_config_model`, so step '
+            f'{step_config_dict["step_name"]} cannot be precompiled.'
+        )
+    # Pass in the validated shared config, so that all steps share the same instance (which also keeps the bundle small).
+    return config_model(**{**step_config_dict, 'shared_config': shared_config})
+
+
+def compile_config_bundle(
+    config_root_folder: str = 'config',
+    bundle_path: str = 'config.bundle',
+    config_loader_cls: type[BaseConfigLoader] = YamlConfigLoader,
+    custom_stepfactory_lookup_table: StepFactoryLookupTable | None = None,
+) -> Path:
+    """
+    Loads and validates the configs of every environment found in the config root folder, and writes them into a single bundle file. Returns the path of the bundle.
+    """
+    # Avoid circular import
+    from sm_pipelines_oo.steps.step_factory_facade import StepFactoryFacade
+
+    stepfactory_lookup_table: StepFactoryLookupTable = (
+        StepFactoryFacade._default_stepfactory_lookup_table if custom_stepfactory_lookup_table is None
+        else custom_stepfactory_lookup_table
+    )
+    payloads: dict[str, bytes] = {}
+    # Schema hash of every config model in the bundle, keyed by import path
+    schema_hashes: dict[str, str] = {_model_path(SharedConfig): _schema_hash(SharedConfig)}
+    for env in get_args(Environment):
+        if not (Path(config_root_folder) / env).is_dir():
+            continue
+        config_loader = config_loader_cls(env=env, config_root_folder=config_root_folder)
+        shared_config = SharedConfig(**config_loader.shared_config_as_dict)
+        bundled_environment = _BundledEnvironment(
+            shared_config_dict=config_loader.shared_config_as_dict,
+            step_config_dicts=config_loader.step_configs_as_dicts,
+            shared_config=shared_config,
+            step_configs=[
+                _validate_step_config(step_config_dict, shared_config, stepfactory_lookup_table)
+                for step_config_dict in config_loader.step_configs_as_dicts
+            ],
+        )
+        payloads[env] = pickle.dumps(bundled_environment, protocol=pickle.HIGHEST_PROTOCOL)
+        for step_config in bundled_environment.step_configs:
+            schema_hashes.setdefault(_model_path(type(step_config)), _schema_hash(type(step_config)))
+        logger.info(f'Compiled {len(bundled_environment.step_configs)} step configs for environment {env}.')
+
+    if not payloads:
+        raise FileNotFoundError(f'No environment folders found in {Path(config_root_folder).resolve()}.')
+
+    output_path = Path(bundle_path)
+    with output_path.open('wb') as file:
+        # Write payloads first, so we know their offsets when writing the index. Then fill in the header.
+        file.write(bytes(_HEADER.size))
+        environments: dict[str, tuple[int, int]] = {}
+        for env, payload in payloads.items():
+            environments[env] = (file.tell(), len(payload))
+            file.write(payload)
+        index: bytes = pickle.dumps(
+            {
+                'pydantic_version': pydantic.VERSION,
+                'package_version': _package_version(),
+                'schema_hashes': schema_hashes,
+                'environments': environments,
+            },
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        index_offset = file.tell()
+        file.write(index)
+        file.seek(0)
+        file.write(_HEADER.pack(_MAGIC, index_offset, len(index)))
+    logger.info(f'Wrote config bundle to {output_path}.')
+    return output_path
+
+
+# Loading the bundle (at runtime)
+# ===============================
+
+class BundleConfigLoader(ConfigLoaderInterface):
+    """
+    Loads the configs of a single environment from a bundle created by `compile_config_bundle()`. Since the bundle contains the *validated* models, consumers such as `PipelineFacade` skip validation altogether.
+    """
+    def __init__(
+        self,
+        env: Environment,
+        bundle_path: str = 'config.bundle',
+    ):
+        self._env = env
+        self._bundle_path = Path(bundle_path)
+
+    @cached_property
+    def _bundled_environment(self) -> _BundledEnvironment:
+        with self._bundle_path.open('rb') as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            magic, index_offset, index_size = _HEADER.unpack_from(mapped_file, 0)
+            if magic != _MAGIC:
+                raise ValueError(f'{self._bundle_path} is not a config bundle.')
+            index: dict[str, Any] = pickle.loads(mapped_file[index_offset:index_offset + index_size])
+            self._check_versions(index)
+            if self._env not in index['environments']:
+                raise ValueError(f'Config bundle does not contain environment {self._env}.')
+            offset, size = index['environments'][self._env]
+            # Only deserialize the environment we actually need.
+            return pickle.loads(mapped_file[offset:offset + size])
+
+    def _check_versions(self, index: dict[str, Any]) -> None:
+        """
+        Raises a ValueError unless the bundle was compiled with the installed versions of pydantic, this package and all config models.
+        Models are unpickled without validation, so their definitions must match. (Otherwise, e.g., fields added since compiling the bundle would be missing.)
+        """
+        mismatch: str | None = None
+        if index['pydantic_version'] != pydantic.VERSION:
+            mismatch = f'pydantic {index["pydantic_version"]}, but {pydantic.VERSION} is installed'
+        elif index.get('package_version') != _package_version():
+            mismatch = f'version {index.get("package_version")} of this package, but {_package_version()} is installed'
+        else:
+            # Bundles compiled before schema hashes were stored never match.
+            for model_path, schema_hash in index.get('schema_hashes', {'<unknown>': ''}).items():
+                try:
+                    matches: bool = _schema_hash(_import_model(model_path)) == schema_hash
+                except (ImportError, AttributeError):
+                    matches = False
+                if not matches:
+                    mismatch = f'a different version of config model {model_path}'
+                    break
+        if mismatch is not None:
+            raise ValueError(f'Config bundle was compiled with {mismatch}. Please recompile the bundle.')
+
+    @cached_property
+    def shared_config_as_dict(self) -> dict[str, Any]:
+        return self._bundled_environment.shared_config_dict
+
+    @cached_property
+    def step_configs_as_dicts(self) -> list[dict[str, Any]]:
+        return self._bundled_environment.step_config_dicts
+
+    @property
+    def validated_shared_config(self) -> SharedConfig:
+        return self._bundled_environment.shared_config
+
+    @property
+    def validated_step_configs(self) -> list[BaseSettings]:
+        return self._bundled_environment.step_configs
@@ -1,68 +1,181 @@
 from abc import abstractmethod
-from typing import final, Any
+from typing import final, Any, Iterator
 from pathlib import Path
 from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import json
+import os
+import pickle
+import tempfile
 
 import yaml
+from loguru import logger
 
-from sm_pipelines_oo.config_loader.interface import ConfigLoaderInterface
+from sm_pipelines_oo.config_loader.interface import StreamingConfigLoaderInterface
 from sm_pipelines_oo.shared_config_schema import Environment
 
+# Use the C-accelerated parsers if they are available, and fall back to the pure-Python ones
+# otherwise. (libyaml is an optional build dependency of pyyaml; orjson is installed with the `orjson` extra,
+# e.g. `pip install sm-pipelines-oo[orjson]`.)
+_YamlSafeLoader: type = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+try:
+    from orjson import loads as _json_loads  # type: ignore[import-not-found]
+except ModuleNotFoundError:
+    _json_loads = json.loads
+
 
 # Abstract class implementing functionality shared by all file-based config loaders
 # ==================================================================================
 
-class BaseConfigLoader(ConfigLoaderInterface):
+class BaseConfigLoader(StreamingConfigLoaderInterface):
     """
     Abstract factory for loading configs from file into python dictionaries.
-    Concrete implementations will  implement a method for how to load a given config file, as well as an attribute of which file types to load.
+    Concrete implementations will  implement a method for how to parse the content of a given config file, as well as an attribute of which file types to load.
     This abstract class provides implementation for how to load both the shared config as well as all the steps configs.
+
+    For large config trees, step configs can optionally be parsed concurrently (`max_workers`), and parsed configs can be cached on disk (`parse_cache_dir`). The cache is keyed by a hash of each file's content, so unchanged files are not parsed again on the next build.
     """
+    # Bump this whenever the format of cached entries changes, so stale entries are ignored.
+    _parse_cache_version: int = 1
 
     # todo: get rid of init and implement as properties (as MockConfigLoader is initialized differently)
     def __init__(
         self,
         env: Environment,
         config_root_folder: str = 'config',  # relative path from package root
+        # Number of threads used for parsing step configs. Default of 1 parses files sequentially.
+        max_workers: int = 1,
+        # Directory for caching parsed configs. Caching is disabled if not provided.
+        parse_cache_dir: str | None = None,
+        # If set, relative `source_dir`s of step configs are resolved against this folder, rather than the working directory (e.g. when building pipelines of several packages in one process, see `batch_builder` module).
+        source_dir_root: str | None = None,
     ):
         self._env = env
         self._config_folder = Path(config_root_folder) / env
+        self._max_workers = max_workers
+        self._parse_cache_dir = None if parse_cache_dir is None else Path(parse_cache_dir)
+        self._source_dir_root = None if source_dir_root is None else Path(source_dir_root)
 
     @final
     @cached_property
     def shared_config_as_dict(self) -> dict[str, Any]:
-        shared_config_path: Path = self._config_folder / f'shared_config.{self._file_type_to_load}'
-        return self._load_config(shared_config_path)
+        return self._load_config_cached(self.shared_config_path)
 
     @final
     @cached_property
     def step_configs_as_dicts(self) -> list[dict[str, Any]]:
         """
-        Traverses the config directory and returns names of all subfolders, each of which will correspond to a step name.
+        Traverses the config directory and loads every step config found (i.e., every file of the matching type except for the shared config).
         """
+        step_config_paths: list[Path] = self.step_config_paths
+        # Load all files found. Note that `executor.map()` preserves the order of the paths, so the result is the same as when loading sequentially.
+        step_configs: list[dict]
+        if self._max_workers > 1 and len(step_config_paths) > 1:
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                step_configs = list(executor.map(self._load_config_cached, step_config_paths))
+        else:
+            step_configs = [self._load_config_cached(path) for path in step_config_paths]
+
+        for step_config in step_configs:
+            self._complete_step_config(step_config)
+        return step_configs
+
+    def iter_step_configs_as_dicts(self) -> Iterator[dict[str, Any]]:
+        # Note: Files are loaded sequentially here (regardless of `max_workers`), because loading ahead would defeat the purpose of bounding memory.
+        for config_path in self.step_config_paths:
+            yield self.load_step_config(config_path)
+
+    def reload(self) -> None:
+        """Discards previously loaded configs, so they are read from disk again on next access."""
+        for cached_attribute in ('shared_config_as_dict', 'step_configs_as_dicts'):
+            self.__dict__.pop(cached_attribute, None)
+
+    def load_step_config(self, config_file: Path, use_parse_cache: bool = True) -> dict[str, Any]:
+        """Loads a single step config, including the reference to the shared config. Without `use_parse_cache`, the file is parsed again even if it didn't change (e.g. to check whether parsing yields the same config every time)."""
+        step_config = self._load_config_cached(config_file) if use_parse_cache else self._load_config(config_file)
+        return self._complete_step_config(step_config)
+
+    def _complete_step_config(self, step_config: dict[str, Any]) -> dict[str, Any]:
+        """Adds the reference to the shared config to a parsed step config, and resolves its relative `source_dir` (if `source_dir_root` is set). Modifies the config in place."""
+        step_config['shared_config'] = self.shared_config_as_dict
+        if self._source_dir_root is not None:
+            for section in ('processor_run_config', 'estimator_config'):
+                section_config: Any = step_config.get(section)
+                source_dir: Any = section_config.get('source_dir') if isinstance(section_config, dict) else None
+                # source_dir may also be an S3 URI, which is left as is.
+                if isinstance(source_dir, str) and not source_dir.startswith('s3://') and not Path(source_dir).is_absolute():
+                    section_config['source_dir'] = str(self._source_dir_root / source_dir)
+        return step_config
+
+    @property
+    def shared_config_path(self) -> Path:
+        return self._config_folder / f'shared_config.{self._file_type_to_load}'
+
+    @property
+    def step_config_paths(self) -> list[Path]:
+        """Returns paths of all step config files in the config directory."""
         # Find all files in the config directory that match the file type we are looking for.
         # Note: Since we are using Path.suffix, we need to add a `.` to the file extension.
         file_suffix_to_match = f'.{self._file_type_to_load}'
-        step_config_paths: list[Path] = [
+        return [
             path for path in self._config_folder.iterdir() if (
                 # Get all files with the matching extension, except for the shared config file
                 (path.suffix == file_suffix_to_match) and (path.stem != 'shared_config')
             )
         ]
-        # Load all files found
-        step_configs: list[dict] = []
-        for config_path in step_config_paths:
-            step_config = self._load_config(config_path)
-            # Add reference to shared config to each step config
-            step_config['shared_config'] = self.shared_config_as_dict
-            step_configs.append(step_config)
-        return step_configs
+
+    def _load_config(self, config_file: Path) -> dict[str, Any]:
+        return self._parse_config(config_file.read_bytes())
+
+    def _load_config_cached(self, config_file: Path) -> dict[str, Any]:
+        """
+        Loads config file, using the on-disk parse cache if enabled.
+
+        Note: The cache stores pickled dictionaries, so the cache directory must not be writable by untrusted users.
+        """
+        if self._parse_cache_dir is None:
+            return self._load_config(config_file)
+
+        content: bytes = config_file.read_bytes()
+        # Include loader class and cache version in key, so different parsers never share entries.
+        cache_key: str = hashlib.sha256(
+            f'{type(self).__name__}-v{self._parse_cache_version}\n'.encode() + content
+        ).hexdigest()
+        cache_file: Path = self._parse_cache_dir / f'{cache_key}.pickle'
+        try:
+            with cache_file.open('rb') as file:
+                return pickle.load(file)
+        except FileNotFoundError:
+            pass
+        except (pickle.UnpicklingError, EOFError) as e:
+            logger.warning(f'Ignoring corrupt parse cache entry {cache_file}: {e}')
+
+        config: dict[str, Any] = self._parse_config(content)
+        self._write_cache_entry(cache_file, config)
+        return config
+
+    def _write_cache_entry(self, cache_file: Path, config: dict[str, Any]) -> None:
+        # Write to temporary file first and then rename it, so concurrent builds never read partially written entries.
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=cache_file.parent, delete=False) as tmp_file:
+            try:
+                pickle.dump(config, tmp_file, protocol=pickle.HIGHEST_PROTOCOL)
+            except BaseException:
+                # Don't leave partially written entries behind.
+                tmp_file.close()
+                os.remove(tmp_file.name)
+                raise
+        try:
+            os.replace(tmp_file.name, cache_file)
+        except BaseException:
+            os.remove(tmp_file.name)
+            raise
 
     # Abstract methods that concrete implementations must implement
     # --------------------------------------------------------------
     @abstractmethod
-    def _load_config(self, config_file: Path) -> dict[str, Any]:
+    def _parse_config(self, content: bytes) -> dict[str, Any]:
         ...
 
     @property
@@ -85,9 +198,8 @@ class YamlConfigLoader(BaseConfigLoader):
     def _file_type_to_load(self) -> str:
         return 'yaml'
 
-    def _load_config(self, config_file: Path) -> dict[str, Any]:
-        with open(config_file, 'r') as file:
-            return yaml.safe_load(file)
+    def _parse_config(self, content: bytes) -> dict[str, Any]:
+        return yaml.load(content, Loader=_YamlSafeLoader)
 
 
 # JSON
@@ -100,6 +212,5 @@ class JSONConfigLoader(BaseConfigLoader):
     def _file_type_to_load(self) -> str:
         return 'json'
 
-    def _load_config(self, config_file: Path) -> dict[str, Any]:
-        with open(config_file, 'r') as file:
-            return json.load(file)
+    def _parse_config(self, content: bytes) -> dict[str, Any]:
+        return _json_loads(content)
@@ -1,7 +1,13 @@
+# Required to not make pydantic models a runtime dependency of the interface: https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterator
 from functools import cached_property
 
+if TYPE_CHECKING:
+    from pydantic_settings import BaseSettings
+    from sm_pipelines_oo.shared_config_schema import SharedConfig
+
 
 class ConfigLoaderInterface(ABC):
     @cached_property
@@ -13,3 +19,22 @@ class ConfigLoaderInterface(ABC):
     @abstractmethod
     def step_configs_as_dicts(self) -> list[dict[str, Any]]:
         ...
+
+    # Optional: Loaders that can provide *already validated* configs (e.g. from a precompiled bundle) override these, so consumers can skip validation. By default, consumers validate the dictionaries above.
+    @property
+    def validated_shared_config(self) -> SharedConfig | None:
+        return None
+
+    @property
+    def validated_step_configs(self) -> list[BaseSettings] | None:
+        return None
+
+
+class StreamingConfigLoaderInterface(ConfigLoaderInterface):
+    """
+    For config loaders that can also provide step configs one at a time, so that pipelines with thousands of steps never need to hold all raw configs in memory at once.
+    """
+    @abstractmethod
+    def iter_step_configs_as_dicts(self) -> Iterator[dict[str, Any]]:
+        """Yields the same configs as `step_configs_as_dicts`, but loads each one only when requested (and does not cache it)."""
+        ...
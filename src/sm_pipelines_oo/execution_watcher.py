@@ -0,0 +1,316 @@
+"""
+Watcher that follows one or more pipeline executions until they finished.
+
+Unlike `PipelineExecution.wait()`, which polls at a fixed interval and reports nothing until the execution finished, the watcher reports every step as it starts and finishes:
+- Each change of a step's status is emitted as a `StepEvent` (with the step's duration, once it finished). Events are logged (with the event bound as `step_event`, for structured log sinks) and passed to `on_event`.
+- Polling is adaptive: After each poll without news, the interval grows by `backoff_factor` (up to `max_poll_interval`), and it is reset to `min_poll_interval` whenever something changed. If a running step's expected duration is known, the watcher polls again right when it is expected to finish. Durations of finished steps are remembered as expectations, which helps when watching many executions of the same pipeline (e.g. backfills).
+- If SageMaker throttles requests, the interval is doubled (up to `max_poll_interval`).
+- Optionally (if given a CloudWatch Logs client), the logs of each step's processing or training job are tailed while it runs.
+All executions are watched concurrently in a single asyncio event loop.
+"""
+# Required to not make boto3-stubs a runtime dependency: https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Callable, Literal, Mapping, Sequence
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+import asyncio
+import random
+
+from botocore.exceptions import ClientError
+from loguru import logger
+
+from sm_pipelines_oo.job_launcher import is_throttling_error
+
+if TYPE_CHECKING:
+    from mypy_boto3_sagemaker.client import SageMakerClient
+    from mypy_boto3_logs.client import CloudWatchLogsClient
+
+
+StepEventKind = Literal['Started', 'Succeeded', 'Failed', 'Stopped']
+
+_TERMINAL_EXECUTION_STATUSES = {'Succeeded', 'Failed', 'Stopped', 'CompletedWithFailures'}
+_TERMINAL_STEP_STATUSES = {'Succeeded', 'Failed', 'Stopped'}
+
+# Metadata key of a step's job -> log group of that kind of job
+_JOB_LOG_GROUPS: dict[str, str] = {
+    'ProcessingJob': '/aws/sagemaker/ProcessingJobs',
+    'TrainingJob': '/aws/sagemaker/TrainingJobs',
+}
+
+
+# Events and results
+# ==================
+
+@dataclass(frozen=True)
+class StepEvent:
+    execution_arn: str
+    step_name: str
+    kind: StepEventKind
+    timestamp: datetime
+    duration: float | None = None  # seconds, only for events of finished steps
+    job_arn: str | None = None
+    failure_reason: str | None = None
+    cache_hit: bool = False
+
+    def format(self) -> str:
+        message = f'Step {self.step_name} {self.kind.lower()}'
+        if self.duration is not None:
+            message += f' after {self.duration:.0f} s'
+        if self.cache_hit:
+            message += ' (cache hit)'
+        if self.failure_reason:
+            message += f': {self.failure_reason}'
+        return message + '.'
+
+
+@dataclass
+class ExecutionOutcome:
+    execution_arn: str
+    status: str = 'Executing'
+    failure_reason: str | None = None
+    events: list[StepEvent] = field(default_factory=list)
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == 'Succeeded'
+
+    @property
+    def step_durations(self) -> dict[str, float]:
+        """Step name -> duration in seconds, for every finished step."""
+        return {event.step_name: event.duration for event in self.events if event.duration is not None}
+
+
+# Watcher
+# =======
+
+class ExecutionWatcher:
+    def __init__(
+        self,
+        sagemaker_client: SageMakerClient,
+        # If given, the logs of running jobs are tailed.
+        logs_client: CloudWatchLogsClient | None = None,
+        min_poll_interval: float = 5.0,  # seconds
+        max_poll_interval: float = 120.0,  # seconds
+        backoff_factor: float = 1.5,
+        # Step name -> expected duration in seconds, e.g. from earlier executions
+        expected_step_durations: Mapping[str, float] | None = None,
+        on_event: Callable[[StepEvent], None] | None = None,
+    ):
+        self._sagemaker_client = sagemaker_client
+        self._logs_client = logs_client
+        self._min_poll_interval = min_poll_interval
+        self._max_poll_interval = max_poll_interval
+        self._backoff_factor = backoff_factor
+        self._expected_step_durations: dict[str, float] = dict(expected_step_durations or {})
+        self._on_event = on_event
+
+    def watch(self, execution_arns: Sequence[str]) -> list[ExecutionOutcome]:
+        """Blocks until all executions finished. Outcomes are returned in the order of `execution_arns`."""
+        return asyncio.run(self.watch_async(execution_arns))
+
+    async def watch_async(self, execution_arns: Sequence[str]) -> list[ExecutionOutcome]:
+        return list(await asyncio.gather(*(
+            self._watch_execution(execution_arn) for execution_arn in execution_arns
+        )))
+
+    async def _watch_execution(self, execution_arn: str) -> ExecutionOutcome:
+        outcome = ExecutionOutcome(execution_arn)
+        # Step name -> last seen status
+        step_statuses: dict[str, str] = {}
+        # Job ARN -> (event that is set once the job's step finished, task tailing the job's logs)
+        log_tailers: dict[str, tuple[asyncio.Event, asyncio.Task[None]]] = {}
+        delay = self._min_poll_interval
+        try:
+            while True:
+                try:
+                    description: dict[str, Any] = await asyncio.to_thread(
+                        self._sagemaker_client.describe_pipeline_execution, PipelineExecutionArn=execution_arn,
+                    )
+                    steps: list[dict[str, Any]] = await asyncio.to_thread(self._list_steps, execution_arn)
+                except ClientError as error:
+                    if not is_throttling_error(error):
+                        raise
+                    delay = min(self._max_poll_interval, delay * 2)
+                    logger.debug(f'Throttled while polling execution {execution_arn}. Backing off to {delay:.0f} s.')
+                    await asyncio.sleep(random.uniform(delay / 2, delay))
+                    continue
+
+                events: list[StepEvent] = self._detect_events(execution_arn, steps, step_statuses)
+                for event in events:
+                    self._emit(outcome, event)
+                if self._logs_client is not None:
+                    self._update_log_tailers(steps, log_tailers)
+
+                outcome.status = description['PipelineExecutionStatus']
+                if outcome.status in _TERMINAL_EXECUTION_STATUSES:
+                    outcome.failure_reason = description.get('FailureReason')
+                    break
+                delay = self._next_delay(delay, changed=bool(events), steps=steps)
+                await asyncio.sleep(delay)
+        finally:
+            # Let tailers fetch the remaining logs before returning.
+            for step_finished, _ in log_tailers.values():
+                step_finished.set()
+            await asyncio.gather(*(tailer for _, tailer in log_tailers.values()), return_exceptions=True)
+
+        logger.info(f'Pipeline execution {execution_arn} finished with status {outcome.status}.')
+        return outcome
+
+    def _list_steps(self, execution_arn: str) -> list[dict[str, Any]]:
+        steps: list[dict[str, Any]] = []
+        kwargs: dict[str, Any] = {'PipelineExecutionArn': execution_arn}
+        while True:
+            response = self._sagemaker_client.list_pipeline_execution_steps(**kwargs)
+            steps.extend(response['PipelineExecutionSteps'])  # type: ignore[arg-type]
+            if not response.get('NextToken'):
+                return steps
+            kwargs['NextToken'] = response['NextToken']
+
+    # Events
+    # ------
+    def _detect_events(
+        self,
+        execution_arn: str,
+        steps: list[dict[str, Any]],
+        step_statuses: dict[str, str],  # Updated in place
+    ) -> list[StepEvent]:
+        """Compares the steps' statuses with the previously seen ones, and returns an event for every change."""
+        events: list[StepEvent] = []
+        for step in steps:
+            step_name: str = step['StepName']
+            status: str = step['StepStatus']
+            previous_status: str | None = step_statuses.get(step_name)
+            if status == previous_status or status == 'Starting':
+                continue
+            step_statuses[step_name] = status
+            job_arn: str | None = _get_job_arn(step)
+            start_time: datetime | None = step.get('StartTime')
+            # Steps may finish between two polls, in which case they were never seen running.
+            if previous_status is None:
+                events.append(StepEvent(
+                    execution_arn, step_name, 'Started', start_time or _now(), job_arn=job_arn,
+                ))
+            if status not in _TERMINAL_STEP_STATUSES:
+                continue
+            end_time: datetime = step.get('EndTime') or _now()
+            events.append(StepEvent(
+                execution_arn=execution_arn,
+                step_name=step_name,
+                kind=status,  # type: ignore[arg-type]
+                timestamp=end_time,
+                duration=(end_time - start_time).total_seconds() if start_time else None,
+                job_arn=job_arn,
+                failure_reason=step.get('FailureReason'),
+                cache_hit='CacheHitResult' in step,
+            ))
+        return events
+
+    def _emit(self, outcome: ExecutionOutcome, event: StepEvent) -> None:
+        outcome.events.append(event)
+        # Cache hits finish instantly, so they would distort expectations.
+        if event.kind == 'Succeeded' and event.duration is not None and not event.cache_hit:
+            self._expected_step_durations[event.step_name] = event.duration
+        log = logger.bind(step_event=asdict(event))
+        if event.kind == 'Failed':
+            log.error(event.format())
+        else:
+            log.info(event.format())
+        if self._on_event is not None:
+            self._on_event(event)
+
+    # Polling interval
+    # ----------------
+    def _next_delay(self, delay: float, changed: bool, steps: list[dict[str, Any]]) -> float:
+        delay = self._min_poll_interval if changed else min(self._max_poll_interval, delay * self._backoff_factor)
+        now = _now()
+        for step in steps:
+            expected_duration: float | None = self._expected_step_durations.get(step['StepName'])
+            if step['StepStatus'] != 'Executing' or expected_duration is None or step.get('StartTime') is None:
+                continue
+            remaining = expected_duration - (now - step['StartTime']).total_seconds()
+            # Note: Overdue steps don't tighten polling, otherwise a step that overran would be polled at the minimum interval until it finished.
+            if remaining > 0:
+                delay = min(delay, max(self._min_poll_interval, remaining))
+        return delay
+
+    # Log tailing
+    # -----------
+    def _update_log_tailers(
+        self,
+        steps: list[dict[str, Any]],
+        log_tailers: dict[str, tuple[asyncio.Event, asyncio.Task[None]]],  # Updated in place
+    ) -> None:
+        for step in steps:
+            job_arn: str | None = _get_job_arn(step)
+            log_group: str | None = _get_log_group(step)
+            if job_arn is None or log_group is None:
+                continue
+            if job_arn not in log_tailers and step['StepStatus'] == 'Executing':
+                step_finished = asyncio.Event()
+                tailer = asyncio.create_task(self._tail_logs(step['StepName'], job_arn, log_group, step_finished))
+                log_tailers[job_arn] = (step_finished, tailer)
+            elif job_arn in log_tailers and step['StepStatus'] in _TERMINAL_STEP_STATUSES:
+                log_tailers[job_arn][0].set()
+
+    async def _tail_logs(self, step_name: str, job_arn: str, log_group: str, step_finished: asyncio.Event) -> None:
+        """Logs new log events of a job until its step finished (and all of its events were logged)."""
+        assert self._logs_client is not None
+        job_name: str = job_arn.split('/')[-1]
+        start_time = 0  # milliseconds since epoch
+        # Events at `start_time` that were logged already (the next request includes them again)
+        seen_event_ids: set[str] = set()
+        while True:
+            is_last_round: bool = step_finished.is_set()
+            kwargs: dict[str, Any] = {
+                'logGroupName': log_group,
+                # Each instance of a job writes its own stream, named '<job name>/<instance>'.
+                'logStreamNamePrefix': f'{job_name}/',
+                'startTime': start_time,
+            }
+            try:
+                while True:
+                    response = await asyncio.to_thread(self._logs_client.filter_log_events, **kwargs)
+                    for log_event in response['events']:
+                        if log_event['eventId'] in seen_event_ids:
+                            continue
+                        if log_event['timestamp'] > start_time:
+                            start_time = log_event['timestamp']
+                            seen_event_ids = set()
+                        seen_event_ids.add(log_event['eventId'])
+                        logger.info(f'[{step_name}] {log_event["message"].rstrip()}')
+                    if not response.get('nextToken'):
+                        break
+                    kwargs['nextToken'] = response['nextToken']
+            except ClientError as error:
+                # Log group does not exist before the first job wrote to it.
+                if error.response.get('Error', {}).get('Code') != 'ResourceNotFoundException' \
+                        and not is_throttling_error(error):
+                    # Tailing is best effort, so don't fail watching the execution.
+                    logger.warning(f'Stopped tailing logs of step {step_name}: {error}')
+                    return
+            if is_last_round:
+                return
+            try:
+                await asyncio.wait_for(step_finished.wait(), timeout=self._min_poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+def _get_job_arn(step: dict[str, Any]) -> str | None:
+    metadata: dict[str, Any] = step.get('Metadata', {})
+    for job_kind in _JOB_LOG_GROUPS:
+        if job_kind in metadata:
+            return metadata[job_kind].get('Arn')
+    return None
+
+
+def _get_log_group(step: dict[str, Any]) -> str | None:
+    metadata: dict[str, Any] = step.get('Metadata', {})
+    for job_kind, log_group in _JOB_LOG_GROUPS.items():
+        if job_kind in metadata:
+            return log_group
+    return None
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
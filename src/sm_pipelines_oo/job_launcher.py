@@ -0,0 +1,208 @@
+"""
+Launcher for running processing jobs directly (i.e., outside a pipeline), e.g. for backfills.
+
+Unlike `StepFactory.run_processor()`, which blocks until its job finished, the launcher keeps up to `max_concurrent_jobs` jobs running at a time. Instead of one waiter per job (each polling SageMaker on its own), a single asyncio polling loop tracks all running jobs:
+- Jobs are polled one after another, every `poll_interval` seconds (with jitter, so that several launchers don't poll in lockstep).
+- If SageMaker throttles requests, the interval is doubled (up to `max_poll_interval`) until polling succeeds again.
+Jobs are only submitted once all jobs they depend on completed, and are skipped if any of them did not.
+"""
+# Required to not make boto3-stubs a runtime dependency: https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Callable, Literal
+from dataclasses import dataclass
+import asyncio
+import random
+import time
+
+from botocore.exceptions import ClientError
+from loguru import logger
+
+if TYPE_CHECKING:
+    from mypy_boto3_sagemaker.client import SageMakerClient
+
+
+# Starts a job and returns its name, e.g. `StepFactory.start_processing_job`
+JobSubmitter = Callable[[], str]
+
+JobStatus = Literal['Completed', 'Failed', 'Stopped', 'SubmissionFailed', 'Skipped']
+
+_TERMINAL_STATUSES = {'Completed', 'Failed', 'Stopped'}
+_THROTTLING_ERROR_CODES = {'ThrottlingException', 'Throttling', 'TooManyRequestsException', 'RequestLimitExceeded'}
+
+
+def is_throttling_error(error: Exception) -> bool:
+    return isinstance(error, ClientError) and error.response.get('Error', {}).get('Code') in _THROTTLING_ERROR_CODES
+
+
+# Results
+# =======
+
+@dataclass
+class JobOutcome:
+    step_name: str
+    status: JobStatus
+    job_name: str | None = None  # None if the job was never submitted
+    duration: float = 0.0  # seconds
+    failure_reason: str | None = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == 'Completed'
+
+
+@dataclass
+class LaunchSummary:
+    outcomes: list[JobOutcome]
+
+    @property
+    def succeeded(self) -> bool:
+        return all(outcome.succeeded for outcome in self.outcomes)
+
+    @property
+    def failed_outcomes(self) -> list[JobOutcome]:
+        return [outcome for outcome in self.outcomes if not outcome.succeeded]
+
+    def format(self) -> str:
+        lines: list[str] = [
+            f'Jobs: {len(self.outcomes) - len(self.failed_outcomes)} of {len(self.outcomes)} completed'
+        ]
+        for outcome in self.outcomes:
+            line = f'- {outcome.step_name}: {outcome.status}'
+            if outcome.job_name is not None:
+                line += f' ({outcome.job_name}, {outcome.duration:.0f} s)'
+            if outcome.failure_reason:
+                line += f': {outcome.failure_reason}'
+            lines.append(line)
+        return '\n'.join(lines)
+
+
+# Launcher
+# ========
+
+class JobLauncher:
+    def __init__(
+        self,
+        sagemaker_client: SageMakerClient,
+        max_concurrent_jobs: int = 8,
+        poll_interval: float = 30.0,  # seconds
+        max_poll_interval: float = 300.0,  # seconds, when backing off due to throttling
+    ):
+        self._sagemaker_client = sagemaker_client
+        self._max_concurrent_jobs = max_concurrent_jobs
+        self._poll_interval = poll_interval
+        self._max_poll_interval = max_poll_interval
+
+    def launch(
+        self,
+        submitters: dict[str, JobSubmitter],  # Step name -> submitter
+        upstream: dict[str, set[str]] | None = None,  # Step name -> names of steps it depends on
+    ) -> LaunchSummary:
+        """Runs all jobs and blocks until they finished. Outcomes are returned in the order of `submitters`."""
+        return asyncio.run(self.launch_async(submitters, upstream))
+
+    async def launch_async(
+        self,
+        submitters: dict[str, JobSubmitter],
+        upstream: dict[str, set[str]] | None = None,
+    ) -> LaunchSummary:
+        upstream = upstream or {}
+        semaphore = asyncio.Semaphore(self._max_concurrent_jobs)
+        # Job name -> future, which the polling loop resolves with the job's final description
+        watched_jobs: dict[str, asyncio.Future[dict[str, Any]]] = {}
+        jobs_added = asyncio.Event()
+        tasks: dict[str, asyncio.Task[JobOutcome]] = {}
+        for step_name, submitter in submitters.items():
+            tasks[step_name] = asyncio.create_task(self._run_job(
+                step_name, submitter, upstream.get(step_name, set()), tasks, semaphore, watched_jobs, jobs_added,
+            ))
+        polling_loop = asyncio.create_task(self._poll(watched_jobs, jobs_added))
+        try:
+            outcomes: list[JobOutcome] = list(await asyncio.gather(*tasks.values()))
+        finally:
+            polling_loop.cancel()
+        summary = LaunchSummary(outcomes)
+        logger.info(summary.format())
+        return summary
+
+    async def _run_job(
+        self,
+        step_name: str,
+        submitter: JobSubmitter,
+        upstream_step_names: set[str],
+        tasks: dict[str, asyncio.Task[JobOutcome]],
+        semaphore: asyncio.Semaphore,
+        watched_jobs: dict[str, asyncio.Future[dict[str, Any]]],
+        jobs_added: asyncio.Event,
+    ) -> JobOutcome:
+        # Note: Upstream steps that are not launched (e.g. already backfilled) are not waited for.
+        upstream_outcomes: list[JobOutcome] = [
+            await tasks[upstream_step_name] for upstream_step_name in upstream_step_names if upstream_step_name in tasks
+        ]
+        if not all(outcome.succeeded for outcome in upstream_outcomes):
+            return JobOutcome(step_name, 'Skipped', failure_reason='Upstream job did not complete.')
+
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                # Submitting may involve uploading code, so don't block the event loop.
+                job_name: str = await asyncio.to_thread(submitter)
+            except Exception as error:
+                logger.error(f'Submitting job of step {step_name} failed: {error}')
+                return JobOutcome(step_name, 'SubmissionFailed', failure_reason=str(error))
+            logger.info(f'Started job {job_name} of step {step_name}.')
+
+            description_future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+            watched_jobs[job_name] = description_future
+            jobs_added.set()
+            try:
+                description = await description_future
+            except Exception as error:
+                # Job status is unknown, so it's treated as failed.
+                logger.error(f'Polling job {job_name} of step {step_name} failed: {error}')
+                return JobOutcome(step_name, 'Failed', job_name, time.monotonic() - start, str(error))
+
+        # Prefer the job's own timing, which excludes waiting for a slot or the next poll.
+        if description.get('ProcessingStartTime') and description.get('ProcessingEndTime'):
+            duration = (description['ProcessingEndTime'] - description['ProcessingStartTime']).total_seconds()
+        else:
+            duration = time.monotonic() - start
+        return JobOutcome(
+            step_name=step_name,
+            status=description['ProcessingJobStatus'],
+            job_name=job_name,
+            duration=duration,
+            failure_reason=description.get('FailureReason'),
+        )
+
+    async def _poll(
+        self,
+        watched_jobs: dict[str, asyncio.Future[dict[str, Any]]],
+        jobs_added: asyncio.Event,
+    ) -> None:
+        """Polls all watched jobs until cancelled, resolving each job's future once it reached a terminal status."""
+        delay = self._poll_interval
+        while True:
+            if not watched_jobs:
+                jobs_added.clear()
+                await jobs_added.wait()
+            throttled = False
+            for job_name, description_future in list(watched_jobs.items()):
+                try:
+                    description: dict[str, Any] = await asyncio.to_thread(
+                        self._sagemaker_client.describe_processing_job, ProcessingJobName=job_name,
+                    )
+                except Exception as error:
+                    if is_throttling_error(error):
+                        # Back off, and poll the remaining jobs in the next round.
+                        throttled = True
+                        break
+                    description_future.set_exception(error)
+                    del watched_jobs[job_name]
+                    continue
+                if description['ProcessingJobStatus'] in _TERMINAL_STATUSES:
+                    description_future.set_result(description)
+                    del watched_jobs[job_name]
+            delay = min(self._max_poll_interval, delay * 2) if throttled else self._poll_interval
+            if throttled:
+                logger.debug(f'Throttled while polling jobs. Backing off to {delay:.0f} s.')
+            await asyncio.sleep(random.uniform(delay / 2, delay))
@@ -0,0 +1,242 @@
+"""
+Lightweight local executor: Runs the steps of a pipeline on the local machine, without Docker or AWS.
+
+`LocalPipelineSession` starts a container for every step and runs steps one after another, so even small pipelines take minutes. Instead, this executor runs each step's `code` directly in a Python subprocess:
+- S3 is replaced by a local folder: `s3://<bucket>/<key>` maps to `<local_s3_root>/<bucket>/<key>`.
+- Processing inputs and outputs are made available in a temporary processing folder (`<processing_dir>/<input_or_output_name>`), just like they would be under `/opt/ml/processing` on SageMaker. The processing folder is passed to the step's code in the environment variable `SM_PROCESSING_DIR`, so code needs to resolve its paths relative to it, e.g. `os.environ.get('SM_PROCESSING_DIR', '/opt/ml/processing')`.
+- Steps run as soon as all steps they depend on (see `dag` module) succeeded, so independent steps run concurrently (up to `max_workers` processes at a time).
+- Only configs are needed (see `run_locally()`), no AWS credentials, role or region.
+
+Note: This is meant for fast feedback during development. Code runs in the local Python environment rather than the framework container, so dependencies may differ. Fanned-out steps (see `fan_out` module) run as a single step, on their whole input.
+"""
+# Allows type hints of config loaders and lookup tables without importing them at runtime
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from loguru import logger
+from pydantic_settings import BaseSettings
+
+from sm_pipelines_oo.steps.dag import StepDag, get_s3_uris
+from sm_pipelines_oo.steps.registry import step_factory_registry
+from sm_pipelines_oo.steps.step_factory_facade import validate_step_configs
+
+if TYPE_CHECKING:
+    from sm_pipelines_oo.config_loader.interface import ConfigLoaderInterface
+    from sm_pipelines_oo.steps.interfaces import StepFactoryLookupTable
+
+
+@dataclass
+class LocalStepResult:
+    step_name: str
+    returncode: int | None  # None if the step's code could not be started
+    duration: float  # seconds
+    log_file: Path
+    # Why the step's code could not be started, e.g. because an input is missing
+    error: str | None = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.returncode == 0
+
+
+class LocalExecutionError(Exception):
+    """Raised if any step failed. Steps downstream of failed steps are skipped."""
+    def __init__(self, failed_steps: list[LocalStepResult], skipped_step_names: list[str]):
+        self.failed_steps = failed_steps
+        self.skipped_step_names = skipped_step_names
+        details = '\n'.join(
+            f'- {result.step_name} ({result.error or f"exit code {result.returncode}"}), see {result.log_file}'
+            for result in failed_steps
+        )
+        super().__init__(
+            f'{len(failed_steps)} step(s) failed:\n{details}\n'
+            f'Skipped {len(skipped_step_names)} downstream step(s): {", ".join(skipped_step_names) or "-"}'
+        )
+
+
+def _get(config: dict[str, Any] | BaseSettings, key: str, default: Any = None) -> Any:
+    if isinstance(config, dict):
+        return config.get(key, default)
+    return getattr(config, key, default)
+
+
+class LocalExecutor:
+    def __init__(
+        self,
+        step_configs: list[dict[str, Any]] | list[BaseSettings],
+        local_s3_root: str | Path = '.local_s3',
+        # Where to create the processing folders and logs of all steps. Defaults to a new temporary folder.
+        work_dir: str | Path | None = None,
+        max_workers: int | None = None,  # Defaults to the number of CPUs
+    ):
+        for step_config in step_configs:
+            if _get(step_config, 'processor_run_config') is None:
+                raise ValueError(
+                    f'Step {_get(step_config, "step_name")} has no processor_run_config, so it cannot be run locally.'
+                )
+            for input_name, input_config in (_get(_get(step_config, 'processor_run_config'), 'inputs') or {}).items():
+                if not isinstance(input_config, str) and _get(input_config, 'athena_query') is not None:
+                    raise ValueError(
+                        f'Input {input_name} of step {_get(step_config, "step_name")} is an Athena query, '
+                        'which cannot be run locally. Use a local copy of its result as S3 input instead.'
+                    )
+                if not isinstance(input_config, str) and _get(input_config, 's3_data_type') == 'ManifestFile':
+                    raise ValueError(
+                        f'Input {input_name} of step {_get(step_config, "step_name")} is a manifest file, '
+                        'which cannot be run locally.'
+                    )
+        self._step_configs: dict[str, dict[str, Any] | BaseSettings] = {
+            _get(step_config, 'step_name'): step_config for step_config in step_configs
+        }
+        self._dag = StepDag(step_configs)
+        self._local_s3_root = Path(local_s3_root).resolve()
+        self._work_dir = Path(work_dir or tempfile.mkdtemp(prefix='sm_pipelines_oo_')).resolve()
+        self._max_workers = max_workers or os.cpu_count() or 1
+
+    def local_path(self, s3_uri: str) -> Path:
+        """Returns the local path that stands in for an S3 URI."""
+        return self._local_s3_root / s3_uri.removeprefix('s3://').rstrip('/')
+
+    # Running steps
+    # -------------
+    def run(self) -> dict[str, LocalStepResult]:
+        """Runs all steps, respecting dependencies between them. Returns the results of all steps, or raises a LocalExecutionError if any failed."""
+        # Also detects cycles, before running anything.
+        self._dag.generations()
+        upstream: dict[str, set[str]] = {
+            step_name: {edge.upstream_step_name for edge in edges}
+            for step_name, edges in self._dag.edges.items()
+        }
+        pending: list[str] = list(self._dag.step_names)
+        results: dict[str, LocalStepResult] = {}
+        # Each step runs in its own subprocess, so threads only wait for these processes.
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            running: dict[Future, str] = {}
+            while pending or running:
+                # Start all steps whose upstream steps succeeded
+                for step_name in [step_name for step_name in pending if upstream[step_name] <= results.keys()]:
+                    if all(results[upstream_step].succeeded for upstream_step in upstream[step_name]):
+                        running[executor.submit(self._run_step, step_name)] = step_name
+                    pending.remove(step_name)
+                if not running:
+                    # Remaining steps depend on failed steps
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result: LocalStepResult = future.result()
+                    results[running.pop(future)] = result
+                    logger.info(
+                        f'Step {result.step_name} {"succeeded" if result.succeeded else "failed"} '
+                        f'after {result.duration:.1f} s.'
+                    )
+
+        failed_steps = [result for result in results.values() if not result.succeeded]
+        if failed_steps:
+            skipped = [step_name for step_name in self._dag.step_names if step_name not in results]
+            raise LocalExecutionError(failed_steps, skipped)
+        return results
+
+    def _run_step(self, step_name: str) -> LocalStepResult:
+        step_config = self._step_configs[step_name]
+        run_config = _get(step_config, 'processor_run_config')
+        init_config = _get(step_config, 'processor_init_config')
+        step_dir = self._work_dir / step_name
+        processing_dir = step_dir / 'processing'
+        log_file = step_dir / 'log.txt'
+        try:
+            self._prepare_processing_dir(
+                processing_dir,
+                get_s3_uris(step_config, 'inputs'),
+                get_s3_uris(step_config, 'outputs'),
+            )
+        except FileNotFoundError as e:
+            # Reported like any other failed step, so that independent steps still run.
+            log_file.write_text(f'{e}\n')
+            return LocalStepResult(step_name=step_name, returncode=None, duration=0.0, log_file=log_file, error=str(e))
+
+        source_dir = Path(_get(run_config, 'source_dir')).resolve()
+        env: dict[str, str] = {
+            **os.environ,
+            **(_get(init_config, 'env') or {}),
+            'SM_PROCESSING_DIR': str(processing_dir),
+            # Like on SageMaker, modules in source_dir can be imported by the entry point.
+            'PYTHONPATH': os.pathsep.join(filter(None, [str(source_dir), os.environ.get('PYTHONPATH')])),
+        }
+        logger.info(f'Running step {step_name} locally. Logs: {log_file}')
+        start = time.perf_counter()
+        with log_file.open('w') as log:
+            completed_process = subprocess.run(
+                [sys.executable, _get(run_config, 'code')],
+                cwd=source_dir,
+                env=env,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                check=False,  # Failures are reported in the result
+            )
+        return LocalStepResult(
+            step_name=step_name,
+            returncode=completed_process.returncode,
+            duration=time.perf_counter() - start,
+            log_file=log_file,
+        )
+
+    def _prepare_processing_dir(
+        self,
+        processing_dir: Path,
+        inputs: dict[str, str],
+        outputs: dict[str, str],
+    ) -> None:
+        """
+        Links inputs and outputs into the processing folder, so data is never copied:
+        - Like S3Prefix inputs on SageMaker, an input folder contains whatever is below the input's URI. If the URI is a single file, the folder contains only that file.
+        - Outputs are written directly to the local S3 folder, where downstream steps pick them up.
+        """
+        if processing_dir.exists():
+            shutil.rmtree(processing_dir)
+        processing_dir.mkdir(parents=True)
+        for input_name, s3_uri in inputs.items():
+            local_path = self.local_path(s3_uri)
+            if not local_path.exists():
+                raise FileNotFoundError(
+                    f'Input {input_name} ({s3_uri}) not found. When running locally, place it at {local_path}.'
+                )
+            if local_path.is_dir():
+                (processing_dir / input_name).symlink_to(local_path, target_is_directory=True)
+            else:
+                (processing_dir / input_name).mkdir()
+                (processing_dir / input_name / local_path.name).symlink_to(local_path)
+        for output_name, s3_uri in outputs.items():
+            local_path = self.local_path(s3_uri)
+            local_path.mkdir(parents=True, exist_ok=True)
+            (processing_dir / output_name).symlink_to(local_path, target_is_directory=True)
+
+
+def run_locally(
+    config_loader: ConfigLoaderInterface,
+    custom_stepfactory_lookup_table: StepFactoryLookupTable | None = None,
+    local_s3_root: str | Path = '.local_s3',
+    max_workers: int | None = None,
+) -> dict[str, LocalStepResult]:
+    """Runs all steps whose configs are provided by `config_loader` locally. Configs are only validated, rather than built into SageMaker steps, so no AWS session or role is needed."""
+    # Avoid importing config models unless needed
+    from sm_pipelines_oo.shared_config_schema import SharedConfig
+
+    step_configs: list[dict[str, Any] | BaseSettings] = config_loader.validated_step_configs or validate_step_configs(
+        config_loader.step_configs_as_dicts,  # type: ignore[arg-type]
+        stepfactory_lookup_table=custom_stepfactory_lookup_table or step_factory_registry,
+        shared_config=config_loader.validated_shared_config or SharedConfig(**config_loader.shared_config_as_dict),
+    )
+    return LocalExecutor(
+        step_configs=step_configs,  # type: ignore[arg-type]
+        local_s3_root=local_s3_root,
+        max_workers=max_workers,
+    ).run()
@@ -1,18 +1,33 @@
-import subprocess
-from pathlib import Path
+# Required to not make the SageMaker SDK a runtime dependency of this module (importing it is slow): https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Callable
 
 from loguru import logger
-from s3path import S3Path # type: ignore[import-untyped]
-from sagemaker.workflow.pipeline import Pipeline
-from sagemaker.workflow.steps import ConfigurableRetryStep
 
 from sm_pipelines_oo.shared_config_schema import SharedConfig, Environment
-from sm_pipelines_oo.steps.step_factory_facade import StepFactoryFacade
+from sm_pipelines_oo.steps.step_factory_facade import StepFactoryFacade, StreamingStepFactoryFacade
 from sm_pipelines_oo.aws_connector.interface import AWSConnectorInterface
+from sm_pipelines_oo.aws_connector.base_connector import BaseConnector
 from sm_pipelines_oo.aws_connector.concrete_connectors import create_aws_connector
-from sm_pipelines_oo.config_loader.interface import ConfigLoaderInterface
-from sm_pipelines_oo.config_loader.implementations.file_loaders import YamlConfigLoader
+from sm_pipelines_oo.config_loader.interface import ConfigLoaderInterface, StreamingConfigLoaderInterface
+from sm_pipelines_oo.config_loader.implementations.file_loaders import BaseConfigLoader, YamlConfigLoader
 from sm_pipelines_oo.steps.interfaces import StepFactoryLookupTable
+from sm_pipelines_oo.steps.step_args_cache import StepArgsCache
+from sm_pipelines_oo.steps.code_artifact_store import CodeArtifactStore
+from sm_pipelines_oo.steps.caching import (
+    StepCacheReport, create_cache_report, find_changed_values, format_cache_report, get_cache_config,
+)
+from sm_pipelines_oo.pipeline_definition import PipelineDefinitionCache, upload_pipeline_definition, upsert_pipeline
+from sm_pipelines_oo.steps.runtime_parameters import format_parameter_overrides
+
+if TYPE_CHECKING:
+    from s3path import S3Path # type: ignore[import-untyped]
+    from sagemaker.workflow.pipeline import Pipeline
+    from sagemaker.workflow.steps import ConfigurableRetryStep
+    from sm_pipelines_oo.local_executor import LocalStepResult
+    from sm_pipelines_oo.job_launcher import LaunchSummary
+    from sm_pipelines_oo.execution_watcher import ExecutionOutcome
 
 
 class PipelineFacade:
@@ -21,6 +36,20 @@ class PipelineFacade:
         env: Environment,
         custom_config_loader: ConfigLoaderInterface | None = None,
         custom_stepfactory_lookup_table: StepFactoryLookupTable | None = None,
+        # For pipelines with thousands of steps: Load, validate and build steps one at a time, to bound peak memory. Requires a streaming config loader (such as all file-based loaders).
+        stream_step_configs: bool = False,
+        # Number of threads for creating steps concurrently. Default of 1 creates steps sequentially.
+        step_construction_workers: int = 1,
+        # If set, arguments of steps whose config and code didn't change since an earlier build are reused from this folder, rather than packaging and uploading code again.
+        step_args_cache_dir: str | None = None,
+        # If True, each step's source_dir is uploaded to the project bucket as a content-addressed artifact, which is shared by all steps (and builds) with identical code.
+        share_code_artifacts: bool = False,
+        # Infer dependencies between steps from their inputs and outputs. (Not supported when streaming step configs.)
+        infer_step_dependencies: bool = True,
+        # If set, pipeline definitions are cached in this folder. If configs and code didn't change since the definition was cached, steps are only built once actually needed (e.g. not for exporting the definition).
+        definition_cache_dir: str | None = None,
+        # Connector of another pipeline, whose sessions and clients are reused if it's of the same kind and region (see `batch_builder` module)
+        shared_aws_connector: AWSConnectorInterface | None = None,
     ):
         """
         High level interface for using this library. For custom needs, you can use this as a template for your own implementation.
@@ -30,59 +59,255 @@ class PipelineFacade:
         self._custom_config_loader = custom_config_loader
         # Allows user to specify a custom stepfactory lookup table (so they can specify in config which of their custom stepfactories to use)
         self._custom_stepfactory_lookup_table = custom_stepfactory_lookup_table
+        self._stream_step_configs = stream_step_configs
+        self._step_construction_workers = step_construction_workers
+        self._step_args_cache: StepArgsCache | None = (
+            None if step_args_cache_dir is None else StepArgsCache(step_args_cache_dir)
+        )
+        self._share_code_artifacts = share_code_artifacts
+        self._infer_step_dependencies = infer_step_dependencies
+        self._definition_cache: PipelineDefinitionCache | None = (
+            None if definition_cache_dir is None else PipelineDefinitionCache(definition_cache_dir)
+        )
+        self._shared_aws_connector = shared_aws_connector
 
-        # Derived attributes
-        # ------------------
-        self._shared_config = SharedConfig(
-            **self._config_loader.shared_config_as_dict
+        self._build()
+
+    def _build(self) -> None:
+        """
+        Loads and validates the shared config, and builds all steps as well as the pipeline.
+        If the pipeline's definition is cached, building steps is deferred until the pipeline is actually needed.
+        """
+        # Use configs that were already validated (e.g. when loaded from a precompiled bundle), if the loader provides them.
+        self._shared_config: SharedConfig = (
+            self._config_loader.validated_shared_config
+            or SharedConfig(**self._config_loader.shared_config_as_dict)
         )
         self.pipeline_name = \
             f'{self._shared_config.project_name}-v{self._shared_config.project_version}'
 
         self.aws_connector: AWSConnectorInterface = create_aws_connector(
             shared_config=self._shared_config,
-            environment=env,
+            environment=self._env,
         )
-        # todo: Any reason to make step-factory-facade an attribute instead? (Would it make class diagram more clear, or can we still say that pipeline façade "has a" step factory façade,  even if you don't save it past initialization)?
-        _step_factory_facade = StepFactoryFacade(
-            step_config_dicts=self._config_loader.step_configs_as_dicts, # todo: pass in method call again?
-            role_arn=self.aws_connector.role_arn,
-            pipeline_session=self.aws_connector.pipeline_session,
-            custom_stepfactory_lookup_table=self._custom_stepfactory_lookup_table,
+        if isinstance(self._shared_aws_connector, BaseConnector) and isinstance(self.aws_connector, BaseConnector):
+            try:
+                self.aws_connector.adopt_resources(self._shared_aws_connector)
+            except ValueError:
+                logger.debug('Shared connector is of a different kind or region, so not reusing its sessions.')
+        self._built_pipeline: Pipeline | None = None
+        self._built_step_factory_facade: StepFactoryFacade | None = None
+        self.cache_report: list[StepCacheReport] = []
+        # Set once steps are added, replaced or removed, after which the definition no longer matches the fingerprint.
+        self._pipeline_modified = False
+        self._cached_definition: str | None = None
+        if self._definition_cache is not None:
+            self._definition_fingerprint: str | None = self._definition_cache.fingerprint(
+                pipeline_name=self.pipeline_name,
+                shared_config=self._shared_config,
+                step_configs=(
+                    self._config_loader.validated_step_configs
+                    or (
+                        self._config_loader.iter_step_configs_as_dicts() if self._stream_step_configs
+                        and isinstance(self._config_loader, StreamingConfigLoaderInterface)
+                        else self._config_loader.step_configs_as_dicts
+                    )
+                ),
+                build_options=self._build_options,
+            )
+            if self._definition_fingerprint is None:
+                logger.info('Pipeline has fanned-out or auto-sized steps, whose definitions depend on S3 contents. Not caching its definition.')
+            else:
+                self._cached_definition = self._definition_cache.get(self._definition_fingerprint)
+            if self._cached_definition is not None:
+                logger.info('Pipeline definition is cached. Deferring building steps until they are needed.')
+                return
+        self._build_pipeline()
+
+    @property
+    def _build_options(self) -> dict[str, Any]:
+        """Options that affect the pipeline definition (for fingerprinting it)."""
+        lookup_table = self._custom_stepfactory_lookup_table
+        return {
+            'env': self._env,
+            'custom_stepfactory_lookup_table': None if lookup_table is None else {
+                name: f'{step_factory_cls.__module__}.{step_factory_cls.__qualname__}'
+                for name, step_factory_cls in lookup_table.items()
+            },
+            'share_code_artifacts': self._share_code_artifacts,
+            'infer_step_dependencies': self._infer_step_dependencies and not self._stream_step_configs,
+        }
+
+    def _build_pipeline(self) -> None:
+        from sagemaker.workflow.pipeline import Pipeline
+
+        code_artifact_store: CodeArtifactStore | None = (
+            CodeArtifactStore(
+                s3_client=self.aws_connector.s3_client,
+                bucket_name=self._shared_config.project_bucket_name,
+            ) if self._share_code_artifacts else None
         )
-        _steps: list[ConfigurableRetryStep] = _step_factory_facade.create_all_steps()
+        # Note: We keep the step-factory-facade as an attribute, so we can rebuild individual steps later on (see `rebuild_step()`).
+        step_factory_facade: StepFactoryFacade
+        if self._stream_step_configs:
+            if not isinstance(self._config_loader, StreamingConfigLoaderInterface):
+                raise TypeError('Streaming step configs requires a streaming config loader.')
+            step_factory_facade = StreamingStepFactoryFacade(
+                step_configs=self._config_loader.iter_step_configs_as_dicts(),
+                role_arn=self.aws_connector.role_arn,
+                pipeline_session=self.aws_connector.pipeline_session,
+                custom_stepfactory_lookup_table=self._custom_stepfactory_lookup_table,
+                shared_config=self._shared_config,
+                max_workers=self._step_construction_workers,
+                step_args_cache=self._step_args_cache,
+                code_artifact_store=code_artifact_store,
+            )
+        else:
+            step_factory_facade = StepFactoryFacade(
+                step_config_dicts=(
+                    self._config_loader.validated_step_configs
+                    or self._config_loader.step_configs_as_dicts  # todo: pass in method call again?
+                ),
+                role_arn=self.aws_connector.role_arn,
+                pipeline_session=self.aws_connector.pipeline_session,
+                custom_stepfactory_lookup_table=self._custom_stepfactory_lookup_table,
+                shared_config=self._shared_config,
+                max_workers=self._step_construction_workers,
+                step_args_cache=self._step_args_cache,
+                code_artifact_store=code_artifact_store,
+                infer_dependencies=self._infer_step_dependencies,
+            )
+        _steps: list[ConfigurableRetryStep] = step_factory_facade.create_all_steps()
+        # Report which steps can benefit from caching. (When streaming, configs are not kept around, so there is nothing to report on.)
+        self.cache_report = create_cache_report(
+            step_factory_facade.validated_step_configs,
+            changed_values=self._find_changed_config_values(step_factory_facade.validated_step_configs),
+        )
+        if self.cache_report:
+            logger.info(format_cache_report(self.cache_report))
 
-        self._pipeline = Pipeline(
+        self._built_step_factory_facade = step_factory_facade
+        self._built_pipeline = Pipeline(
             name=self.pipeline_name,
-            # parameters=[],
+            parameters=step_factory_facade.pipeline_parameters,  # type: ignore[arg-type]
             steps=_steps,
             sagemaker_session=self.aws_connector.pipeline_session,
         )
 
-    def export_pipeline_definition_to_s3(self) -> S3Path:
+    def _find_changed_config_values(self, step_configs: list[dict[str, Any] | Any]) -> dict[str, dict[str, str]] | None:
         """
-        Exports pipeline definition to JSON and writes it to S3.
-        Returns s3 uri of the file, for use by downstream tasks, such as terraform.
+        Loads step configs a second time, and returns the values that differ from the first load (which would defeat step caching), by step name (see `caching` module).
+        Only done if caching is enabled for any step, and if configs are loaded from files (e.g. not from a precompiled bundle, whose configs can't change).
         """
-        local_path = Path(f'/var/tmp/{self.pipeline_name}-definition.json')
-        with local_path.open(mode='w') as file:
-            file.write(self._pipeline.definition())
+        if not isinstance(self._config_loader, BaseConfigLoader) \
+                or not any(get_cache_config(step_config).enabled for step_config in step_configs):
+            return None
+        return find_changed_values(
+            self._config_loader.step_configs_as_dicts,
+            [
+                self._config_loader.load_step_config(config_file, use_parse_cache=False)
+                for config_file in self._config_loader.step_config_paths
+            ],
+        )
 
-        # Upload to S3. (Override type error caused by missing type stubs for s3path.)
+    @property
+    def _pipeline(self) -> Pipeline:
+        if self._built_pipeline is None:
+            self._build_pipeline()
+        return self._built_pipeline  # type: ignore[return-value]
+
+    @property
+    def _step_factory_facade(self) -> StepFactoryFacade:
+        if self._built_step_factory_facade is None:
+            self._build_pipeline()
+        return self._built_step_factory_facade  # type: ignore[return-value]
+
+    def definition(self) -> str:
+        """Returns the pipeline's JSON definition. If a definition cache is used, the definition is only generated if it isn't cached yet."""
+        if self._cached_definition is not None and not self._pipeline_modified:
+            return self._cached_definition
+        definition: str = self._pipeline.definition()
+        if self._definition_cache is not None and self._definition_fingerprint is not None \
+                and not self._pipeline_modified:
+            self._definition_cache.put(self._definition_fingerprint, definition)
+            self._cached_definition = definition
+        return definition
+
+    # Incremental updates of the cached pipeline (used by watch mode)
+    # ---------------------------------------------------------------
+    def rebuild_step(
+        self,
+        step_config_dict: dict[str, Any],
+        replaces: str | None = None,
+    ) -> ConfigurableRetryStep | None:
+        """
+        Builds a single step from its config and splices it into the cached pipeline, without touching any other step.
+        The new step takes the place of the step named `replaces` (which may differ from the new step's name if it was renamed in the config). If no such step exists, the new step is appended.
+
+        If the change may affect other steps (e.g. a renamed output that downstream steps read, or a step that fans out), the whole pipeline is rebuilt instead, and None is returned (see `StepFactoryFacade.rebuild_step()`).
+        """
+        step: ConfigurableRetryStep | None = self._step_factory_facade.rebuild_step(step_config_dict, replaces=replaces)
+        if step is None:
+            logger.info(f'Change of step {step_config_dict["step_name"]} may affect other steps. Rebuilding whole pipeline.')
+            self.rebuild()
+            return None
+        step_names: list[str] = [existing_step.name for existing_step in self._pipeline.steps]
+        if replaces is not None and replaces in step_names:
+            self._pipeline.steps[step_names.index(replaces)] = step
+        else:
+            self._pipeline.steps.append(step)
+        self._pipeline.parameters = self._step_factory_facade.pipeline_parameters  # type: ignore[assignment]
+        self._pipeline_modified = True
+        logger.info(f'Rebuilt step {step.name}.')
+        return step
+
+    def remove_step(self, step_name: str) -> None:
+        """Removes a step from the cached pipeline, e.g. because its config file was deleted. If other steps depend on it (or it fanned out), the whole pipeline is rebuilt instead."""
+        if not self._step_factory_facade.discard_step(step_name):
+            logger.info(f'Other steps depend on removed step {step_name}. Rebuilding whole pipeline.')
+            self.rebuild()
+            return
+        self._pipeline.steps = [
+            step for step in self._pipeline.steps if step.name != step_name
+        ]
+        self._pipeline.parameters = self._step_factory_facade.pipeline_parameters  # type: ignore[assignment]
+        self._pipeline_modified = True
+        logger.info(f'Removed step {step_name}.')
+
+    def rebuild(self) -> None:
+        """Rebuilds the whole pipeline from scratch, reloading all configs."""
+        if isinstance(self._config_loader, BaseConfigLoader):
+            self._config_loader.reload()
+        self._build()
+
+    def export_pipeline_definition_to_s3(
+        self,
+        compress: bool = False,
+        # Definition of the pipeline, if it was already generated (which is expensive for large pipelines)
+        definition: str | None = None,
+    ) -> S3Path:
+        """
+        Exports pipeline definition to JSON and writes it to S3 (unless the definition there is identical already, see `pipeline_definition` module).
+        Returns s3 uri of the file, for use by downstream tasks, such as terraform.
+        """
+        # Override type error caused by missing type stubs for s3path.
         s3_path: S3Path = (
             self._shared_config.project_bucket /  # type: ignore[operator]
-            f'pipeline_definitions/{self.pipeline_name}.json'
+            f'pipeline_definitions/{self.pipeline_name}.json{".gz" if compress else ""}'
         )
-        self.aws_connector.s3_client \
-            .upload_file(
-                Filename=str(local_path),
-                Bucket=s3_path.bucket,
-                Key=s3_path.key,
-            )
-        logger.info(f'Uploaded pipeline definition to {s3_path.as_uri()}')
+        uploaded: bool = upload_pipeline_definition(
+            s3_client=self.aws_connector.s3_client,
+            definition=definition or self.definition(),
+            bucket=s3_path.bucket,
+            key=s3_path.key,
+            compress=compress,
+        )
+        if uploaded:
+            logger.info(f'Uploaded pipeline definition to {s3_path.as_uri()}')
         return s3_path
 
-    @property
+    # Note: This needs to be cached, so that configs are only loaded (and parsed) once.
+    @cached_property
     def _config_loader(self) -> ConfigLoaderInterface:
         if self._custom_config_loader is not None:
             return self._custom_config_loader
@@ -94,79 +319,189 @@ class PipelineFacade:
 class DevPipelineFacade(PipelineFacade):
     """Adds additional methods to pipeline façade that are only needed for development."""
 
-    def upsert_pipeline(self, s3_location: S3Path) -> None:
-        try:
-            result = subprocess.run(
-                [
-                    'aws', 'sagemaker', 'create-pipeline',
-                    '--pipeline-name', self.pipeline_name,
-                    '--pipeline-definition-s3-location',
-                        f'Bucket={s3_location.bucket},ObjectKey={s3_location.key}',
-                    '--role-arn', self.aws_connector.role_arn,
-                ],
-                check=True, # Fail on error
-            )
-        except subprocess.CalledProcessError:
-            logger.info('Creating pipeline failed. Trying to update it instead.')
-            result = subprocess.run(
-                [
-                    'aws', 'sagemaker', 'update-pipeline',
-                    '--pipeline-name', self.pipeline_name,
-                    '--pipeline-definition-s3-location',
-                        f'Bucket={s3_location.bucket},ObjectKey={s3_location.key}',
-                ],
-                check=False,  # Don't fail on error, so we can manually examine error msg
-                capture_output=True,
-            )
-            # Capture error and raise it, if it still didn't work
-            if result.returncode != 0:
-                logger.error(result.stderr)
-                raise Exception(
-                    result.stderr.decode('utf-8')
-                )
-            else:
-                logger.info('Pipeline updated successfully.')
+    def upsert_pipeline(self, s3_location: S3Path, definition: str | None = None) -> None:
+        """Creates or updates the pipeline from the definition exported to `s3_location`, unless the deployed pipeline is identical already."""
+        upsert_pipeline(
+            sm_client=self.aws_connector.sm_client,
+            pipeline_name=self.pipeline_name,
+            definition=definition or self.definition(),
+            bucket=s3_location.bucket,
+            key=s3_location.key,
+            role_arn=self.aws_connector.role_arn,
+            max_parallel_execution_steps=self._shared_config.max_parallel_execution_steps,
+        )
 
-    def _start_pipeline(self) -> None:
-        result = subprocess.run(
-            [
-                'aws', 'sagemaker', 'start-pipeline-execution',
-                '--pipeline-name', self.pipeline_name,
-            ],
-            check=False,  # Don't fail on error, so we can manually examine error msg
-            capture_output=True,
+    def _start_pipeline(self, parameters: dict[str, str | int | float] | None = None) -> str:
+        # Parameters that are not overridden keep their defaults.
+        overrides: dict[str, Any] = {'PipelineParameters': format_parameter_overrides(parameters)} if parameters else {}
+        response = self.aws_connector.sm_client.start_pipeline_execution(
+            PipelineName=self.pipeline_name,
+            **overrides,
         )
-        if result.returncode != 0:
-            logger.error(
-                result.stderr.decode('utf-8'),
-            )
-            raise Exception
+        logger.info(f'Started pipeline execution {response["PipelineExecutionArn"]}.')
+        return response['PipelineExecutionArn']
 
-    def create_and_start_pipeline_from_definition(self) -> None:
+    def create_and_start_pipeline_from_definition(
+        self,
+        # Overrides of runtime parameters (see `runtime_parameters` module)
+        parameters: dict[str, str | int | float] | None = None,
+        wait: bool = False,
+        tail_logs: bool = False,
+    ) -> None:
         """
-        After exporting JSON definition to S3,  use AWS CLI to create and start pipeline.
-
-        Requires AWS CLI to be installed and configured.
+        After exporting JSON definition to S3, create (or update) and start pipeline.
+        If `wait`, blocks until the execution finished, reporting each step as it starts and finishes (see `watch_executions()`).
         """
         if self._env == 'local':
             raise Exception('For local runs, run pipeline directly.')
-        s3_location: S3Path = self.export_pipeline_definition_to_s3()
-        self.upsert_pipeline(s3_location)
-        self._start_pipeline()
+        # Generate definition only once, for both exporting and comparing it with the deployed one.
+        definition: str = self.definition()
+        s3_location: S3Path = self.export_pipeline_definition_to_s3(definition=definition)
+        self.upsert_pipeline(s3_location, definition=definition)
+        execution_arn: str = self._start_pipeline(parameters)
+        if wait:
+            self.watch_executions([execution_arn], tail_logs=tail_logs)
+
+    def start_executions(
+        self,
+        parameter_sets: list[dict[str, str | int | float]],
+        wait: bool = False,
+    ) -> list[str]:
+        """
+        Starts one execution of the *deployed* pipeline per set of runtime parameter overrides (e.g. one per date of a backfill), without generating or deploying its definition. Returns the executions' ARNs.
+        If `wait`, blocks until all executions finished.
+        """
+        execution_arns: list[str] = [self._start_pipeline(parameters) for parameters in parameter_sets]
+        if wait:
+            self.watch_executions(execution_arns)
+        return execution_arns
+
+    def watch_executions(
+        self,
+        execution_arns: list[str],
+        tail_logs: bool = False,
+        min_poll_interval: float = 5.0,
+        max_poll_interval: float = 120.0,
+    ) -> list[ExecutionOutcome]:
+        """
+        Blocks until all executions finished, logging every step as it starts and finishes (see `ExecutionWatcher`). If `tail_logs`, the logs of each step's job are logged as well.
+        """
+        # Avoid importing watcher unless needed
+        from sm_pipelines_oo.execution_watcher import ExecutionWatcher
+
+        return ExecutionWatcher(
+            sagemaker_client=self.aws_connector.sm_client,
+            logs_client=self.aws_connector.sm_session.boto_session.client('logs') if tail_logs else None,
+            min_poll_interval=min_poll_interval,
+            max_poll_interval=max_poll_interval,
+        ).watch(execution_arns)
 
 
     # Alternative way of running pipeline
     # -----------------------------------
-    def _create_and_run_pipeline_directly(self, wait: bool = False) -> None:
+    def _create_and_run_pipeline_directly(
+        self,
+        parameters: dict[str, str | int | float] | None = None,
+        wait: bool = False,
+        tail_logs: bool = False,
+    ) -> None:
         """
         Use `create_and_run_from_definition()` instead, except for troubleshooting.
         """
+        from sagemaker.workflow.parallelism_config import ParallelismConfiguration
+
+        max_parallel_execution_steps: int | None = self._shared_config.max_parallel_execution_steps
         self._pipeline.upsert(
             role_arn=self.aws_connector.role_arn,
+            parallelism_config=None if max_parallel_execution_steps is None
+                else ParallelismConfiguration(max_parallel_execution_steps),
         )
-        execution = self._pipeline.start()
+        execution = self._pipeline.start(parameters=parameters)
         execution.describe()
 
         if wait:
-            execution.wait()
-            logger.info('Pipeline execution finished.')
+            self.watch_executions([execution.arn], tail_logs=tail_logs)
+
+    # Running jobs directly (e.g. for backfills)
+    # -----------------------------------------
+    def run_directly(
+        self,
+        max_concurrent_jobs: int = 8,
+        poll_interval: float = 30.0,
+    ) -> LaunchSummary:
+        """
+        Runs each step's processing job directly (without a pipeline), keeping up to `max_concurrent_jobs` jobs running at a time (see `JobLauncher`). Steps only start once the steps they depend on completed.
+        Blocks until all jobs finished, and returns a summary of their outcomes.
+        """
+        # Avoid importing launcher unless needed
+        from sm_pipelines_oo.job_launcher import JobLauncher, JobSubmitter
+        from sm_pipelines_oo.steps.dag import StepDag
+
+        step_configs = (
+            self._step_factory_facade.validated_step_configs
+            or self._config_loader.step_configs_as_dicts
+        )
+        submitters: dict[str, JobSubmitter] = {}
+        for step_config in step_configs:
+            step_factory = self._step_factory_facade.create_step_factory(
+                step_config, sm_session=self.aws_connector.sm_session,
+            )
+            start_processing_job: JobSubmitter | None = getattr(step_factory, 'start_processing_job', None)
+            step_name: str = StepFactoryFacade._get_step_name(step_config)
+            if start_processing_job is None:
+                raise TypeError(f'Step {step_name} is not a processing step, so it cannot be run directly.')
+            submitters[step_name] = start_processing_job
+        upstream: dict[str, set[str]] = {
+            step_name: {edge.upstream_step_name for edge in edges}
+            for step_name, edges in StepDag(step_configs).edges.items()
+        }
+        return JobLauncher(
+            sagemaker_client=self.aws_connector.sm_client,
+            max_concurrent_jobs=max_concurrent_jobs,
+            poll_interval=poll_interval,
+        ).launch(submitters, upstream)
+
+    # Local execution
+    # ---------------
+    def run_locally(
+        self,
+        local_s3_root: str = '.local_s3',
+        max_workers: int | None = None,
+    ) -> dict[str, LocalStepResult]:
+        """
+        Runs each step's code directly in a local subprocess (see `LocalExecutor`), which is much faster than running the pipeline in local mode. Independent steps run concurrently.
+        S3 is replaced by the folder `local_s3_root`, so input data has to be placed there first.
+        Note: This doesn't need the pipeline's steps (so it doesn't build them if their definition is cached). To run steps without any AWS credentials, call `local_executor.run_locally()` with a config loader directly.
+        """
+        # Avoid importing executor unless needed
+        from sm_pipelines_oo.local_executor import run_locally
+
+        return run_locally(
+            self._config_loader,
+            custom_stepfactory_lookup_table=self._custom_stepfactory_lookup_table,
+            local_s3_root=local_s3_root,
+            max_workers=max_workers,
+        )
+
+    # Watch mode
+    # ----------
+    def watch(
+        self,
+        poll_interval: float = 1.0,
+        on_rebuild: Callable[[list[str]], None] | None = None,
+    ) -> None:
+        """
+        Blocks and watches the config folder as well as every step's `source_dir`. Whenever something changes, only the affected steps are rebuilt and spliced into the cached pipeline. Stop with Ctrl+C.
+
+        `on_rebuild` is called with the names of the affected steps after every rebuild, e.g. to export the updated pipeline definition.
+        """
+        # Avoid circular import
+        from sm_pipelines_oo.watcher import PipelineWatcher
+
+        if not isinstance(self._config_loader, BaseConfigLoader):
+            raise TypeError('Watch mode requires a file-based config loader.')
+        PipelineWatcher(
+            pipeline_facade=self,
+            config_loader=self._config_loader,
+            poll_interval=poll_interval,
+        ).watch(on_rebuild=on_rebuild)
@@ -0,0 +1,247 @@
+"""
+Caching, exporting and deploying pipeline definitions.
+
+Generating a definition requires building every step (including packaging its code) and serializing the result, which takes long for large pipelines. Therefore, definitions can be cached locally under a fingerprint of everything they depend on, so that unchanged pipelines are never built again.
+
+Definitions are uploaded straight from memory, together with a hash of their content (in the object's metadata). If the object at the target location already has the same hash, the upload is skipped, so deploys that didn't change the pipeline don't upload anything.
+Likewise, a pipeline is only created or updated if its deployed definition (or role) differs.
+"""
+# Required to not make boto3-stubs a runtime dependency: https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Iterable, Literal
+from pathlib import Path
+import gzip
+import hashlib
+import importlib.metadata
+import json
+import os
+import tempfile
+
+from loguru import logger
+from pydantic_settings import BaseSettings
+
+from sm_pipelines_oo.steps.step_args_cache import hash_folder_contents
+
+if TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+    from mypy_boto3_sagemaker.client import SageMakerClient
+
+
+# Caching
+# =======
+
+def _as_json_dict(config: dict[str, Any] | BaseSettings) -> dict[str, Any]:
+    if isinstance(config, BaseSettings):
+        return config.model_dump(mode='json')
+    return dict(config)
+
+
+def _get_source_dir(step_config: dict[str, Any]) -> str | None:
+    """Returns the local code folder of a processing or training step config (if any)."""
+    for section in ('processor_run_config', 'estimator_config'):
+        source_dir = (step_config.get(section) or {}).get('source_dir')
+        if isinstance(source_dir, str):
+            return source_dir
+    return None
+
+
+def _is_auto_sized(step_config: dict[str, Any]) -> bool:
+    """Whether instances of a step are chosen based on the size of its inputs at build time (see `instance_planner` module)."""
+    init_config: dict[str, Any] = step_config.get('processor_init_config') or {}
+    return 'auto' in (init_config.get('instance_type'), init_config.get('instance_count'))
+
+
+def _library_version(distribution_name: str) -> str:
+    try:
+        return importlib.metadata.version(distribution_name)
+    except importlib.metadata.PackageNotFoundError:
+        # E.g., when running from a source checkout
+        return 'unknown'
+
+
+class PipelineDefinitionCache:
+    """
+    Stores generated pipeline definitions as JSON files in `cache_dir`, one file per fingerprint.
+
+    The fingerprint covers:
+    - the pipeline name and the options that affect how steps are built,
+    - the shared config and all step configs (validated ones if the config loader provides them; otherwise raw ones, whose defaults are determined by the library versions below),
+    - the contents of all files in each step's `source_dir`,
+    - the versions of the SageMaker SDK and of this package.
+
+    Note: The fingerprint does not cover AWS credentials. Definitions reference the session's default bucket, so use separate cache dirs for different AWS accounts.
+    Note: Definitions of pipelines with fanned-out or auto-sized steps depend on the contents of S3 at build time (see `fan_out` and `instance_planner` modules), so they are not cached.
+    """
+    # Bump this whenever the layout of cache entries or the content of fingerprints changes.
+    _cache_version: str = '1'
+
+    def __init__(self, cache_dir: str | Path = '.sm_pipelines_oo_cache/definitions'):
+        self._cache_dir = Path(cache_dir)
+
+    def fingerprint(
+        self,
+        pipeline_name: str,
+        shared_config: dict[str, Any] | BaseSettings,
+        step_configs: Iterable[dict[str, Any] | BaseSettings],
+        build_options: dict[str, Any],
+    ) -> str | None:
+        """Returns None if the definition cannot be cached."""
+        digest = hashlib.sha256()
+        digest.update(
+            f'{self._cache_version}\n{_library_version("sagemaker")}\n{_library_version("sm-pipelines-oo")}\n'
+            f'{pipeline_name}\n'.encode()
+        )
+        digest.update(json.dumps(build_options, sort_keys=True, default=str).encode())
+        digest.update(json.dumps(_as_json_dict(shared_config), sort_keys=True, default=str).encode())
+        # Hash configs one at a time, so this also works for streamed configs without holding all of them.
+        hashed_source_dirs: dict[str, str] = {}
+        for step_config in step_configs:
+            step_config_dict = _as_json_dict(step_config)
+            # Same for every step, and already covered above
+            step_config_dict.pop('shared_config', None)
+            if step_config_dict.get('fan_out') or _is_auto_sized(step_config_dict):
+                return None
+            digest.update(json.dumps(step_config_dict, sort_keys=True, default=str).encode())
+            source_dir = _get_source_dir(step_config_dict)
+            # source_dir may also be an S3 URI, in which case its content is not ours to hash (and is assumed to be immutable).
+            if source_dir is not None and Path(source_dir).is_dir():
+                if source_dir not in hashed_source_dirs:
+                    hashed_source_dirs[source_dir] = hash_folder_contents(Path(source_dir))
+                digest.update(hashed_source_dirs[source_dir].encode())
+        return digest.hexdigest()
+
+    def _cache_file(self, fingerprint: str) -> Path:
+        return self._cache_dir / f'{fingerprint}.json'
+
+    def get(self, fingerprint: str) -> str | None:
+        """Returns the cached definition, or None if there is none for this fingerprint."""
+        try:
+            return self._cache_file(fingerprint).read_text()
+        except FileNotFoundError:
+            return None
+
+    def put(self, fingerprint: str, definition: str) -> None:
+        # Write to temporary file first and then rename it, so concurrent builds never read partially written entries.
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(mode='w', dir=self._cache_dir, delete=False) as tmp_file:
+            tmp_file.write(definition)
+        os.replace(tmp_file.name, self._cache_file(fingerprint))
+
+    def clear(self) -> None:
+        for cache_file in self._cache_dir.glob('*.json'):
+            cache_file.unlink()
+
+
+# Exporting
+# =========
+
+# Note: S3 lower-cases metadata keys, so stick to lower case.
+_HASH_METADATA_KEY = 'definition-sha256'
+
+
+def hash_definition(definition: str) -> str:
+    return hashlib.sha256(definition.encode()).hexdigest()
+
+
+def _get_existing_hash(s3_client: S3Client, bucket: str, key: str) -> str | None:
+    """Returns the content hash of the definition stored at the given location, or None if there is none."""
+    from botocore.exceptions import ClientError
+
+    try:
+        response = s3_client.head_object(Bucket=bucket, Key=key)
+    except ClientError as error:
+        if error.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            return None
+        raise
+    return response.get('Metadata', {}).get(_HASH_METADATA_KEY)
+
+
+def upload_pipeline_definition(
+    s3_client: S3Client,
+    definition: str,
+    bucket: str,
+    key: str,
+    # Gzip the definition, which makes large definitions much smaller. Note: SageMaker does not decompress definitions, so only use this for definitions that are consumed by other tools.
+    compress: bool = False,
+) -> bool:
+    """Uploads a definition, unless an identical one already exists at this location. Returns whether it was uploaded."""
+    content_hash = hash_definition(definition)
+    if _get_existing_hash(s3_client, bucket, key) == content_hash:
+        logger.info(f'Pipeline definition at s3://{bucket}/{key} is unchanged. Skipping upload.')
+        return False
+
+    body: bytes = definition.encode()
+    extra_args: dict[str, Any] = {}
+    if compress:
+        # Fix mtime, so that compressing the same definition always gives the same bytes.
+        body = gzip.compress(body, mtime=0)
+        extra_args['ContentEncoding'] = 'gzip'
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=body,
+        ContentType='application/json',
+        Metadata={_HASH_METADATA_KEY: content_hash},
+        **extra_args,
+    )
+    return True
+
+
+# Deploying
+# =========
+
+def _describe_pipeline(sm_client: SageMakerClient, pipeline_name: str) -> dict[str, Any] | None:
+    """Returns the description of the pipeline, or None if it doesn't exist."""
+    from botocore.exceptions import ClientError
+
+    try:
+        return sm_client.describe_pipeline(PipelineName=pipeline_name)  # type: ignore[return-value]
+    except ClientError as error:
+        if error.response['Error']['Code'] == 'ResourceNotFound':
+            return None
+        raise
+
+
+def upsert_pipeline(
+    sm_client: SageMakerClient,
+    pipeline_name: str,
+    definition: str,
+    # Where `definition` was exported to. The definition is passed by location, since it may exceed the size limit for passing it inline.
+    bucket: str,
+    key: str,
+    role_arn: str,
+    # If not set, the deployed pipeline's setting is kept.
+    max_parallel_execution_steps: int | None = None,
+) -> Literal['created', 'updated', 'unchanged']:
+    """Creates the pipeline if it doesn't exist yet, or updates it if its definition, role or parallelism differ from the given ones."""
+    definition_s3_location = {'Bucket': bucket, 'ObjectKey': key}
+    parallelism_kwargs: dict[str, Any] = {} if max_parallel_execution_steps is None else {
+        'ParallelismConfiguration': {'MaxParallelExecutionSteps': max_parallel_execution_steps},
+    }
+    description = _describe_pipeline(sm_client, pipeline_name)
+    if description is None:
+        sm_client.create_pipeline(
+            PipelineName=pipeline_name,
+            PipelineDefinitionS3Location=definition_s3_location,  # type: ignore[typeddict-item]
+            RoleArn=role_arn,
+            **parallelism_kwargs,
+        )
+        logger.info(f'Created pipeline {pipeline_name}.')
+        return 'created'
+
+    # Compare parsed definitions, so that differences in formatting don't count.
+    if json.loads(description['PipelineDefinition']) == json.loads(definition) \
+            and description.get('RoleArn') == role_arn \
+            and max_parallel_execution_steps in (
+                None, description.get('ParallelismConfiguration', {}).get('MaxParallelExecutionSteps')
+            ):
+        logger.info(f'Pipeline {pipeline_name} is unchanged. Skipping update.')
+        return 'unchanged'
+    sm_client.update_pipeline(
+        PipelineName=pipeline_name,
+        PipelineDefinitionS3Location=definition_s3_location,  # type: ignore[typeddict-item]
+        RoleArn=role_arn,
+        **parallelism_kwargs,
+    )
+    logger.info(f'Updated pipeline {pipeline_name}.')
+    return 'updated'
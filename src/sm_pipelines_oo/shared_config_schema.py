@@ -5,18 +5,16 @@ This file defines a schema for configs that are shared across multiple *steps* i
 across environments to avoid the complications that would arise from adding a second dimension of
 shared configuration.)
 """
-
-from functools import cached_property
-from typing import TypeAlias, Literal
-import os
-from s3path import S3Path # type: ignore[import-untyped]
+# Required to only import s3path (which imports boto3) for type checking, or when it is actually needed: https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
+from typing import TYPE_CHECKING, TypeAlias, Literal
+from pathlib import Path
 
 from pydantic import computed_field, Field
 from pydantic_settings import BaseSettings
-import boto3
-import sagemaker
-import sagemaker.session
-from sagemaker.workflow.pipeline_context import PipelineSession
+
+if TYPE_CHECKING:
+    from s3path import S3Path # type: ignore[import-untyped]
 
 
 Environment: TypeAlias = Literal['local', 'dev', 'qa', 'prod']
@@ -34,6 +32,19 @@ class BootstrapConfig(BaseSettings):
     ENVIRONMENT: Environment
 
 
+class StepCacheConfig(BaseSettings):
+    """
+    Whether SageMaker may reuse the results of a previous pipeline execution for a step whose arguments did not change, rather than running it again.
+    Can be set pipeline-wide in the shared config, and overwritten for individual steps in their step config.
+    """
+    enabled: bool = False
+    # ISO 8601 duration, e.g. 'P30D' or 'PT12H'. If not set, cached results never expire.
+    expire_after: str | None = Field(
+        default=None,
+        pattern=r'^P((\d+[YMWD])+(T(\d+[HMS])+)?|T(\d+[HMS])+)$',
+    )
+
+
 class SharedConfig(BaseSettings):
     """Defines configuration shared by all pipeline steps (for a given environment)."""
     project_name: str
@@ -42,9 +53,16 @@ class SharedConfig(BaseSettings):
     # To do: consider which of these fields should be made required.
     project_bucket_name: str = Field(pattern=r'^[a-zA-Z0-9.\-_]{1,255}$')
     role_name: str | None = None
+    # Default for all steps that don't specify their own cache config
+    step_cache_config: StepCacheConfig = StepCacheConfig()
+    # Maximum number of steps that run at the same time (e.g. shards of fanned-out steps). Unlimited if not set.
+    max_parallel_execution_steps: int | None = Field(default=None, ge=1)
 
-    @computed_field
+    # Note: S3Path is a subclass of Path. Declaring the latter as return type lets pydantic build the schema without importing s3path.
+    @computed_field(return_type=Path)
     def project_bucket(self) -> S3Path:
+        from s3path import S3Path
+
         return S3Path(
             # Leading slash serves to mark it as an *absolute* path.
             f'/{self.project_bucket_name}',
@@ -0,0 +1,154 @@
+"""
+Step caching: Resolving each step's cache config, and reporting (at build time) which steps can actually benefit from caching.
+
+SageMaker only reuses the results of a previous execution if a step's arguments are *identical*. So a value that changes with every build (such as the current time or a random ID in an environment variable or an S3 path) silently defeats caching, even if caching is enabled. The cache report points out such values, i.e. values that
+- differ between two successive loads of the configs (e.g. because a custom config loader fills in the current time), or
+- interpolate a source that changes with every build, such as `${now}`.
+Note: Static values that merely look like timestamps (e.g. a partition `date=2024-01-01`) are fine.
+"""
+# Required to not make the SageMaker SDK a runtime dependency of this module (importing it is slow): https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Iterable
+from dataclasses import dataclass, field
+import re
+
+from pydantic_settings import BaseSettings
+
+from sm_pipelines_oo.shared_config_schema import StepCacheConfig
+
+if TYPE_CHECKING:
+    from sagemaker.workflow.steps import CacheConfig
+
+
+# Interpolations (as supported by common config templating tools) of sources that change with every build
+_VOLATILE_INTERPOLATION_PATTERN = re.compile(
+    r'\$\{\s*(now|today|date|time|timestamp|uuid|random)\b[^}]*\}', re.IGNORECASE,
+)
+# Fields of step configs that don't end up in the step's arguments
+_IGNORED_FIELDS = {'step_name', 'step_factory_class', 'shared_config', 'cache_config'}
+
+
+def get_cache_config(step_config: dict[str, Any] | BaseSettings) -> StepCacheConfig:
+    """Returns cache config of the step if specified, or else the pipeline-wide default from the shared config."""
+    step_config_dict: dict[str, Any] = step_config if isinstance(step_config, dict) \
+        else dict(step_config)
+    cache_config = step_config_dict.get('cache_config')
+    if cache_config is None:
+        shared_config = step_config_dict.get('shared_config')
+        cache_config = StepCacheConfig() if shared_config is None \
+            else _get(shared_config, 'step_cache_config', StepCacheConfig())
+    return cache_config if isinstance(cache_config, StepCacheConfig) \
+        else StepCacheConfig(**cache_config)
+
+
+def to_sagemaker_cache_config(cache_config: StepCacheConfig) -> CacheConfig | None:
+    """Converts our config into the SDK's CacheConfig. Returns None if caching is disabled."""
+    if not cache_config.enabled:
+        return None
+    from sagemaker.workflow.steps import CacheConfig
+
+    return CacheConfig(enable_caching=True, expire_after=cache_config.expire_after)
+
+
+def _get(config: dict[str, Any] | BaseSettings, key: str, default: Any = None) -> Any:
+    if isinstance(config, dict):
+        return config.get(key, default)
+    return getattr(config, key, default)
+
+
+def _flatten(obj: Any, path: str = '') -> dict[str, Any]:
+    """Returns all (nested) values of a config, by dotted path. Fields that don't end up in the step's arguments are skipped."""
+    if isinstance(obj, BaseSettings):
+        obj = obj.model_dump()
+    if isinstance(obj, dict):
+        values: dict[str, Any] = {}
+        for key, value in obj.items():
+            if not path and key in _IGNORED_FIELDS:
+                continue
+            values.update(_flatten(value, f'{path}.{key}' if path else str(key)))
+        return values
+    if isinstance(obj, (list, tuple)):
+        values = {}
+        for i, value in enumerate(obj):
+            values.update(_flatten(value, f'{path}[{i}]'))
+        return values
+    return {path: obj}
+
+
+def _find_volatile_interpolations(step_config: dict[str, Any] | BaseSettings) -> dict[str, str]:
+    """Returns {dotted path: reason} for values that interpolate a volatile source."""
+    volatile_values: dict[str, str] = {}
+    for path, value in _flatten(step_config).items():
+        if isinstance(value, str) and (match := _VOLATILE_INTERPOLATION_PATTERN.search(value)):
+            volatile_values[path] = f'{value!r} interpolates {match.group(0)}, which changes with every build'
+    return volatile_values
+
+
+def find_changed_values(
+    first_load: Iterable[dict[str, Any]],
+    second_load: Iterable[dict[str, Any]],
+) -> dict[str, dict[str, str]]:
+    """Compares the raw step configs of two successive loads. Returns {step name: {dotted path: reason}} for values that differ."""
+    second_values_by_step: dict[str, dict[str, Any]] = {
+        step_config['step_name']: _flatten(step_config) for step_config in second_load
+    }
+    changed_values: dict[str, dict[str, str]] = {}
+    for step_config in first_load:
+        second_values: dict[str, Any] | None = second_values_by_step.get(step_config['step_name'])
+        if second_values is None:
+            continue
+        for path, value in _flatten(step_config).items():
+            if path in second_values and second_values[path] != value:
+                changed_values.setdefault(step_config['step_name'], {})[path] = \
+                    f'changed from {value!r} to {second_values[path]!r} when loading configs again'
+    return changed_values
+
+
+# Report
+# ======
+
+@dataclass
+class StepCacheReport:
+    step_name: str
+    cache_config: StepCacheConfig
+    # Dotted path of config value -> why it would likely break cache hits
+    volatile_values: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def is_cacheable(self) -> bool:
+        return self.cache_config.enabled and not self.volatile_values
+
+
+def create_cache_report(
+    step_configs: Iterable[dict[str, Any] | BaseSettings],
+    # Values that changed between two successive loads of the configs, by step name (see `find_changed_values()`)
+    changed_values: dict[str, dict[str, str]] | None = None,
+) -> list[StepCacheReport]:
+    return [
+        StepCacheReport(
+            step_name=_get(step_config, 'step_name'),
+            cache_config=get_cache_config(step_config),
+            volatile_values={
+                **(changed_values or {}).get(_get(step_config, 'step_name'), {}),
+                **_find_volatile_interpolations(step_config),
+            },
+        )
+        for step_config in step_configs
+    ]
+
+
+def format_cache_report(reports: list[StepCacheReport]) -> str:
+    lines: list[str] = [
+        f'Step caching: {sum(report.is_cacheable for report in reports)} of {len(reports)} steps cacheable'
+    ]
+    for report in reports:
+        if not report.cache_config.enabled:
+            status = 'caching disabled'
+        else:
+            expiry = report.cache_config.expire_after or 'never'
+            status = f'caching enabled (expires after: {expiry})'
+            if report.volatile_values:
+                status += ', but likely never hit, due to'
+        lines.append(f'- {report.step_name}: {status}')
+        lines.extend(f'    - {path}: {reason}' for path, reason in report.volatile_values.items())
+    return '\n'.join(lines)
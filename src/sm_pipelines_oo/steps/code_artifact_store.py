@@ -0,0 +1,108 @@
+"""
+Content-addressed store for the code (`source_dir`) of processing steps.
+
+By default, FrameworkProcessor packages and uploads `source_dir` separately for every step (and every build), even if several steps share the same code. Instead, this store packages `source_dir` into a deterministic tarball, names it by the hash of its content, and only uploads it if no artifact with this hash exists yet. The step then uses the S3 URI of this artifact as its `source_dir`, which FrameworkProcessor uses as is.
+"""
+# Required to not make boto3-stubs a runtime dependency: https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from pathlib import Path
+import gzip
+import hashlib
+import io
+import os
+import tarfile
+import threading
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+
+
+# Files that change without the code changing, so they must not end up in the artifact.
+_EXCLUDED_DIRS = {'__pycache__', '.ipynb_checkpoints'}
+_EXCLUDED_SUFFIXES = {'.pyc', '.pyo'}
+
+
+def create_deterministic_tarball(source_dir: Path) -> bytes:
+    """
+    Packages all files in `source_dir` (relative to it, like FrameworkProcessor does) into a gzipped tarball.
+    The result only depends on the files' relative paths, content and permissions – not on timestamps, owners or the order in which the file system lists them. So identical code always results in identical bytes (and thus the same hash).
+    """
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as gzip_file, \
+            tarfile.open(fileobj=gzip_file, mode='w', format=tarfile.PAX_FORMAT) as tar:
+        for dirpath, dirnames, filenames in os.walk(source_dir):
+            # Sort in place, so os.walk() traverses subfolders in a deterministic order.
+            dirnames[:] = sorted(dirname for dirname in dirnames if dirname not in _EXCLUDED_DIRS)
+            for filename in sorted(filenames):
+                file_path = Path(dirpath) / filename
+                if file_path.suffix in _EXCLUDED_SUFFIXES:
+                    continue
+                tarinfo = tar.gettarinfo(str(file_path), arcname=str(file_path.relative_to(source_dir)))
+                tarinfo.mtime = 0
+                tarinfo.uid = tarinfo.gid = 0
+                tarinfo.uname = tarinfo.gname = ''
+                with file_path.open('rb') as file:
+                    tar.addfile(tarinfo, file)
+    return buffer.getvalue()
+
+
+class CodeArtifactStore:
+    """
+    Uploads code artifacts to `s3://<bucket_name>/<prefix>/<content hash>/sourcedir.tar.gz`.
+    (FrameworkProcessor requires artifacts to be named `sourcedir.tar.gz`, so the hash becomes part of the "folder" instead.)
+
+    Instances are thread-safe, so they can be shared by step factories that run concurrently. Each artifact is checked (and uploaded) at most once per instance.
+    """
+    def __init__(
+        self,
+        s3_client: S3Client,
+        bucket_name: str,
+        prefix: str = 'code_artifacts',
+    ):
+        self._s3_client = s3_client
+        self._bucket_name = bucket_name
+        self._prefix = prefix.strip('/')
+        # Content hash -> S3 URI of artifacts that are known to exist
+        self._known_artifacts: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._locks_by_hash: dict[str, threading.Lock] = {}
+
+    def get_artifact_uri(self, source_dir: str) -> str:
+        """Returns the S3 URI of the artifact for `source_dir`, uploading it first if it does not exist yet."""
+        if source_dir.startswith('s3://'):
+            # Already uploaded by user
+            return source_dir
+
+        tarball: bytes = create_deterministic_tarball(Path(source_dir))
+        content_hash: str = hashlib.sha256(tarball).hexdigest()
+        # Steps that share code may be created concurrently. Make sure only one of them uploads it.
+        with self._lock:
+            hash_lock = self._locks_by_hash.setdefault(content_hash, threading.Lock())
+        with hash_lock:
+            if content_hash not in self._known_artifacts:
+                self._known_artifacts[content_hash] = self._upload_if_missing(content_hash, tarball)
+        return self._known_artifacts[content_hash]
+
+    def _upload_if_missing(self, content_hash: str, tarball: bytes) -> str:
+        key = f'{self._prefix}/{content_hash}/sourcedir.tar.gz'
+        uri = f's3://{self._bucket_name}/{key}'
+        if self._exists(key):
+            logger.debug(f'Code artifact {uri} already exists. Skipping upload.')
+        else:
+            self._s3_client.put_object(Bucket=self._bucket_name, Key=key, Body=tarball)
+            logger.info(f'Uploaded code artifact to {uri}.')
+        return uri
+
+    def _exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self._s3_client.head_object(Bucket=self._bucket_name, Key=key)
+        except ClientError as error:
+            if error.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        return True
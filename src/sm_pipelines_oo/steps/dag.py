@@ -0,0 +1,211 @@
+"""
+Infers dependencies between steps from their configs.
+
+A step depends on another step if one of its inputs reads what the other step writes, i.e. if an input's S3 URI
+- equals one of the other step's outputs. In this case, the input is replaced by a *property reference* to that output, which lets SageMaker infer the dependency (and also makes the data lineage explicit).
+- lies *within* one of the other step's outputs (e.g. a single file in an output folder). Since a property reference can't express this, the step explicitly `depends_on` the other step instead.
+- *contains* outputs of other steps (e.g. the partitions written by the shards of a fanned-out step, see `fan_out` module). Likewise, the step explicitly `depends_on` all of these steps.
+
+Steps that don't depend on each other (directly or indirectly) are run concurrently by SageMaker.
+"""
+# Required to not make the SageMaker SDK a runtime dependency of this module (importing it is slow): https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Iterable
+from dataclasses import dataclass, field
+import bisect
+
+if TYPE_CHECKING:
+    from pydantic_settings import BaseSettings
+    from sagemaker.workflow.entities import PipelineVariable
+    from sagemaker.workflow.steps import Step
+
+
+class CyclicDependencyError(ValueError):
+    """Raised if steps (indirectly) depend on themselves, so there is no order in which they could run."""
+    def __init__(self, cycle: list[str]):
+        self.cycle = cycle
+        super().__init__(f'Steps have a cyclic dependency: {" -> ".join(cycle)}')
+
+
+@dataclass(frozen=True)
+class Edge:
+    """Dependency of one of a step's inputs on an upstream step."""
+    upstream_step_name: str
+    input_name: str
+    # Name of the upstream output that this input *equals*. None if the input only lies within that output.
+    output_name: str | None
+
+
+@dataclass
+class StepDependencies:
+    """Dependencies of a step, resolved to the actual upstream steps. This is what step factories receive."""
+    # Input name -> property reference to the upstream output that should be used instead of the S3 URI from config
+    input_sources: dict[str, PipelineVariable] = field(default_factory=dict)
+    # Upstream steps that can't be referenced through an input
+    depends_on: list[Step] = field(default_factory=list)
+
+
+# Helpers to access configs
+# =========================
+
+# Name of the (only) output of training steps
+_MODEL_OUTPUT_NAME = 'model'
+
+
+def _get_field(step_config: dict[str, Any] | BaseSettings, key: str) -> Any:
+    if isinstance(step_config, dict):
+        return step_config.get(key)
+    return getattr(step_config, key, None)
+
+
+def get_s3_uris(step_config: dict[str, Any] | BaseSettings, key: str) -> dict[str, str]:
+    """
+    Returns S3 URIs of the inputs or outputs (depending on `key`) of a step config. Steps without a run config have neither.
+    Inputs and outputs may be given in short form (just the S3 URI) or long form (with an `s3_uri` field), both in raw and validated configs.
+    For training steps, the only output is the model (named 'model'), which is written below the estimator's `output_path`.
+    """
+    if key == 'outputs' and _get_field(step_config, 'training_run_config') is not None:
+        output_path = _get_field(_get_field(step_config, 'estimator_config'), 'output_path')
+        return {_MODEL_OUTPUT_NAME: output_path} if isinstance(output_path, str) else {}
+    run_config = _get_field(step_config, 'processor_run_config')
+    if run_config is None:
+        run_config = _get_field(step_config, 'training_run_config')
+    if run_config is None:
+        return {}
+    s3_uris: dict[str, str] = {}
+    for name, config in (_get_field(run_config, key) or {}).items():
+        uri = config if isinstance(config, str) else _get_field(config, 's3_uri')
+        # Only S3 URIs can be matched against outputs (unlike, e.g., Athena dataset definitions).
+        if isinstance(uri, str):
+            s3_uris[name] = uri
+    return s3_uris
+
+
+def check_unique_step_names(
+    step_configs: Iterable[dict[str, Any] | BaseSettings],
+    # Names of steps checked earlier (e.g. of previous batches, when streaming configs). Updated in place.
+    seen_step_names: set[str] | None = None,
+) -> None:
+    """Raises a ValueError if several step configs have the same step name."""
+    seen_step_names = set() if seen_step_names is None else seen_step_names
+    duplicate_step_names: set[str] = set()
+    for step_config in step_configs:
+        step_name: str = _get_field(step_config, 'step_name')
+        if step_name in seen_step_names:
+            duplicate_step_names.add(step_name)
+        seen_step_names.add(step_name)
+    if duplicate_step_names:
+        raise ValueError(f'Step names must be unique, but these are used by several steps: {", ".join(sorted(duplicate_step_names))}.')
+
+
+def _normalize_uri(uri: str) -> str:
+    return uri.rstrip('/')
+
+
+# DAG
+# ===
+
+class StepDag:
+    """Dependency graph of the steps given by `step_configs` (which may be raw dictionaries or validated models)."""
+
+    def __init__(self, step_configs: Iterable[dict[str, Any] | BaseSettings]):
+        self.step_names: list[str] = []
+        # Normalized output URI -> (step name, output name)
+        self._output_index: dict[str, tuple[str, str]] = {}
+        step_configs = list(step_configs)
+        # Steps are identified by name, so duplicates would silently be merged.
+        check_unique_step_names(step_configs)
+        for step_config in step_configs:
+            step_name: str = _get_field(step_config, 'step_name')
+            self.step_names.append(step_name)
+            for output_name, uri in get_s3_uris(step_config, 'outputs').items():
+                normalized_uri = _normalize_uri(uri)
+                if normalized_uri in self._output_index:
+                    other_step_name, _ = self._output_index[normalized_uri]
+                    raise ValueError(
+                        f'Steps {other_step_name} and {step_name} both write to {uri}, so it is '
+                        'ambiguous which one downstream steps depend on.'
+                    )
+                self._output_index[normalized_uri] = (step_name, output_name)
+        # For finding outputs within a prefix
+        self._sorted_output_uris: list[str] = sorted(self._output_index)
+        self.edges: dict[str, list[Edge]] = {
+            _get_field(step_config, 'step_name'): self.edges_of(step_config)
+            for step_config in step_configs
+        }
+
+    def edges_of(self, step_config: dict[str, Any] | BaseSettings) -> list[Edge]:
+        """Returns the dependencies of a step config. The step does not have to be part of the DAG (e.g. when rebuilding a single step)."""
+        step_name: str = _get_field(step_config, 'step_name')
+        edges: list[Edge] = []
+        for input_name, uri in get_s3_uris(step_config, 'inputs').items():
+            # A step reading its own output is not a dependency.
+            edges.extend(
+                edge for edge in self._find_upstream_outputs(input_name, _normalize_uri(uri))
+                if edge.upstream_step_name != step_name
+            )
+        return edges
+
+    def _find_upstream_outputs(self, input_name: str, normalized_uri: str) -> list[Edge]:
+        if normalized_uri in self._output_index:
+            upstream_step_name, output_name = self._output_index[normalized_uri]
+            return [Edge(upstream_step_name, input_name, output_name)]
+        # Check whether input lies within an output, starting with the most specific "parent folder".
+        prefix = normalized_uri
+        while '/' in prefix.removeprefix('s3://'):
+            prefix = prefix.rsplit('/', 1)[0]
+            if prefix in self._output_index:
+                upstream_step_name, _ = self._output_index[prefix]
+                return [Edge(upstream_step_name, input_name, output_name=None)]
+        # Check whether outputs lie within the input. (These are adjacent in sorted order, since they share the prefix.)
+        edges: list[Edge] = []
+        start = bisect.bisect_left(self._sorted_output_uris, normalized_uri + '/')
+        for output_uri in self._sorted_output_uris[start:]:
+            if not output_uri.startswith(normalized_uri + '/'):
+                break
+            upstream_step_name, _ = self._output_index[output_uri]
+            edge = Edge(upstream_step_name, input_name, output_name=None)
+            if edge not in edges:
+                edges.append(edge)
+        return edges
+
+    def generations(self) -> list[list[str]]:
+        """
+        Groups steps into generations, such that every step only depends on steps of earlier generations. (Steps within a generation can thus be created – and run – concurrently.)
+        Within a generation, steps keep the order of their configs. Raises a CyclicDependencyError if there is no such grouping.
+        """
+        upstream: dict[str, set[str]] = {
+            step_name: {edge.upstream_step_name for edge in edges}
+            for step_name, edges in self.edges.items()
+        }
+        done: set[str] = set()
+        generations: list[list[str]] = []
+        while len(done) < len(self.step_names):
+            generation = [
+                step_name for step_name in self.step_names
+                if step_name not in done and upstream[step_name] <= done
+            ]
+            if not generation:
+                raise CyclicDependencyError(self._find_cycle(upstream, done))
+            generations.append(generation)
+            done.update(generation)
+        return generations
+
+    def _find_cycle(self, upstream: dict[str, set[str]], done: set[str]) -> list[str]:
+        """Follows dependencies among the remaining steps until a step repeats. (Every remaining step has a remaining upstream step, so this must happen.)"""
+        path: list[str] = [next(step_name for step_name in self.step_names if step_name not in done)]
+        while path.count(path[-1]) < 2:
+            path.append(min(upstream[path[-1]] - done))
+        return path[path.index(path[-1]):]
+
+
+def output_reference(step: Step, output_name: str) -> PipelineVariable | None:
+    """Returns a property reference to the S3 URI of a step's output, or None if we don't know how to reference outputs of this kind of step."""
+    from sagemaker.workflow.steps import ProcessingStep, TrainingStep
+
+    if isinstance(step, ProcessingStep):
+        return step.properties.ProcessingOutputConfig.Outputs[output_name].S3Output.S3Uri
+    if isinstance(step, TrainingStep) and output_name == _MODEL_OUTPUT_NAME:
+        # Rather than the output_path itself, reference the model artifact of this particular training job.
+        return step.properties.ModelArtifacts.S3ModelArtifacts
+    return None
@@ -0,0 +1,235 @@
+"""
+Fan-out of a processing step over partitions of one of its inputs.
+
+Rather than processing a large input prefix in a single job, a step with a `fan_out` config is expanded (at build time) into one step per *shard* of that input, which SageMaker runs in parallel:
+- 'prefix': One shard per sub-prefix directly below the input (e.g. one per customer folder).
+- 'partition': Same, but only for Hive-style partitions of the given key (e.g. `date=2024-01-01/` for key 'date').
+- 'hash': The input's objects are distributed over `n_buckets` shards by a hash of their key. Each shard reads its objects through a manifest file, which is uploaded to the project bucket.
+Each shard step writes its outputs below the step's output prefixes, in a sub-prefix named after the shard (e.g. `features/date=2024-01-01/`). Downstream steps that read the whole output prefix depend on all shard steps (see `dag` module).
+
+Optionally, a merge step combines the outputs of all shards, and writes to the step's original output prefixes. (Shards then write to sibling prefixes instead, e.g. `features-shards/date=2024-01-01/`, so that merged and unmerged data don't mix.)
+
+Note: How many shard steps run at the same time is limited pipeline-wide, by `max_parallel_execution_steps` in the shared config (since SageMaker doesn't support limits per group of steps).
+"""
+# Required to not make boto3-stubs a runtime dependency: https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
+from typing import TYPE_CHECKING, Literal
+from dataclasses import dataclass
+import hashlib
+import json
+import re
+import zlib
+
+from loguru import logger
+from pydantic import Field, model_validator
+from pydantic_settings import BaseSettings
+
+if TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+    from sm_pipelines_oo.steps.framework_processing_step import StepConfig
+
+
+# Configs
+# =======
+
+class _MergeConfig(BaseSettings):
+    """Step that combines the outputs of all shards. Its inputs are named `<output name>_shards` and contain one sub-prefix per shard (e.g. `date=2024-01-01/`)."""
+    code: str
+    # Defaults to the source_dir of the fanned-out step.
+    source_dir: str | None = None
+    # Defaults to the instance type of the fanned-out step.
+    instance_type: str | None = None
+    instance_count: int = 1
+
+
+class FanOutConfig(BaseSettings):
+    # Name of the input to split into shards
+    input_name: str
+    strategy: Literal['prefix', 'partition', 'hash']
+    # For 'partition' strategy: Key of the Hive-style partitions, e.g. 'date'
+    partition_key: str | None = None
+    # For 'hash' strategy
+    n_buckets: int | None = Field(default=None, ge=2)
+    # Guards against accidentally fanning out into thousands of steps, e.g. when pointing at the wrong prefix.
+    max_shards: int = Field(default=100, ge=1)
+    merge: _MergeConfig | None = None
+
+    @model_validator(mode='after')
+    def _check_strategy_settings(self) -> 'FanOutConfig':
+        if (self.strategy == 'partition') != (self.partition_key is not None):
+            raise ValueError("Set partition_key if (and only if) the strategy is 'partition'.")
+        if (self.strategy == 'hash') != (self.n_buckets is not None):
+            raise ValueError("Set n_buckets if (and only if) the strategy is 'hash'.")
+        if self.n_buckets is not None and self.n_buckets > self.max_shards:
+            raise ValueError('n_buckets must not exceed max_shards.')
+        return self
+
+
+# Shards
+# ======
+
+@dataclass(frozen=True)
+class Shard:
+    # Path segment that the shard's outputs are written to, e.g. 'date=2024-01-01'
+    path: str
+    # Where the shard's input is read from: a prefix, or a manifest file listing the shard's objects
+    s3_uri: str
+    is_manifest: bool = False
+
+    @property
+    def name(self) -> str:
+        """Shard path, restricted to characters that are valid in step names."""
+        return re.sub(r'[^A-Za-z0-9\-_]', '-', self.path)
+
+
+def _split_s3_uri(s3_uri: str) -> tuple[str, str]:
+    bucket, _, prefix = s3_uri.removeprefix('s3://').partition('/')
+    # Only list *within* the prefix, e.g. not 'raw_v2/' for 'raw'.
+    return bucket, prefix.rstrip('/') + '/' if prefix else ''
+
+
+def _list_sub_prefixes(s3_client: S3Client, s3_uri: str) -> list[str]:
+    """Returns the names of the sub-prefixes directly below an S3 prefix, in lexicographic order."""
+    bucket, prefix = _split_s3_uri(s3_uri)
+    sub_prefixes: list[str] = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter='/'):
+        sub_prefixes.extend(
+            common_prefix['Prefix'].removeprefix(prefix).rstrip('/') for common_prefix in page.get('CommonPrefixes', [])
+        )
+    return sub_prefixes
+
+
+def _list_keys(s3_client: S3Client, s3_uri: str) -> list[str]:
+    """Returns the keys of all objects below an S3 prefix, relative to that prefix."""
+    bucket, prefix = _split_s3_uri(s3_uri)
+    keys: list[str] = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        keys.extend(obj['Key'].removeprefix(prefix) for obj in page.get('Contents', []))
+    return keys
+
+
+def _upload_manifest(s3_client: S3Client, s3_uri: str, relative_keys: list[str], manifest_prefix: str) -> str:
+    """
+    Uploads a manifest file (listing the given objects below `s3_uri`) and returns its S3 URI.
+    Manifests are content-addressed, so that unchanged shards keep identical step arguments (and thus keep benefitting from step caching).
+    """
+    bucket, prefix = _split_s3_uri(s3_uri)
+    manifest: str = json.dumps([{'prefix': f's3://{bucket}/{prefix}'}, *relative_keys])
+    manifest_uri = f'{manifest_prefix.rstrip("/")}/{hashlib.sha256(manifest.encode()).hexdigest()}.manifest'
+    manifest_bucket, _, manifest_key = manifest_uri.removeprefix('s3://').partition('/')
+    s3_client.put_object(Bucket=manifest_bucket, Key=manifest_key, Body=manifest.encode())
+    return manifest_uri
+
+
+def list_shards(
+    fan_out_config: FanOutConfig,
+    s3_uri: str,  # Input prefix to split
+    s3_client: S3Client,
+    # Where to upload manifests of hash buckets
+    manifest_prefix: str,
+) -> list[Shard]:
+    shards: list[Shard]
+    if fan_out_config.strategy == 'hash':
+        n_buckets: int = fan_out_config.n_buckets  # type: ignore[assignment]
+        buckets: list[list[str]] = [[] for _ in range(n_buckets)]
+        for key in _list_keys(s3_client, s3_uri):
+            # Note: Unlike hash(), crc32 is the same in every process, so shards are stable across builds.
+            buckets[zlib.crc32(key.encode()) % n_buckets].append(key)
+        width = len(str(n_buckets - 1))
+        shards = [
+            Shard(f'bucket={i:0{width}d}', _upload_manifest(s3_client, s3_uri, keys, manifest_prefix), is_manifest=True)
+            # Empty buckets would fail their job, so skip them.
+            for i, keys in enumerate(buckets) if keys
+        ]
+    else:
+        sub_prefixes: list[str] = _list_sub_prefixes(s3_client, s3_uri)
+        if fan_out_config.strategy == 'partition':
+            sub_prefixes = [
+                sub_prefix for sub_prefix in sub_prefixes if sub_prefix.startswith(f'{fan_out_config.partition_key}=')
+            ]
+        shards = [Shard(sub_prefix, f'{s3_uri.rstrip("/")}/{sub_prefix}/') for sub_prefix in sub_prefixes]
+
+    if not shards:
+        raise ValueError(f'Found no shards to fan out over in {s3_uri}.')
+    if len(shards) > fan_out_config.max_shards:
+        raise ValueError(
+            f'Fanning out over {s3_uri} would create {len(shards)} shards, but max_shards is {fan_out_config.max_shards}.'
+        )
+    if len({shard.name for shard in shards}) < len(shards):
+        raise ValueError(f'Shards of {s3_uri} are not unique once made valid for step names.')
+    return shards
+
+
+# Expansion
+# =========
+
+def expand_fan_out(step_config: StepConfig, s3_client: S3Client) -> list[StepConfig]:
+    """Returns one step config per shard (plus a merge step config, if configured), or the config itself if it does not fan out."""
+    # Avoid circular import
+    from sm_pipelines_oo.steps.framework_processing_step import _InputConfig
+
+    fan_out_config: FanOutConfig | None = step_config.fan_out
+    if fan_out_config is None:
+        return [step_config]
+    run_config = step_config.processor_run_config
+    input_uri: str = run_config.inputs[fan_out_config.input_name].s3_uri  # type: ignore[assignment]
+    shards: list[Shard] = list_shards(
+        fan_out_config,
+        input_uri,
+        s3_client,
+        manifest_prefix=f's3://{step_config.shared_config.project_bucket_name}/fan_out_manifests/{step_config.step_name}',
+    )
+    logger.info(f'Fanning out step {step_config.step_name} over {len(shards)} shards of {input_uri}.')
+
+    def shard_output_uri(output_uri: str, shard: Shard) -> str:
+        output_uri = output_uri.rstrip('/')
+        return f'{output_uri}-shards/{shard.path}/' if fan_out_config.merge else f'{output_uri}/{shard.path}/'
+
+    shard_configs: list[StepConfig] = []
+    for shard in shards:
+        shard_input = run_config.inputs[fan_out_config.input_name].model_copy(update={
+            's3_uri': shard.s3_uri,
+            's3_data_type': 'ManifestFile' if shard.is_manifest else 'S3Prefix',
+        })
+        shard_configs.append(step_config.model_copy(update={
+            'step_name': f'{step_config.step_name}-{shard.name}',
+            'processor_run_config': run_config.model_copy(update={
+                'inputs': {**run_config.inputs, fan_out_config.input_name: shard_input},
+                'outputs': {
+                    output_name: output_config.model_copy(update={
+                        's3_uri': shard_output_uri(output_config.s3_uri, shard),
+                    })
+                    for output_name, output_config in run_config.outputs.items()
+                },
+            }),
+            'fan_out': None,
+        }))
+    if fan_out_config.merge is None:
+        return shard_configs
+
+    merge_config = fan_out_config.merge
+    init_config = step_config.processor_init_config
+    merge_step_config: StepConfig = step_config.model_copy(update={
+        'step_name': f'{step_config.step_name}-merge',
+        'processor_init_config': init_config.model_copy(update={
+            'instance_type': merge_config.instance_type or init_config.instance_type,
+            # Auto-sized steps are merged on auto-sized instances as well.
+            'instance_count': 'auto' if merge_config.instance_type is None and init_config.is_auto_sized
+                else merge_config.instance_count,
+        }),
+        'processor_run_config': run_config.model_copy(update={
+            'code': merge_config.code,
+            'source_dir': merge_config.source_dir or run_config.source_dir,
+            # One input per output rather than per shard, as processing jobs take at most 10 inputs. The merge step still depends on every shard, as its inputs contain their outputs.
+            'inputs': {
+                f'{output_name}_shards': _InputConfig(s3_uri=f'{output_config.s3_uri.rstrip("/")}-shards/')
+                for output_name, output_config in run_config.outputs.items()
+            },
+        }),
+        'fan_out': None,
+        # Parameters of instances refer to the shard steps.
+        'runtime_parameters': {},
+    })
+    return [*shard_configs, merge_step_config]
@@ -1,31 +1,35 @@
+# Required to only import heavy SageMaker SDK modules for type checking, or when they are actually needed: https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
 # For Python < 3.12, don't use typing.TypedDict: https://docs.pydantic.dev/2.6/errors/usage_errors/#typed-dict-version
 from typing_extensions import TypedDict
-from abc import ABC, abstractmethod
-import os
-from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, ClassVar, Literal, Mapping
 from functools import cached_property
-from typing import TypeAlias, Any, Generic, TypeVar, Literal, ClassVar
 from pathlib import Path
 
 from loguru import logger
-from s3path import S3Path # type: ignore[import-untyped]
-
-from sagemaker.session import Session
-from sagemaker.local.local_session import LocalSession
-from sagemaker.workflow.pipeline_context import PipelineSession, LocalPipelineSession
-from sagemaker.processing import ProcessingInput, ProcessingOutput
-from sagemaker.processing import Processor, FrameworkProcessor
-
-from sagemaker.workflow.steps import ProcessingStep
-from sagemaker.workflow.pipeline_context import _JobStepArguments
-from sagemaker.workflow.entities import PipelineVariable
-from sagemaker.sklearn.estimator import SKLearn
+from pydantic import field_validator, model_validator
 from pydantic_settings import BaseSettings
 
-from sm_pipelines_oo.shared_config_schema import SharedConfig
+from sm_pipelines_oo.shared_config_schema import SharedConfig, StepCacheConfig
 from sm_pipelines_oo.steps.interfaces import StepFactoryInterface
+from sm_pipelines_oo.steps.registry import estimator_registry, lookup
+from sm_pipelines_oo.steps.step_args_cache import StepArgsCache
+from sm_pipelines_oo.steps.code_artifact_store import CodeArtifactStore
+from sm_pipelines_oo.steps.dag import StepDependencies
+from sm_pipelines_oo.steps.caching import get_cache_config, to_sagemaker_cache_config
+from sm_pipelines_oo.steps.instance_planner import DEFAULT_SIZING_POLICY, InstancePlanner, SizingDecision, SizingTier
+from sm_pipelines_oo.steps.runtime_parameters import create_pipeline_parameters, validate_runtime_parameters
+from sm_pipelines_oo.steps.fan_out import FanOutConfig
 
-from sm_pipelines_oo.shared_config_schema import SharedConfig
+if TYPE_CHECKING:
+    # Importing the SageMaker SDK takes seconds, so we only do so once a processor or step is actually created. This keeps config-only code (e.g. validating configs) fast.
+    from sagemaker.session import Session
+    from sagemaker.local.local_session import LocalSession
+    from sagemaker.workflow.pipeline_context import PipelineSession, LocalPipelineSession, _JobStepArguments
+    from sagemaker.processing import ProcessingInput, ProcessingOutput, FrameworkProcessor
+    from sagemaker.workflow.steps import ProcessingStep
+    from sagemaker.sklearn.estimator import SKLearn
+    from sagemaker.workflow.parameters import Parameter
 
 
 # Pairs of: *Types* on AWS side we need to match + associated *config* from which to construct them
@@ -52,10 +56,23 @@ class _InitConfig(BaseSettings):
     """Config for creating Init*Args*"""
     framework_version: str
     estimator_cls_name: str
-    instance_count: int
+    # Set both to 'auto' to choose instances based on the size of the step's inputs (see `instance_planner` module).
+    instance_count: int | Literal['auto']
     instance_type: str
+    # Only used for 'auto' sizing
+    sizing_policy: list[SizingTier] = DEFAULT_SIZING_POLICY
     env: dict[str, str] | None = None
 
+    @property
+    def is_auto_sized(self) -> bool:
+        return self.instance_type == 'auto'
+
+    @model_validator(mode='after')
+    def _check_auto_sizing(self) -> '_InitConfig':
+        if (self.instance_type == 'auto') != (self.instance_count == 'auto'):
+            raise ValueError("For auto sizing, set both instance_type and instance_count to 'auto'.")
+        return self
+
 # Arguments for *running* FrameworkProcessor
 # ------------------------------------------
 class RunArgs(TypedDict):
@@ -66,13 +83,66 @@ class RunArgs(TypedDict):
     outputs: list[ProcessingOutput]
 
 
+class _AthenaQueryConfig(BaseSettings):
+    """
+    Athena query whose result is used as input (instead of an S3 prefix). This way, filtering and selecting columns happen in the query engine, so only the data that's needed is written to S3 and downloaded into the container.
+    """
+    catalog: str = 'AwsDataCatalog'
+    database: str
+    query_string: str
+    # Where Athena writes the query result, before it's downloaded into the container
+    output_s3_uri: str
+    output_format: Literal['PARQUET', 'ORC', 'AVRO', 'JSON', 'TEXTFILE'] = 'PARQUET'
+    output_compression: Literal['GZIP', 'SNAPPY', 'ZLIB'] | None = None
+    work_group: str | None = None
+    kms_key_id: str | None = None
+
+
+class _InputConfig(BaseSettings):
+    """
+    Config for a single ProcessingInput, which is read from either an S3 prefix (`s3_uri`) or the result of an Athena query (`athena_query`). In configs, an S3 input can also be given as just its S3 URI (short form), in which case all other fields keep their defaults.
+    Note: With `instance_count` > 1, use ShardedByS3Key to have each instance download only its share of the data, rather than all of it.
+    """
+    s3_uri: str | None = None  # todo: validate it's an s3 path
+    athena_query: _AthenaQueryConfig | None = None
+    s3_data_distribution_type: Literal['FullyReplicated', 'ShardedByS3Key'] = 'FullyReplicated'
+    # With Pipe mode, data is streamed while the job runs, rather than downloaded before it starts.
+    s3_input_mode: Literal['File', 'Pipe'] = 'File'
+    s3_compression_type: Literal['None', 'Gzip'] = 'None'
+    # With ManifestFile, s3_uri points to a manifest that lists the objects to read (e.g. for the shards of fanned-out steps).
+    s3_data_type: Literal['S3Prefix', 'ManifestFile'] = 'S3Prefix'
+
+    @model_validator(mode='after')
+    def _check_single_source(self) -> '_InputConfig':
+        if (self.s3_uri is None) == (self.athena_query is None):
+            raise ValueError('Set exactly one of s3_uri and athena_query for each input.')
+        return self
+
+
+class _OutputConfig(BaseSettings):
+    """Config for a single ProcessingOutput. Same as for inputs, it can also be given as just its S3 URI."""
+    s3_uri: str  # todo: validate it's an s3 path
+    # With Continuous mode, data is uploaded while the job runs, rather than after it finished.
+    s3_upload_mode: Literal['Continuous', 'EndOfJob'] = 'EndOfJob'
+
+
 class _RunConfig(BaseSettings):
     """Serves as input for constructing kwargs for *Framework*Processor.run()."""
     code: str
     source_dir: str
-    # todo: allow athena datasetdefinition instead
-    inputs: dict[str, str]  # todo: validate it's an s3 path
-    outputs: dict[str, str]  # todo: validate it's an s3 path
+    inputs: dict[str, _InputConfig]
+    outputs: dict[str, _OutputConfig]
+
+    @field_validator('inputs', 'outputs', mode='before')
+    @classmethod
+    def _expand_short_form(cls, value: Any) -> Any:
+        """Converts inputs/outputs given as just an S3 URI into their long form."""
+        if not isinstance(value, dict):
+            return value
+        return {
+            name: {'s3_uri': config} if isinstance(config, str) else config
+            for name, config in value.items()
+        }
 
 
 # Combining configs into single config for the step
@@ -87,19 +157,48 @@ class StepConfig(BaseSettings):
     step_factory_class: str
     processor_init_config: _InitConfig
     processor_run_config: _RunConfig
+    # If not set, the default from the shared config is used.
+    cache_config: StepCacheConfig | None = None
+    # Config field -> name of the pipeline parameter it is promoted to (see `runtime_parameters` module)
+    runtime_parameters: dict[str, str] = {}
+    # If set, the step is expanded into one step per shard of one of its inputs (see `fan_out` module).
+    fan_out: FanOutConfig | None = None
     # For now, we will reload this for every step config to avoid dependency on pipeline wrapper.
     shared_config: SharedConfig
 
+    @model_validator(mode='after')
+    def _check_runtime_parameters(self) -> 'StepConfig':
+        # Only dump config if needed, since this runs for every step.
+        if self.runtime_parameters:
+            validate_runtime_parameters(self.model_dump(exclude={'shared_config'}))
+        return self
+
+    @model_validator(mode='after')
+    def _check_fan_out(self) -> 'StepConfig':
+        if self.fan_out is None:
+            return self
+        input_name: str = self.fan_out.input_name
+        input_config: _InputConfig | None = self.processor_run_config.inputs.get(input_name)
+        if input_config is None or input_config.s3_uri is None:
+            raise ValueError(f'Fan-out input {input_name} must be an S3 input of the step.')
+        # Each shard uses a different value for these, so they can't share a parameter.
+        shard_specific_fields: list[str] = [
+            f'processor_run_config.inputs.{input_name}',
+            *(f'processor_run_config.outputs.{output_name}' for output_name in self.processor_run_config.outputs),
+        ]
+        if any(field in self.runtime_parameters for field in shard_specific_fields):
+            raise ValueError('The fan-out input and the outputs of a fanned-out step cannot be runtime parameters.')
+        return self
+
 
 # Impementation of StepFactory
 # ============================
 
 class StepFactory(StepFactoryInterface):
     _local_dir: ClassVar = Path('/opt/ml/processing')
-    # Note: this is a public attribute, so user can add support for additional estimators by overwritting it.
-    estimator_name_to_cls_mapping: ClassVar[dict[str, Any]] = {  # todo:  find supertype
-        'SKLearn': SKLearn,
-    }
+    # Note: this is a public attribute, so user can add support for additional estimators by overwritting it. By default, it is the registry of estimators, which also discovers estimators provided by other packages through entry points (see `registry` module).
+    # Values are either estimator classes, or import paths of the form 'module:attribute', which are only imported when a config actually uses that estimator.
+    estimator_name_to_cls_mapping: ClassVar[Mapping[str, Any]] = estimator_registry  # todo:  find supertype
 
     _config_model: ClassVar[type[StepConfig]] = StepConfig
 
@@ -107,24 +206,95 @@ class StepFactory(StepFactoryInterface):
         self,
         # todo: should values be constrained to str to make it independent from source it's read
         #  from? (Parsing is handled by pydantic anyway.)
-        step_config_dict: dict[str, Any],
+        step_config_dict: dict[str, Any] | StepConfig,
         role_arn: str,
         pipeline_session: PipelineSession | LocalPipelineSession,
         # Optionally, provide non-pipeline session to run processor directly
         sm_session: Session | LocalSession | None = None,
+        # Optionally, reuse step arguments from earlier builds if neither config nor code changed
+        step_args_cache: StepArgsCache | None = None,
+        # Optionally, share code artifacts between steps (and builds) with identical code, rather than uploading source_dir for every step
+        code_artifact_store: CodeArtifactStore | None = None,
+        # Dependencies on upstream steps, as inferred by the step factory façade
+        dependencies: StepDependencies | None = None,
+        # Used for steps with 'auto' sizing. Defaults to a planner using the S3 client of the pipeline session.
+        instance_planner: InstancePlanner | None = None,
     ):
-        # Parse config, using the specific pydantic model that this factory has as a class variable.
-        self._config: StepConfig = self._config_model(**step_config_dict)
+        # Parse config, using the specific pydantic model that this factory has as a class variable. (Unless config has already been validated.)
+        self._config: StepConfig = (
+            step_config_dict if isinstance(step_config_dict, self._config_model)
+            else self._config_model(**step_config_dict)
+        )
         self._role_arn = role_arn
         self._pipeline_session: PipelineSession | LocalPipelineSession = pipeline_session
         self._sm_session = sm_session
+        self._step_args_cache = step_args_cache
+        self._code_artifact_store = code_artifact_store
+        self._dependencies: StepDependencies = dependencies or StepDependencies()
+        self._check_parameterized_inputs_are_not_upstream_outputs()
+        self._instance_planner = instance_planner
+        # Set once instances have been chosen for an auto-sized step
+        self.sizing_decision: SizingDecision | None = None
+
+    def _check_parameterized_inputs_are_not_upstream_outputs(self) -> None:
+        """
+        Raises a ValueError if an input that is a runtime parameter reads the output of an upstream step.
+        Such an input references the upstream output instead (see `dag` module), so overriding the parameter when starting an execution would have no effect.
+        """
+        for input_name in self._dependencies.input_sources:
+            parameter_name: str | None = self._config.runtime_parameters.get(f'processor_run_config.inputs.{input_name}')
+            if parameter_name is not None:
+                raise ValueError(
+                    f'Input {input_name} of step {self._config.step_name} is the output of an upstream step, so it '
+                    f'cannot be runtime parameter {parameter_name}. Parameterize the upstream output instead.'
+                )
+
+    def _resolve_auto_sizing(self) -> None:
+        """For auto-sized steps, chooses instances based on the size of the inputs, and replaces 'auto' in the config with the actual choice."""
+        init_config: _InitConfig = self._config.processor_init_config
+        if not init_config.is_auto_sized:
+            return
+        instance_planner = self._instance_planner or InstancePlanner(
+            getattr(self._pipeline_session, 's3_client', None) or self._pipeline_session.boto_session.client('s3')
+        )
+        # Inputs read through a manifest are measured by the objects listed in it (Athena inputs are not measured).
+        s3_uris: list[str] = []
+        manifest_uris: list[str] = []
+        for input_config in self._config.processor_run_config.inputs.values():
+            if input_config.s3_uri is not None:
+                (manifest_uris if input_config.s3_data_type == 'ManifestFile' else s3_uris).append(input_config.s3_uri)
+        self.sizing_decision = instance_planner.plan(
+            s3_uris=s3_uris,
+            manifest_uris=manifest_uris,
+            sizing_policy=init_config.sizing_policy,
+            step_name=self._config.step_name,
+        )
+        # From here on (e.g. for fingerprinting step arguments), the config reflects the actual instances.
+        self._config = self._config.model_copy(update={
+            'processor_init_config': init_config.model_copy(update={
+                'instance_type': self.sizing_decision.instance_type,
+                'instance_count': self.sizing_decision.instance_count,
+            }),
+        })
+
+    @cached_property
+    def pipeline_parameters(self) -> dict[str, Parameter]:
+        """Pipeline parameters that config fields are promoted to, keyed by field (see `runtime_parameters` module). Only used for pipeline steps, i.e. direct runs use the config values."""
+        return create_pipeline_parameters(self._config)
 
     def get_processor(self, as_pipeline: bool) -> FrameworkProcessor:
+        from sagemaker.processing import FrameworkProcessor
+
+        self._resolve_auto_sizing()
         # Start with init args from config (have to convert to dict first so we can modify keys).
-        init_args: dict[str, Any] = self._config.processor_init_config.model_dump()
+        init_args: dict[str, Any] = self._config.processor_init_config.model_dump(exclude={'sizing_policy'})
         # Replace the string of estimator_cls_name with the actual estimator_cls
         estimator_cls_name = init_args.pop('estimator_cls_name')
-        init_args['estimator_cls'] = self.estimator_name_to_cls_mapping[estimator_cls_name]
+        init_args['estimator_cls'] = lookup(self.estimator_name_to_cls_mapping, estimator_cls_name)
+        if as_pipeline:
+            for field_name in ('instance_type', 'instance_count'):
+                if parameter := self.pipeline_parameters.get(f'processor_init_config.{field_name}'):
+                    init_args[field_name] = parameter
         session = self._pipeline_session if as_pipeline else self._sm_session
         return FrameworkProcessor(
             **init_args,
@@ -132,41 +302,59 @@ class StepFactory(StepFactoryInterface):
             sagemaker_session=session,
         )  # todo: Ensure that typechecker catches wrong args.
 
-    # todo: Make constructing (Processing)Input/Output reusable for other step implementations, and extend to other types of inputs (in particular, Athena dataset definition, as well as potentially S3  directly).  probably need to create a separate class and use composition.
-    def _construct_run_args(self) -> RunArgs:
+    # todo: Make constructing (Processing)Input/Output reusable for other step implementations, and extend to other types of inputs (e.g. Redshift dataset definitions).  probably need to create a separate class and use composition.
+    def _construct_run_args(self, as_pipeline: bool = False) -> RunArgs:
         """
-        Takes config and modifies it for creating run args.  At the moment, this only involves  constructing ProcessingInputs and ProcessingOutputs.
+        Takes config and modifies it for creating run args.  At the moment, this only involves  constructing ProcessingInputs and ProcessingOutputs. For pipeline steps (`as_pipeline`), inputs and outputs that are runtime parameters are replaced by their pipeline parameters.
 
         Note: Unfortunately we can't just pass through everything else from config except what we don't need - which would be more flexible. Unfortunately, this would require *deleting* items from the typed dict (input/output_files_s3_path), which is not possible unless we convert it to a normal (untyped) dictionary. But doing so is not a desirable  approach either, because it would cause the type checker to lose knowledge about which types *are* still in there and are thus passed through (so type checker wouldn't recognize these and would think they are missing).
         """
+        from sagemaker.processing import ProcessingInput, ProcessingOutput
 
-        # Create Processing*Inputs* from list of s3paths
-        _input_s3paths: dict[str, str] = self._config.processor_run_config.inputs
+        if self._config.fan_out is not None:
+            raise ValueError(
+                f'Step {self._config.step_name} fans out, so it has to be expanded into its shards first '
+                '(which the step factory façade does when creating all steps).'
+            )
+        # Create Processing*Inputs* from input configs
+        parameters: dict[str, Parameter] = self.pipeline_parameters if as_pipeline else {}
+        input_configs: dict[str, _InputConfig] = self._config.processor_run_config.inputs
         processing_inputs: list[ProcessingInput] = []
-        for input_name, input_s3path in _input_s3paths.items():
+        for input_name, input_config in input_configs.items():
             _input_destination = str(self._local_dir / input_name )
-            processing_input = ProcessingInput(
-                input_name=input_name,
-                source=input_s3path,
-                destination=_input_destination,
-                # todo: Allow passing through extra arguments
-            )
-            logger.info(
-                'Using input from s3: %s . Storing it in: %s.',
-                input_s3path, _input_destination
-            )
+            if input_config.athena_query is not None:
+                processing_input = self._construct_athena_input(input_name, input_config, _input_destination)
+                logger.info(
+                    f'Using result of Athena query on {input_config.athena_query.database} as input. '
+                    f'Storing it in: {_input_destination}.'
+                )
+            else:
+                processing_input = ProcessingInput(
+                    input_name=input_name,
+                    # If input is the output of an upstream step, reference that output instead.
+                    source=self._dependencies.input_sources.get(
+                        input_name,
+                        parameters.get(f'processor_run_config.inputs.{input_name}', input_config.s3_uri),
+                    ),
+                    destination=_input_destination,
+                    s3_data_distribution_type=input_config.s3_data_distribution_type,
+                    s3_input_mode=input_config.s3_input_mode,
+                    s3_compression_type=input_config.s3_compression_type,
+                    s3_data_type=input_config.s3_data_type,
+                )
+                logger.info(f'Using input from s3: {input_config.s3_uri} . Storing it in: {_input_destination}.')
             processing_inputs.append(processing_input)
 
         # Do the same for Processing*Outputs*
-        output_s3paths: dict[str, str] = self._config.processor_run_config.outputs
+        output_configs: dict[str, _OutputConfig] = self._config.processor_run_config.outputs
         _processing_outputs: list[ProcessingOutput] = [
             ProcessingOutput(
                 output_name=output_name,
                 source=str(self._local_dir / output_name),
-                destination=s3path,
-                # todo: Allow passing through extra arguments
+                destination=parameters.get(f'processor_run_config.outputs.{output_name}', output_config.s3_uri),
+                s3_upload_mode=output_config.s3_upload_mode,
             )
-            for output_name, s3path in output_s3paths.items()
+            for output_name, output_config in output_configs.items()
         ]
 
         return RunArgs(
@@ -175,18 +363,77 @@ class StepFactory(StepFactoryInterface):
             outputs=_processing_outputs,
             # The rest is passed through literally from configs.
             code=self._config.processor_run_config.code,
-            source_dir=self._config.processor_run_config.source_dir,
+            source_dir=self._source_dir,
         )
 
-    def create_step(self) -> ProcessingStep:
+    @staticmethod
+    def _construct_athena_input(input_name: str, input_config: _InputConfig, destination: str) -> ProcessingInput:
+        from sagemaker.processing import ProcessingInput
+        from sagemaker.dataset_definition.inputs import AthenaDatasetDefinition, DatasetDefinition
+
+        athena_query: _AthenaQueryConfig = input_config.athena_query  # type: ignore[assignment]
+        return ProcessingInput(
+            input_name=input_name,
+            dataset_definition=DatasetDefinition(
+                athena_dataset_definition=AthenaDatasetDefinition(**athena_query.model_dump()),
+                local_path=destination,
+                data_distribution_type=input_config.s3_data_distribution_type,
+                input_mode=input_config.s3_input_mode,
+            ),
+        )
+
+    @property
+    def _source_dir(self) -> str:
+        """Local source_dir from config, or the S3 URI of its shared code artifact (if using a code artifact store)."""
+        source_dir: str = self._config.processor_run_config.source_dir
+        if self._code_artifact_store is None:
+            return source_dir
+        return self._code_artifact_store.get_artifact_uri(source_dir)
+
+    def _create_step_args(self) -> _JobStepArguments:
         pipeline_processor = self.get_processor(as_pipeline=True)
-        _step_args = pipeline_processor.run(
-            **self._construct_run_args()
+        return pipeline_processor.run(  # type: ignore[return-value]
+            **self._construct_run_args(as_pipeline=True)
         )
-        return ProcessingStep(
+
+    def create_step(self) -> ProcessingStep:
+        from sagemaker.workflow.steps import ProcessingStep
+
+        self._resolve_auto_sizing()
+        cache_config = to_sagemaker_cache_config(get_cache_config(self._config))
+        if self._step_args_cache is None:
+            return ProcessingStep(
+                name=self._config.step_name,
+                step_args=self._create_step_args(),
+                depends_on=self._dependencies.depends_on or None,  # type: ignore[arg-type]
+                cache_config=cache_config,
+            )
+
+        from sm_pipelines_oo.steps.memoized_steps import MemoizedProcessingStep
+        return MemoizedProcessingStep(
             name=self._config.step_name,
-            step_args=_step_args, # type: ignore
+            step_args_cache=self._step_args_cache,
+            fingerprint=self._step_args_cache.fingerprint(
+                step_config=self._config,
+                role_arn=self._role_arn,
+                source_dir=self._config.processor_run_config.source_dir,
+                dependencies=self._dependencies,
+                share_code_artifacts=self._code_artifact_store is not None,
+            ),
+            create_step_args=self._create_step_args,
+            depends_on=self._dependencies.depends_on or None,
+            cache_config=cache_config,
+        )
+
+    def start_processing_job(self) -> str:
+        """Starts the processor's job directly (bypassing the pipeline) without waiting for it, and returns the job's name. See `job_launcher` module."""
+        direct_processor = self.get_processor(as_pipeline=False)
+        direct_processor.run(
+            **self._construct_run_args(),
+            wait=False,
+            logs=False,
         )
+        return direct_processor.latest_job.job_name
 
     def run_processor(self, wait=True) -> None:
         """Runs the processor directly, bypassing the pipeline."""
@@ -0,0 +1,128 @@
+"""
+Input-size-aware sizing of processing jobs.
+
+Instead of fixing `instance_type` and `instance_count` per environment (which either overprovisions small runs, or runs out of memory on large ones), a step can set both to 'auto'. The planner then measures the total size and number of objects under the step's input prefixes (at build time), and picks the first tier of a sizing policy that fits the input.
+For inputs read through a manifest file (e.g. the shards of fanned-out steps), the objects listed in the manifest are measured, rather than the manifest itself.
+"""
+# Required to not make boto3-stubs a runtime dependency: https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import json
+
+from loguru import logger
+from pydantic_settings import BaseSettings
+
+if TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+
+
+# Sizing policy
+# =============
+
+class SizingTier(BaseSettings):
+    """Instances to use for inputs up to the given size. Bounds that are not set are unlimited."""
+    max_input_bytes: int | None = None
+    max_object_count: int | None = None
+    instance_type: str
+    instance_count: int = 1
+
+
+_GiB = 1024 ** 3
+
+# Tiers are tried in order, so sort them from smallest to largest.
+DEFAULT_SIZING_POLICY: list[SizingTier] = [
+    SizingTier(max_input_bytes=1 * _GiB, instance_type='ml.m5.large'),
+    SizingTier(max_input_bytes=10 * _GiB, instance_type='ml.m5.xlarge'),
+    SizingTier(max_input_bytes=50 * _GiB, instance_type='ml.m5.4xlarge'),
+    SizingTier(max_input_bytes=200 * _GiB, instance_type='ml.m5.4xlarge', instance_count=4),
+    SizingTier(instance_type='ml.m5.4xlarge', instance_count=8),
+]
+
+
+# Planner
+# =======
+
+@dataclass(frozen=True)
+class InputStats:
+    total_bytes: int = 0
+    object_count: int = 0
+
+    def __add__(self, other: InputStats) -> InputStats:
+        return InputStats(self.total_bytes + other.total_bytes, self.object_count + other.object_count)
+
+
+@dataclass(frozen=True)
+class SizingDecision:
+    instance_type: str
+    instance_count: int
+    input_stats: InputStats
+    # Index of the chosen tier in the sizing policy
+    tier: int
+
+
+class InstancePlanner:
+    def __init__(
+        self,
+        s3_client: S3Client,
+        max_workers: int = 8,  # Number of input prefixes to list concurrently
+    ):
+        self._s3_client = s3_client
+        self._max_workers = max_workers
+
+    def _measure_prefix(self, s3_uri: str) -> InputStats:
+        bucket, _, prefix = s3_uri.removeprefix('s3://').partition('/')
+        stats = InputStats()
+        paginator = self._s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            objects = page.get('Contents', [])
+            stats += InputStats(sum(obj['Size'] for obj in objects), len(objects))
+        return stats
+
+    def _measure_manifest(self, manifest_uri: str) -> InputStats:
+        """Returns total size and number of the objects listed in a manifest file (in the format used by SageMaker: the common prefix, followed by keys relative to it)."""
+        manifest_bucket, _, manifest_key = manifest_uri.removeprefix('s3://').partition('/')
+        prefix_entry, *relative_keys = json.loads(
+            self._s3_client.get_object(Bucket=manifest_bucket, Key=manifest_key)['Body'].read()
+        )
+        bucket, _, prefix = prefix_entry['prefix'].removeprefix('s3://').partition('/')
+        listed_keys: set[str] = {prefix + relative_key for relative_key in relative_keys}
+        # Listing the common prefix takes far fewer requests than getting the size of each listed object separately.
+        stats = InputStats()
+        paginator = self._s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            objects = [obj for obj in page.get('Contents', []) if obj['Key'] in listed_keys]
+            stats += InputStats(sum(obj['Size'] for obj in objects), len(objects))
+        return stats
+
+    def measure(self, s3_uris: list[str], manifest_uris: list[str] | None = None) -> InputStats:
+        """Returns total size and number of objects under all given S3 prefixes and listed in all given manifest files. Prefixes and manifests are measured concurrently."""
+        measurements = [(self._measure_prefix, s3_uri) for s3_uri in s3_uris] \
+            + [(self._measure_manifest, manifest_uri) for manifest_uri in manifest_uris or []]
+        with ThreadPoolExecutor(max_workers=max(1, min(self._max_workers, len(measurements)))) as executor:
+            return sum(executor.map(lambda measurement: measurement[0](measurement[1]), measurements), InputStats())
+
+    def plan(
+        self,
+        s3_uris: list[str],
+        sizing_policy: list[SizingTier] = DEFAULT_SIZING_POLICY,
+        step_name: str = '',  # Only used for logging
+        # Inputs that are read through manifest files
+        manifest_uris: list[str] | None = None,
+    ) -> SizingDecision:
+        input_stats = self.measure(s3_uris, manifest_uris)
+        for i, tier in enumerate(sizing_policy):
+            if (tier.max_input_bytes is None or input_stats.total_bytes <= tier.max_input_bytes) \
+                    and (tier.max_object_count is None or input_stats.object_count <= tier.max_object_count):
+                decision = SizingDecision(tier.instance_type, tier.instance_count, input_stats, tier=i)
+                logger.info(
+                    f'Sizing step {step_name}: {input_stats.total_bytes / _GiB:.2f} GiB in '
+                    f'{input_stats.object_count} objects -> {decision.instance_count} x '
+                    f'{decision.instance_type} (tier {i}).'
+                )
+                return decision
+        raise ValueError(
+            f'No tier of the sizing policy fits input of step {step_name} ({input_stats}). '
+            'Make sure the last tier has no upper bounds.'
+        )
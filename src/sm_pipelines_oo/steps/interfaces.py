@@ -1,36 +1,45 @@
+# Required to not make the SageMaker SDK a runtime dependency of this module (importing it is slow): https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, Any, TypeAlias
+from typing import TYPE_CHECKING, Any, Mapping, TypeAlias
 
-from sagemaker.processing import Processor, FrameworkProcessor
-from sagemaker.base_predictor import Predictor
-from sagemaker.workflow.steps import ConfigurableRetryStep, ProcessingStep
-
-from sm_pipelines_oo.shared_config_schema import SharedConfig
-
-from sagemaker.session import Session, get_execution_role
-from sagemaker.local.local_session import LocalSession
-from sagemaker.workflow.pipeline_context import PipelineSession, LocalPipelineSession
+if TYPE_CHECKING:
+    from pydantic_settings import BaseSettings
+    from sagemaker.workflow.steps import ConfigurableRetryStep
+    from sagemaker.session import Session
+    from sagemaker.local.local_session import LocalSession
+    from sagemaker.workflow.pipeline_context import PipelineSession, LocalPipelineSession
 
 
 class StepFactoryFacadeInterface(ABC):
     """
-    This interface decouples the pipeline façade from the specific step factory first use. The pipeline façade only cares about this one method.
+    This interface decouples the pipeline façade from the specific step factory first use. The pipeline façade only cares about these methods.
     """
     @abstractmethod
     def create_all_steps(self) -> list[ConfigurableRetryStep]:
         ...
 
+    @abstractmethod
+    def create_step(self, step_config_dict: dict[str, Any] | BaseSettings) -> ConfigurableRetryStep:
+        """Creates a single step, e.g. to rebuild it after its config has changed."""
+        ...
+
 
 class StepFactoryInterface(ABC):
     """
     In addition to the required methods defined below, it is recommended to implement the following attributes and methods in order to make implementation of the required methods easiest:
     - _config_model: ClassVar[type[BaseSettings]] (Class used to convert config_dict to pydantic model to validate types and potentially compute derived attributes.
+
+    Factories should also accept an instance of their `_config_model` instead of a dictionary. This is how already validated configs (e.g., from a precompiled config bundle) are passed in, in which case they should not be validated again.
+
+    Depending on how the step factory façade is configured, it may pass additional keyword arguments (`step_args_cache`, `code_artifact_store`) to factories. Each of these is only passed if it is actually used, so factories that don't support a feature keep working as long as it is not used.
+    Dependencies on upstream steps (`dependencies`, see `dag` module) are inferred by default, so they are only passed to factories whose `__init__` accepts them. Other factories keep working, but their steps don't depend on upstream steps.
     """
 
     @abstractmethod
     def __init__(
         self,
-        step_config_dict: dict[str, Any],
+        step_config_dict: dict[str, Any] | BaseSettings,
         role_arn: str,
         pipeline_session: PipelineSession | LocalPipelineSession,
         sm_session: Session | LocalSession | None = None,
@@ -43,5 +52,5 @@ class StepFactoryInterface(ABC):
         ...
 
 
-# Type alias for lookup table
-StepFactoryLookupTable: TypeAlias = dict[str, type[StepFactoryInterface]]
+# Type alias for lookup table. (Besides plain dictionaries, this includes the lazily importing registry of step factories.)
+StepFactoryLookupTable: TypeAlias = Mapping[str, type[StepFactoryInterface]]
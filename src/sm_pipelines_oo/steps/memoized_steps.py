@@ -0,0 +1,67 @@
+"""
+Processing and training steps whose arguments are memoized in a StepArgsCache.
+
+Note: This module imports the SageMaker SDK, so only import it once a step is actually created.
+"""
+from typing import Any, Callable, ClassVar
+import copy
+
+import sagemaker.workflow.utilities
+from sagemaker.session import Session
+from sagemaker.workflow.pipeline_context import _JobStepArguments
+from sagemaker.workflow.steps import ProcessingStep, TrainingStep
+from loguru import logger
+
+from sm_pipelines_oo.steps.step_args_cache import StepArgsCache
+
+
+class _MemoizedStepMixin:
+    """
+    On a cache hit, the step is created from the cached arguments, without calling `create_step_args` – so the processor (or estimator) is never run and no code is uploaded.
+    On a cache miss, the step behaves like a regular step, but stores its arguments once they are compiled as part of the pipeline definition.
+    """
+    # Name of the session method whose arguments the step insists on (e.g. `Session.process` for processing steps)
+    _caller_name: ClassVar[str]
+
+    def __init__(
+        self,
+        name: str,
+        step_args_cache: StepArgsCache,
+        fingerprint: str,
+        # Typically a call to processor.run() (or estimator.fit()) under a pipeline session. Only called on a cache miss.
+        create_step_args: Callable[[], _JobStepArguments],
+        **kwargs: Any,
+    ):
+        self._step_args_cache = step_args_cache
+        self._fingerprint = fingerprint
+        self._cached_arguments: dict[str, Any] | None = step_args_cache.get(fingerprint)
+        if self._cached_arguments is None:
+            step_args = create_step_args()
+        else:
+            logger.debug(f'Using cached arguments for step {name}.')
+            # Steps insist on step args obtained from processor.run() or estimator.fit(), so mimic these.
+            step_args = _JobStepArguments(self._caller_name, self._cached_arguments)
+        super().__init__(name=name, step_args=step_args, **kwargs)  # type: ignore[call-arg]
+
+    @property
+    def is_cache_hit(self) -> bool:
+        return self._cached_arguments is not None
+
+    @property
+    def arguments(self) -> dict[str, Any]:
+        if self._cached_arguments is not None:
+            # Copy, since the SDK may modify the returned arguments when compiling the definition.
+            return copy.deepcopy(self._cached_arguments)
+        request_dict: dict[str, Any] = super().arguments  # type: ignore[misc]
+        # Only arguments compiled as part of a pipeline definition are stable: Only then is code uploaded to a location that is derived from its content (rather than, e.g., from a timestamp).
+        if sagemaker.workflow.utilities._pipeline_config is not None:
+            self._step_args_cache.put(self._fingerprint, request_dict)
+        return request_dict
+
+
+class MemoizedProcessingStep(_MemoizedStepMixin, ProcessingStep):
+    _caller_name = Session.process.__name__
+
+
+class MemoizedTrainingStep(_MemoizedStepMixin, TrainingStep):
+    _caller_name = Session.train.__name__
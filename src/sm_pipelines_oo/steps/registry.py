@@ -0,0 +1,137 @@
+"""
+Registries of step factories and estimator classes, which configs refer to by name.
+
+Besides the built-in entries, other packages can contribute entries through package entry points, without users having to pass in a custom lookup table. For example, in the plugin's `pyproject.toml`:
+
+    [project.entry-points."sm_pipelines_oo.step_factories"]
+    MyProcessor = "my_package.steps:MyStepFactory"
+
+    [project.entry-points."sm_pipelines_oo.estimators"]
+    MyEstimator = "my_package.estimators:MyEstimator"
+
+Entries are only imported once a config actually uses them, so a pipeline does not pay the import cost of every supported framework (or plugin).
+"""
+from typing import Generic, Iterator, Mapping, TypeVar
+from importlib.metadata import EntryPoint, entry_points
+import importlib
+import threading
+
+from loguru import logger
+
+from sm_pipelines_oo.steps.interfaces import StepFactoryInterface
+
+
+T = TypeVar('T')
+
+
+def import_object(target: str) -> object:
+    """Imports an object given as 'module:attribute'."""
+    module_name, _, attribute_path = target.partition(':')
+    obj: object = importlib.import_module(module_name)
+    for attribute in attribute_path.split('.'):
+        obj = getattr(obj, attribute)
+    return obj
+
+
+def lookup(mapping: Mapping[str, object], name: str) -> object:
+    """Looks up an entry of a registry. Also supports plain mappings (e.g. a lookup table that users assign instead of a registry), whose values may be import paths of the form 'module:attribute'."""
+    target = mapping[name]
+    return import_object(target) if isinstance(target, str) else target
+
+
+class LazyRegistry(Mapping[str, T], Generic[T]):
+    """
+    Read-only mapping from names to classes, whose values are imported on first access.
+
+    Entries are looked up in the following order (i.e., later sources take precedence):
+    1. built-in entries,
+    2. entry points of installed packages (discovered on first access),
+    3. entries registered at runtime using `register()`.
+    """
+    def __init__(
+        self,
+        entry_point_group: str,
+        builtins: dict[str, str | T],  # Values are either the object itself, or an import path of the form 'module:attribute'
+    ):
+        self._entry_point_group = entry_point_group
+        self._targets: dict[str, str | EntryPoint | T] = dict(builtins)
+        self._registered: dict[str, str | T] = {}
+        self._resolved: dict[str, T] = {}
+        self._discovered = False
+        # Steps may be created concurrently, so make sure entries are discovered (and imported) only once.
+        self._lock = threading.RLock()
+
+    def register(self, name: str, target: str | T) -> None:
+        """Adds (or replaces) an entry at runtime."""
+        with self._lock:
+            self._registered[name] = target
+            self._resolved.pop(name, None)
+
+    def _discover_entry_points(self) -> None:
+        with self._lock:
+            if self._discovered:
+                return
+            for entry_point in entry_points(group=self._entry_point_group):
+                if entry_point.name in self._targets:
+                    logger.warning(
+                        f'Entry point {entry_point.value} overrides {entry_point.name} in {self._entry_point_group}.'
+                    )
+                self._targets[entry_point.name] = entry_point
+            self._discovered = True
+
+    def _all_targets(self) -> dict[str, str | EntryPoint | T]:
+        self._discover_entry_points()
+        return {**self._targets, **self._registered}
+
+    def __getitem__(self, name: str) -> T:
+        with self._lock:
+            if name in self._resolved:
+                return self._resolved[name]
+            targets = self._all_targets()
+            if name not in targets:
+                raise KeyError(
+                    f'{name} not found in {self._entry_point_group}. Available: {", ".join(sorted(targets))}'
+                )
+            target = targets[name]
+            if isinstance(target, EntryPoint):
+                resolved = target.load()
+            elif isinstance(target, str):
+                resolved = import_object(target)
+            else:
+                resolved = target
+            self._resolved[name] = resolved  # type: ignore[assignment]
+            return resolved  # type: ignore[return-value]
+
+    def __contains__(self, name: object) -> bool:
+        # Unlike the default implementation of Mapping, don't import the entry just to check whether it exists.
+        return name in self._all_targets()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._all_targets())
+
+    def __len__(self) -> int:
+        return len(self._all_targets())
+
+
+# Registries used by default
+# ==========================
+
+step_factory_registry: LazyRegistry[type[StepFactoryInterface]] = LazyRegistry(
+    entry_point_group='sm_pipelines_oo.step_factories',
+    builtins={
+        'FrameworkProcessor': 'sm_pipelines_oo.steps.framework_processing_step:StepFactory',
+        'FrameworkEstimator': 'sm_pipelines_oo.steps.training_step:TrainingStepFactory',
+    },
+)
+
+estimator_registry: LazyRegistry[type] = LazyRegistry(
+    entry_point_group='sm_pipelines_oo.estimators',
+    builtins={
+        'SKLearn': 'sagemaker.sklearn.estimator:SKLearn',
+        'PyTorch': 'sagemaker.pytorch.estimator:PyTorch',
+        'TensorFlow': 'sagemaker.tensorflow.estimator:TensorFlow',
+        'XGBoost': 'sagemaker.xgboost.estimator:XGBoost',
+        'HuggingFace': 'sagemaker.huggingface.estimator:HuggingFace',
+        'MXNet': 'sagemaker.mxnet.estimator:MXNet',
+    },
+)
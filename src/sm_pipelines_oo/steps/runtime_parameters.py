@@ -0,0 +1,112 @@
+"""
+Runtime parameters: Config values that are promoted to pipeline parameters, so that they can be overridden when starting an execution, rather than by regenerating (and redeploying) the pipeline definition.
+
+In a step config, `runtime_parameters` maps config fields to parameter names, e.g.:
+
+    runtime_parameters:
+      processor_init_config.instance_type: InstanceType
+      processor_init_config.instance_count: InstanceCount
+      processor_run_config.inputs.raw: RawDataUri      # S3 URI of input 'raw'
+      processor_run_config.outputs.features: FeaturesUri
+
+The config values serve as the parameters' defaults. Several steps can share a parameter (e.g. a date prefix), as long as they agree on its default.
+Note: An input that reads the output of an upstream step references that output (see `dag` module), so it can't be a runtime parameter. Parameterize the upstream step's output instead.
+"""
+# Required to only import heavy SageMaker SDK modules for type checking, or when they are actually needed: https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Iterable
+import re
+
+from pydantic_settings import BaseSettings
+
+if TYPE_CHECKING:
+    from sagemaker.workflow.parameters import Parameter
+
+
+# Field paths that can be promoted, and the parameter type of each. ('<name>' matches the name of an input or output.)
+PARAMETERIZABLE_FIELDS: dict[str, type] = {
+    'processor_init_config.instance_type': str,
+    'processor_init_config.instance_count': int,
+    'processor_run_config.inputs.<name>': str,
+    'processor_run_config.outputs.<name>': str,
+}
+
+_PARAMETER_NAME_PATTERN = re.compile(r'^[A-Za-z0-9\-_]{1,256}$')
+
+
+def _match_field(path: str) -> type | None:
+    """Returns the parameter type of a field path, or None if the field cannot be promoted."""
+    for field_pattern, parameter_type in PARAMETERIZABLE_FIELDS.items():
+        regex = re.escape(field_pattern).replace(re.escape('<name>'), r'[^.]+')
+        if re.fullmatch(regex, path):
+            return parameter_type
+    return None
+
+
+def _get_config_value(step_config: dict[str, Any], path: str) -> Any:
+    """Returns the value of a field path in a (raw or dumped) step config. For inputs and outputs, this is their S3 URI."""
+    value: Any = step_config
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            raise ValueError(f'Runtime parameter refers to missing config field {path}.')
+        value = value[key]
+    # Inputs and outputs may be given in their long form.
+    if isinstance(value, dict):
+        value = value.get('s3_uri')
+    if value is None:
+        raise ValueError(f'Runtime parameter {path} must refer to an S3 input or output.')
+    return value
+
+
+def validate_runtime_parameters(step_config: dict[str, Any]) -> None:
+    """Raises a ValueError if any runtime parameter of a (dumped) step config refers to a field that cannot be promoted."""
+    for path, parameter_name in step_config.get('runtime_parameters', {}).items():
+        parameter_type = _match_field(path)
+        if parameter_type is None:
+            raise ValueError(
+                f'Config field {path} cannot be a runtime parameter. Supported fields: {", ".join(PARAMETERIZABLE_FIELDS)}.'
+            )
+        if not _PARAMETER_NAME_PATTERN.match(parameter_name):
+            raise ValueError(f'Invalid parameter name: {parameter_name}.')
+        value = _get_config_value(step_config, path)
+        if value == 'auto':
+            raise ValueError(f'Auto-sized field {path} cannot be a runtime parameter.')
+        if not isinstance(value, parameter_type):
+            raise ValueError(f'Runtime parameter {path} must be of type {parameter_type.__name__}.')
+
+
+def create_pipeline_parameters(step_config: dict[str, Any] | BaseSettings) -> dict[str, Parameter]:
+    """Returns a pipeline parameter for every runtime parameter of a step config, keyed by field path."""
+    from sagemaker.workflow.parameters import ParameterInteger, ParameterString
+
+    config_dict: dict[str, Any] = (
+        step_config if isinstance(step_config, dict) else step_config.model_dump(exclude={'shared_config'})
+    )
+    parameters: dict[str, Parameter] = {}
+    for path, parameter_name in config_dict.get('runtime_parameters', {}).items():
+        default_value = _get_config_value(config_dict, path)
+        parameters[path] = (
+            ParameterInteger(parameter_name, default_value=default_value) if _match_field(path) is int
+            else ParameterString(parameter_name, default_value=default_value)
+        )
+    return parameters
+
+
+def merge_pipeline_parameters(
+    parameters: dict[str, Parameter],  # Parameter name -> parameter. Updated in place.
+    new_parameters: Iterable[Parameter],
+) -> None:
+    """Adds parameters (e.g. of another step), raising a ValueError if a parameter of the same name differs."""
+    for parameter in new_parameters:
+        existing_parameter = parameters.setdefault(parameter.name, parameter)
+        if (existing_parameter.parameter_type, existing_parameter.default_value) \
+                != (parameter.parameter_type, parameter.default_value):
+            raise ValueError(
+                f'Steps disagree on the type or default of runtime parameter {parameter.name}: '
+                f'{existing_parameter.default_value!r} vs. {parameter.default_value!r}.'
+            )
+
+
+def format_parameter_overrides(overrides: dict[str, str | int | float]) -> list[dict[str, str]]:
+    """Converts parameter overrides into the format of `start_pipeline_execution`, which expects all values as strings."""
+    return [{'Name': name, 'Value': str(value)} for name, value in overrides.items()]
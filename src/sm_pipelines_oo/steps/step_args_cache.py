@@ -0,0 +1,117 @@
+"""
+Persistent cache for the arguments of pipeline steps.
+
+Compiling a step's arguments (i.e., the request that SageMaker uses to create the job) requires packaging and uploading the step's code. If neither the step's config nor its code changed since the last build, this work is wasted. Therefore, we store the compiled arguments of each step under a fingerprint of everything they depend on, and reuse them on later builds.
+
+The fingerprint covers:
+- the validated step config (including the shared config it contains),
+- the role ARN,
+- the contents of all files in the step's `source_dir`,
+- the step's dependencies on upstream steps (since inputs that read upstream outputs are replaced by references to these outputs), and whether code artifacts are shared (since this changes where code is uploaded to),
+- the version of the SageMaker SDK (which determines what the arguments look like).
+
+Note: Cached arguments reference code that was uploaded to S3 during an earlier build. If you delete these objects, also clear the cache.
+"""
+# Required to not make the SageMaker SDK a runtime dependency of this module (importing it is slow): https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any
+from pathlib import Path
+import hashlib
+import importlib.metadata
+import json
+import os
+import tempfile
+
+from loguru import logger
+from pydantic_settings import BaseSettings
+
+if TYPE_CHECKING:
+    from sm_pipelines_oo.steps.dag import StepDependencies
+
+
+def hash_folder_contents(folder: Path) -> str:
+    """Returns a hash over the relative path and *content* of all files in a folder."""
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(folder):
+        # Sort in place, so os.walk() traverses subfolders in a deterministic order.
+        dirnames.sort()
+        for filename in sorted(filenames):
+            file_path = Path(dirpath) / filename
+            digest.update(f'{file_path.relative_to(folder)}\n'.encode())
+            digest.update(hashlib.sha256(file_path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+class StepArgsCache:
+    """Stores compiled step arguments as JSON files in `cache_dir`, one file per fingerprint."""
+    # Bump this whenever the layout of cache entries or the content of fingerprints changes.
+    _cache_version: str = '2'
+
+    def __init__(self, cache_dir: str | Path = '.sm_pipelines_oo_cache/step_args'):
+        self._cache_dir = Path(cache_dir)
+
+    def fingerprint(
+        self,
+        step_config: BaseSettings,
+        role_arn: str,
+        source_dir: str | None = None,
+        dependencies: StepDependencies | None = None,
+        share_code_artifacts: bool = False,
+    ) -> str:
+        digest = hashlib.sha256()
+        digest.update(f'{self._cache_version}\n{importlib.metadata.version("sagemaker")}\n'.encode())
+        digest.update(f'{type(step_config).__qualname__}\n{role_arn}\n'.encode())
+        digest.update(
+            json.dumps(step_config.model_dump(mode='json'), sort_keys=True).encode()
+        )
+        # source_dir may also be an S3 URI, in which case its content is not ours to hash (and is assumed to be immutable).
+        if source_dir is not None and Path(source_dir).is_dir():
+            digest.update(hash_folder_contents(Path(source_dir)).encode())
+        digest.update(json.dumps({
+            'share_code_artifacts': share_code_artifacts,
+            **self._describe_dependencies(dependencies),
+        }, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _describe_dependencies(dependencies: StepDependencies | None) -> dict[str, Any]:
+        """Describes dependencies by the upstream outputs that inputs reference, and the names of upstream steps (which is how they appear in the pipeline definition)."""
+        if dependencies is None:
+            return {'input_sources': {}, 'depends_on': []}
+        return {
+            'input_sources': {
+                input_name: reference.expr for input_name, reference in dependencies.input_sources.items()
+            },
+            'depends_on': sorted(step.name for step in dependencies.depends_on),
+        }
+
+    def _cache_file(self, fingerprint: str) -> Path:
+        return self._cache_dir / f'{fingerprint}.json'
+
+    def get(self, fingerprint: str) -> dict[str, Any] | None:
+        """Returns cached step arguments, or None if there are none for this fingerprint."""
+        try:
+            return json.loads(self._cache_file(fingerprint).read_bytes())
+        except FileNotFoundError:
+            return None
+
+    def put(self, fingerprint: str, step_arguments: dict[str, Any]) -> bool:
+        """
+        Stores step arguments. Returns whether they could be stored.
+        Arguments that contain pipeline variables (e.g. properties of other steps) can't be serialized to JSON without losing the dependencies between steps, so they are not cached.
+        """
+        try:
+            content = json.dumps(step_arguments)
+        except TypeError:
+            logger.debug('Not caching step arguments, because they contain pipeline variables.')
+            return False
+        # Write to temporary file first and then rename it, so concurrent builds never read partially written entries.
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(mode='w', dir=self._cache_dir, delete=False) as tmp_file:
+            tmp_file.write(content)
+        os.replace(tmp_file.name, self._cache_file(fingerprint))
+        return True
+
+    def clear(self) -> None:
+        for cache_file in self._cache_dir.glob('*.json'):
+            cache_file.unlink()
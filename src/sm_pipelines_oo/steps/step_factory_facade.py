@@ -1,20 +1,105 @@
-from typing import Any, ClassVar
+# Required to not make the SageMaker SDK a runtime dependency of this module (importing it is slow): https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, ClassVar, Iterable, Iterator
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache, cached_property
+from itertools import islice
+import inspect
 
 from loguru import logger
-
-from sagemaker.workflow.pipeline_context import PipelineSession, LocalPipelineSession
-from sagemaker.workflow.steps import ConfigurableRetryStep
+from pydantic import TypeAdapter
 
 from sm_pipelines_oo.steps.interfaces import StepFactoryInterface, StepFactoryFacadeInterface
-from sm_pipelines_oo.steps import framework_processing_step
+from sm_pipelines_oo.steps.registry import step_factory_registry
+from sm_pipelines_oo.steps.dag import StepDag, StepDependencies, check_unique_step_names, get_s3_uris, output_reference
 from sm_pipelines_oo.steps.interfaces import StepFactoryLookupTable
+from sm_pipelines_oo.steps.runtime_parameters import merge_pipeline_parameters
+from sm_pipelines_oo.steps.fan_out import expand_fan_out
+
+if TYPE_CHECKING:
+    from pydantic_settings import BaseSettings
+    from sagemaker.session import Session
+    from sagemaker.local.local_session import LocalSession
+    from sagemaker.workflow.pipeline_context import PipelineSession, LocalPipelineSession
+    from sagemaker.workflow.steps import ConfigurableRetryStep
+    from sagemaker.workflow.parameters import Parameter
+    from mypy_boto3_s3.client import S3Client
+    from sm_pipelines_oo.shared_config_schema import SharedConfig
+    from sm_pipelines_oo.steps.step_args_cache import StepArgsCache
+    from sm_pipelines_oo.steps.code_artifact_store import CodeArtifactStore
+
+
+@cache
+def _list_type_adapter(config_model: type[BaseSettings]) -> TypeAdapter:
+    """Returns (cached) TypeAdapter for validating a whole list of step configs in a single call."""
+    return TypeAdapter(list[config_model])  # type: ignore[valid-type]
+
+
+@cache
+def _accepts_kwarg(step_factory_cls: type[StepFactoryInterface], name: str) -> bool:
+    """Whether a step factory's __init__ accepts a keyword argument (either explicitly or through **kwargs)."""
+    parameters = inspect.signature(step_factory_cls.__init__).parameters
+    return name in parameters or any(
+        parameter.kind is inspect.Parameter.VAR_KEYWORD for parameter in parameters.values()
+    )
+
+
+def _inject_shared_config(step_config_dict: dict[str, Any], shared_config: SharedConfig | None) -> dict[str, Any]:
+    if shared_config is None:
+        return step_config_dict
+    # Note: Pydantic does not revalidate model instances passed in as field values.
+    return {**step_config_dict, 'shared_config': shared_config}
+
+
+def validate_step_configs(
+    step_configs: list[dict[str, Any] | BaseSettings],
+    stepfactory_lookup_table: StepFactoryLookupTable,
+    # Already validated shared config. If provided, it replaces the raw shared config in each step config, so it is not validated again for every step.
+    shared_config: SharedConfig | None = None,
+) -> list[dict[str, Any] | BaseSettings]:
+    """
+    Validates the given step configs in batches: one batch per config model, each validated by a single call of a pydantic TypeAdapter (rather than instantiating each model separately). Order of configs is preserved.
+    Unlike building steps, this needs neither an AWS session nor a role (e.g. for running steps locally, see `local_executor` module).
+
+    Configs that are already validated are passed through, as are configs whose step factory does not declare a `_config_model` (these are validated by the factory itself).
+    Note: Like nested models, batch-validated configs are validated against their schema only, i.e. without applying overrides from environment variables.
+    """
+    validated_configs: list[dict[str, Any] | BaseSettings] = list(step_configs)
+    # Indices of configs to validate, grouped by config model
+    batches: dict[type[BaseSettings], list[int]] = {}
+    for i, config in enumerate(validated_configs):
+        if not isinstance(config, dict):
+            continue
+        config_model = getattr(stepfactory_lookup_table[config['step_factory_class']], '_config_model', None)
+        if config_model is None:
+            validated_configs[i] = _inject_shared_config(config, shared_config)
+        else:
+            batches.setdefault(config_model, []).append(i)
+
+    for config_model, indices in batches.items():
+        models: list[BaseSettings] = _list_type_adapter(config_model).validate_python(
+            [_inject_shared_config(validated_configs[i], shared_config) for i in indices]  # type: ignore[arg-type]
+        )
+        for i, model in zip(indices, models):
+            validated_configs[i] = model
+    return validated_configs
+
+
+class StepCreationError(Exception):
+    """Raised if creating one or more steps failed. `errors` maps names of failed steps to their exception."""
+    def __init__(self, errors: dict[str, Exception]):
+        self.errors = errors
+        details = '\n'.join(f'- {step_name}: {error!r}' for step_name, error in errors.items())
+        super().__init__(f'Failed to create {len(errors)} step(s):\n{details}')
+
 
 class StepFactoryFacade(StepFactoryFacadeInterface):
     """
     Relationship between façade and concrete factories: A pipeline will generally have a *single* instance of  this façade, which in turn will create an instance of a concrete factory for every step.
 
     This class serves as a façade for creating steps that abstracts the following tasks from the user:
-    - It receives the configs for all steps as a list of dictionaries.
+    - It receives the configs for all steps as a list of dictionaries (or of already validated config models).
     - For each step config, it:
       - Looks up which factory it should use for creating that kind of step. To be able to do so, it has a lookup table that maps step names to factory classes. (This lookup table can be provided during instantiation of this class, but there is also a default lookup table for standard use cases.)
       - Creates an instance of that specific step factory.
@@ -22,52 +107,345 @@ class StepFactoryFacade(StepFactoryFacadeInterface):
     - Finally, it will return the resulting list containing all steps.
     """
 
-    _default_stepfactory_lookup_table: ClassVar[StepFactoryLookupTable] = {
-        'FrameworkProcessor': framework_processing_step.StepFactory,
-    }
+    # Whether `validated_step_configs` holds the configs of all steps (see `StreamingStepFactoryFacade`)
+    _keeps_step_configs: ClassVar[bool] = True
+
+    # Step factories are imported only once a config uses them. To add a step factory, register it with the registry (or through a package entry point, see `registry` module) rather than replacing the whole lookup table.
+    _default_stepfactory_lookup_table: ClassVar[StepFactoryLookupTable] = step_factory_registry
 
     def __init__(
         self,
-        step_config_dicts: list[dict[str, Any]],
+        step_config_dicts: list[dict[str, Any]] | list[BaseSettings],
         role_arn: str,
         pipeline_session: PipelineSession | LocalPipelineSession,
         # Generally, user does not set this, but it's useful for testing and custom use cases.
         custom_stepfactory_lookup_table: StepFactoryLookupTable | None = None,
+        # Already validated shared config. If provided, it replaces the raw shared config in each step config, so it is not validated again for every step.
+        shared_config: SharedConfig | None = None,
+        # Number of threads for creating steps concurrently, which helps if step factories do I/O-bound work while creating steps (such as uploading shared code artifacts, see `code_artifact_store` module). Default of 1 creates steps sequentially.
+        max_workers: int = 1,
+        # Optionally, reuse step arguments from earlier builds for steps whose config and code didn't change. Only passed to step factories if set, since custom step factories may not support it.
+        step_args_cache: StepArgsCache | None = None,
+        # Optionally, upload code shared by several steps only once. Same as above, only passed to step factories if set.
+        code_artifact_store: CodeArtifactStore | None = None,
+        # Infer dependencies between steps by matching their inputs against other steps' outputs (see `dag` module).
+        infer_dependencies: bool = True,
     ):
         self._step_config_dicts = step_config_dicts
         self._role_arn = role_arn
         self._pipeline_session = pipeline_session
         self._custom_stepfactory_lookup_table = custom_stepfactory_lookup_table
+        self._shared_config = shared_config
+        self._max_workers = max_workers
+        self._step_args_cache = step_args_cache
+        self._code_artifact_store = code_artifact_store
+        self._infer_dependencies = infer_dependencies
+        # Set when creating all steps, so that steps can be rebuilt individually later on, with their dependencies.
+        self._dag: StepDag | None = None
+        self._steps_by_name: dict[str, ConfigurableRetryStep] = {}
+        # Set when creating all steps, e.g. for reporting on them
+        self.validated_step_configs: list[dict[str, Any] | BaseSettings] = []
+        # Step name -> pipeline parameters used by the step (see `runtime_parameters` module)
+        self._step_parameters: dict[str, list[Parameter]] = {}
+        # Names of steps that were replaced by their shards (see `fan_out` module)
+        self._fanned_out_step_names: set[str] = set()
 
-    def _lookup_step_factory_cls(self, step_config_dict: dict[str, Any]) -> type[StepFactoryInterface]:
-        """Get the right *class* of step factory for a given step (based on its config)."""
-        # Get *name* of class name from config
-        stepfactory_cls_name: str = step_config_dict['step_factory_class']
+    def _inject_shared_config(self, step_config_dict: dict[str, Any]) -> dict[str, Any]:
+        return _inject_shared_config(step_config_dict, self._shared_config)
+
+    def _validate_step_configs(
+        self,
+        step_configs: list[dict[str, Any] | BaseSettings],
+    ) -> list[dict[str, Any] | BaseSettings]:
+        return validate_step_configs(step_configs, self._stepfactory_lookup_table, self._shared_config)
+
+    @property
+    def _stepfactory_lookup_table(self) -> StepFactoryLookupTable:
         # Check if user provided a custom lookup table. If not, use the default.
-        stepfactory_lookup_table: StepFactoryLookupTable = (
-            self._default_stepfactory_lookup_table if self._custom_stepfactory_lookup_table is None
+        return self._default_stepfactory_lookup_table if self._custom_stepfactory_lookup_table is None \
             else self._custom_stepfactory_lookup_table
+
+    def _lookup_step_factory_cls(
+        self,
+        step_config_dict: dict[str, Any] | BaseSettings,
+    ) -> type[StepFactoryInterface]:
+        """Get the right *class* of step factory for a given step (based on its config)."""
+        # Get *name* of class name from config
+        stepfactory_cls_name: str = (
+            step_config_dict['step_factory_class'] if isinstance(step_config_dict, dict)
+            else getattr(step_config_dict, 'step_factory_class')
         )
         # Perform lookup
-        return stepfactory_lookup_table[stepfactory_cls_name]
+        return self._stepfactory_lookup_table[stepfactory_cls_name]
+
+    @cached_property
+    def _s3_client(self) -> S3Client:
+        return getattr(self._pipeline_session, 's3_client', None) or self._pipeline_session.boto_session.client('s3')
 
-    def _create_individual_step(
+    def _expand_fan_outs(
         self,
-        step_config_dict: dict[str, Any]
-    ) -> ConfigurableRetryStep:
+        step_configs: list[dict[str, Any] | BaseSettings],
+    ) -> list[dict[str, Any] | BaseSettings]:
+        """Replaces each validated config of a fanned-out step by the configs of its shards (see `fan_out` module)."""
+        expanded_configs: list[dict[str, Any] | BaseSettings] = []
+        for config in step_configs:
+            if getattr(config, 'fan_out', None) is None:
+                expanded_configs.append(config)
+            else:
+                expanded_configs.extend(expand_fan_out(config, self._s3_client))  # type: ignore[arg-type]
+                self._fanned_out_step_names.add(self._get_step_name(config))
+        return expanded_configs
+
+    @staticmethod
+    def _get_step_name(step_config: dict[str, Any] | BaseSettings) -> str:
+        return step_config['step_name'] if isinstance(step_config, dict) \
+            else getattr(step_config, 'step_name')
+
+    def _resolve_dependencies(
+        self,
+        step_config: dict[str, Any] | BaseSettings,
+    ) -> StepDependencies | None:
+        """Resolves the dependencies of a step to the (already created) upstream steps. Returns None if the step has no dependencies."""
+        if self._dag is None:
+            return None
+        edges = self._dag.edges_of(step_config)
+        if not edges:
+            return None
+        dependencies = StepDependencies()
+        for edge in edges:
+            upstream_step = self._steps_by_name.get(edge.upstream_step_name)
+            if upstream_step is None:
+                # E.g., the upstream step was removed in watch mode.
+                logger.warning(f'Upstream step {edge.upstream_step_name} not found. Ignoring dependency.')
+                continue
+            reference = None if edge.output_name is None \
+                else output_reference(upstream_step, edge.output_name)
+            if reference is not None:
+                dependencies.input_sources[edge.input_name] = reference
+            elif upstream_step not in dependencies.depends_on:
+                dependencies.depends_on.append(upstream_step)
+        return dependencies
+
+    def create_step_factory(
+        self,
+        step_config_dict: dict[str, Any] | BaseSettings,
+        # Session for running jobs directly, rather than as part of the pipeline
+        sm_session: Session | LocalSession | None = None,
+        dependencies: StepDependencies | None = None,
+    ) -> StepFactoryInterface:
+        """Instantiates the step factory for a single step config. (Unlike `create_step()`, this does not resolve dependencies on upstream steps.)"""
+        if isinstance(step_config_dict, dict):
+            step_config_dict = self._inject_shared_config(step_config_dict)
         # Look up the right stepfactory class, based on config
         StepFactory_cls: type[StepFactoryInterface] = self._lookup_step_factory_cls(step_config_dict)
-        # Instantiate factory, using step config. Then create step
-        step_factory: StepFactoryInterface = StepFactory_cls(
+        optional_kwargs: dict[str, Any] = {}
+        if sm_session is not None:
+            optional_kwargs['sm_session'] = sm_session
+        if self._step_args_cache is not None:
+            optional_kwargs['step_args_cache'] = self._step_args_cache
+        if self._code_artifact_store is not None:
+            optional_kwargs['code_artifact_store'] = self._code_artifact_store
+        if dependencies is not None:
+            # Unlike the other arguments, dependencies are inferred by default, so factories written before dependencies were inferred must keep working.
+            if _accepts_kwarg(StepFactory_cls, 'dependencies'):
+                optional_kwargs['dependencies'] = dependencies
+            else:
+                logger.warning(
+                    f'Step factory {StepFactory_cls.__name__} does not accept inferred dependencies, so step '
+                    f'{self._get_step_name(step_config_dict)} does not depend on its upstream steps.'
+                )
+        return StepFactory_cls(
             step_config_dict=step_config_dict,
             role_arn=self._role_arn,
-            pipeline_session=self._pipeline_session
+            pipeline_session=self._pipeline_session,
+            **optional_kwargs,
         )
-        return step_factory.create_step()
 
-    def create_all_steps(self) -> list[ConfigurableRetryStep]:
+    def create_step(
+        self,
+        step_config_dict: dict[str, Any] | BaseSettings,
+    ) -> ConfigurableRetryStep:
+        step_factory: StepFactoryInterface = self.create_step_factory(
+            step_config_dict,
+            dependencies=self._resolve_dependencies(step_config_dict),
+        )
+        step: ConfigurableRetryStep = step_factory.create_step()
+        if self._dag is not None:
+            self._steps_by_name[self._get_step_name(step_config_dict)] = step
+        # Custom step factories may not support runtime parameters.
+        step_parameters: dict[str, Parameter] = getattr(step_factory, 'pipeline_parameters', {})
+        if step_parameters:
+            self._step_parameters[self._get_step_name(step_config_dict)] = list(step_parameters.values())
+        return step
+
+    # Incremental updates (used by watch mode)
+    # ----------------------------------------
+    def _index_of_config(self, step_name: str | None) -> int | None:
+        for i, config in enumerate(self.validated_step_configs):
+            if self._get_step_name(config) == step_name:
+                return i
+        return None
+
+    def _forget_step(self, step_name: str) -> None:
+        self._steps_by_name.pop(step_name, None)
+        self._step_parameters.pop(step_name, None)
+
+    def rebuild_step(
+        self,
+        step_config: dict[str, Any] | BaseSettings,
+        # Name of the step that the new step replaces (which may differ from the new step's name if it was renamed). If None, the step is new.
+        replaces: str | None = None,
+    ) -> ConfigurableRetryStep | None:
+        """
+        Validates a changed (or new) step config and creates its step, updating `validated_step_configs` accordingly.
+        Returns None, without creating the step, if the change may affect other steps, in which case all steps have to be created again:
+        - If the step fans out (or did so before), since its shards are steps of their own.
+        - If dependencies are inferred, and the step is new or was renamed, or its inputs or outputs changed, since this may change which steps depend on each other (and how downstream steps reference it).
+        """
+        [validated_config] = self._validate_step_configs([step_config])
+        if getattr(validated_config, 'fan_out', None) is not None or replaces in self._fanned_out_step_names:
+            return None
+        index: int | None = self._index_of_config(replaces)
+        if self._dag is not None:
+            if index is None or self._get_step_name(validated_config) != replaces:
+                return None
+            previous_config = self.validated_step_configs[index]
+            if any(
+                get_s3_uris(previous_config, key) != get_s3_uris(validated_config, key)
+                for key in ('inputs', 'outputs')
+            ):
+                return None
+        # Note: If inputs and outputs are unchanged, so are the step's dependencies, and the DAG remains valid.
+        if replaces is not None:
+            self._forget_step(replaces)
+        step: ConfigurableRetryStep = self.create_step(validated_config)
+        if index is not None:
+            self.validated_step_configs[index] = validated_config
+        elif self._keeps_step_configs:
+            self.validated_step_configs.append(validated_config)
+        return step
+
+    def discard_step(self, step_name: str) -> bool:
+        """
+        Forgets a created step (and its config), e.g. because it was removed from the pipeline.
+        Returns False, without forgetting anything, if other steps depend on the step or if it fanned out, in which case all steps have to be created again.
+        """
+        if step_name in self._fanned_out_step_names:
+            return False
+        if self._dag is not None and any(
+            edge.upstream_step_name == step_name
+            for downstream_step_name, edges in self._dag.edges.items() if downstream_step_name != step_name
+            for edge in edges
+        ):
+            return False
+        self._forget_step(step_name)
+        index: int | None = self._index_of_config(step_name)
+        if index is not None:
+            del self.validated_step_configs[index]
+        return True
+
+    @property
+    def pipeline_parameters(self) -> list[Parameter]:
+        """Parameters used by all created steps, sorted by name (so that definitions don't depend on the order in which steps were created)."""
+        parameters: dict[str, Parameter] = {}
+        for step_parameters in self._step_parameters.values():
+            merge_pipeline_parameters(parameters, step_parameters)
+        return sorted(parameters.values(), key=lambda parameter: parameter.name)
+
+    def _create_steps(
+        self,
+        step_configs: list[dict[str, Any] | BaseSettings],
+    ) -> list[ConfigurableRetryStep]:
+        """
+        Creates steps, concurrently if `max_workers` > 1. Either way, steps are returned in the same order as their configs.
+        When creating steps concurrently, all steps are attempted, and failures of individual steps are raised together as a StepCreationError.
+        """
+        if self._max_workers <= 1:
+            return [self.create_step(config) for config in step_configs]
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            futures = [executor.submit(self.create_step, config) for config in step_configs]
         steps: list[ConfigurableRetryStep] = []
-        for config in self._step_config_dicts:
-            step: ConfigurableRetryStep = self._create_individual_step(config)
-            steps.append(step)
+        errors: dict[str, Exception] = {}
+        for config, future in zip(step_configs, futures):
+            error = future.exception()
+            if error is None:
+                steps.append(future.result())
+            else:
+                errors[self._get_step_name(config)] = error  # type: ignore[assignment]
+        if errors:
+            raise StepCreationError(errors)
         return steps
+
+    def create_all_steps(self) -> list[ConfigurableRetryStep]:
+        step_configs = self._expand_fan_outs(
+            self._validate_step_configs(self._step_config_dicts)  # type: ignore[arg-type]
+        )
+        self.validated_step_configs = step_configs
+        if not self._infer_dependencies:
+            check_unique_step_names(step_configs)
+            return self._create_steps(step_configs)
+
+        # Upstream steps must exist before we can reference them, so create steps generation by generation. (This also detects cycles, before any step is created.)
+        self._dag = StepDag(step_configs)
+        configs_by_name = {self._get_step_name(config): config for config in step_configs}
+        for generation in self._dag.generations():
+            self._create_steps([configs_by_name[step_name] for step_name in generation])
+        # Return steps in the order of their configs.
+        return [self._steps_by_name[step_name] for step_name in self._dag.step_names]
+
+
+class StreamingStepFactoryFacade(StepFactoryFacade):
+    """
+    Variant of the step factory façade for pipelines with thousands of steps: Instead of a list of all step configs, it consumes an *iterator* of step configs, and creates steps one at a time. Each raw config and validated model is dropped as soon as its step exists, so peak memory is bounded by the steps themselves plus one batch of configs.
+
+    Configs are still validated in batches (of `batch_size` configs each), to keep most of the speedup of batched validation.
+
+    Note: Inferring dependencies between steps requires all configs at once, so this façade does not do so. If needed, declare dependencies explicitly instead.
+    """
+    _keeps_step_configs: ClassVar[bool] = False
+
+    def __init__(
+        self,
+        step_configs: Iterable[dict[str, Any] | BaseSettings],
+        role_arn: str,
+        pipeline_session: PipelineSession | LocalPipelineSession,
+        custom_stepfactory_lookup_table: StepFactoryLookupTable | None = None,
+        shared_config: SharedConfig | None = None,
+        max_workers: int = 1,
+        step_args_cache: StepArgsCache | None = None,
+        code_artifact_store: CodeArtifactStore | None = None,
+        batch_size: int = 64,
+    ):
+        super().__init__(
+            step_config_dicts=[],
+            role_arn=role_arn,
+            pipeline_session=pipeline_session,
+            custom_stepfactory_lookup_table=custom_stepfactory_lookup_table,
+            shared_config=shared_config,
+            max_workers=max_workers,
+            step_args_cache=step_args_cache,
+            code_artifact_store=code_artifact_store,
+            infer_dependencies=False,
+        )
+        self._step_configs: Iterator[dict[str, Any] | BaseSettings] = iter(step_configs)
+        self._batch_size = batch_size
+
+    def iter_steps(self) -> Iterator[ConfigurableRetryStep]:
+        """Creates steps lazily. Note that the iterator of step configs can only be consumed once."""
+        # Names of all steps so far, since duplicates may be in different batches.
+        seen_step_names: set[str] = set()
+        while batch := list(islice(self._step_configs, self._batch_size)):
+            validated_batch = deque(self._expand_fan_outs(self._validate_step_configs(batch)))
+            check_unique_step_names(validated_batch, seen_step_names)
+            # Drop raw configs before creating steps, and each validated config right after creating its step.
+            del batch
+            if self._max_workers > 1:
+                # Concurrency is limited to steps within the same batch.
+                yield from self._create_steps(list(validated_batch))
+                continue
+            while validated_batch:
+                yield self.create_step(validated_batch.popleft())
+
+    def create_all_steps(self) -> list[ConfigurableRetryStep]:
+        return list(self.iter_steps())
@@ -0,0 +1,234 @@
+"""
+Step factory for TrainingSteps of framework estimators (e.g. PyTorch or SKLearn), configured in the same way as processing steps.
+
+Besides the basic estimator settings, the config exposes the settings that most affect how long (and how expensive) training is:
+- Managed spot training (`use_spot_instances`): Training runs on spare capacity at a discount, but may be interrupted. To resume after an interruption rather than start over, the training code should write checkpoints to `checkpoint_local_path`, which SageMaker syncs to `checkpoint_s3_uri`.
+- Warm pools (`keep_alive_period_in_seconds`): Instances are kept alive after a job finished, so that subsequent jobs with matching settings skip provisioning.
+- Distributed training (`instance_count` > 1, `distribution`).
+
+The trained model is written below `output_path`. Downstream steps that use `output_path` as input are given the model artifact of *this* training job (see `dag` module).
+"""
+# Required to only import heavy SageMaker SDK modules for type checking, or when they are actually needed: https://mypy.readthedocs.io/en/stable/runtime_troubles.html#future-annotations-import-pep-563
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, ClassVar, Literal, Mapping
+
+from loguru import logger
+from pydantic import field_validator, model_validator
+from pydantic_settings import BaseSettings
+
+from sm_pipelines_oo.shared_config_schema import SharedConfig, StepCacheConfig
+from sm_pipelines_oo.steps.interfaces import StepFactoryInterface
+from sm_pipelines_oo.steps.registry import estimator_registry, lookup
+from sm_pipelines_oo.steps.step_args_cache import StepArgsCache
+from sm_pipelines_oo.steps.code_artifact_store import CodeArtifactStore
+from sm_pipelines_oo.steps.dag import StepDependencies
+from sm_pipelines_oo.steps.caching import get_cache_config, to_sagemaker_cache_config
+
+if TYPE_CHECKING:
+    from sagemaker.session import Session
+    from sagemaker.local.local_session import LocalSession
+    from sagemaker.workflow.pipeline_context import PipelineSession, LocalPipelineSession, _JobStepArguments
+    from sagemaker.estimator import Framework
+    from sagemaker.inputs import TrainingInput
+    from sagemaker.workflow.steps import TrainingStep
+
+
+# Configs
+# =======
+
+class _EstimatorConfig(BaseSettings):
+    """Config for instantiating a framework estimator."""
+    estimator_cls_name: str
+    framework_version: str
+    py_version: str | None = None
+    entry_point: str
+    source_dir: str
+    instance_type: str
+    instance_count: int = 1
+    hyperparameters: dict[str, Any] | None = None
+    environment: dict[str, str] | None = None
+    # Model artifacts are written below this prefix.
+    output_path: str
+    max_run: int = 24 * 60 * 60  # seconds
+
+    # Managed spot training
+    # ---------------------
+    use_spot_instances: bool = False
+    # Maximum time to wait for spot capacity *plus* training time, so must be at least max_run. Defaults to max_run.
+    max_wait: int | None = None
+    checkpoint_s3_uri: str | None = None
+    checkpoint_local_path: str | None = None  # SageMaker defaults to /opt/ml/checkpoints
+
+    # Warm pools
+    # ----------
+    keep_alive_period_in_seconds: int | None = None
+
+    # Distributed training
+    # --------------------
+    # Passed to the estimator as is, e.g. `{'pytorchddp': {'enabled': True}}` for PyTorch.
+    distribution: dict[str, Any] | None = None
+
+    @field_validator('keep_alive_period_in_seconds')
+    @classmethod
+    def _check_keep_alive_period(cls, value: int | None) -> int | None:
+        # Limit imposed by SageMaker
+        if value is not None and not 0 <= value <= 3600:
+            raise ValueError('keep_alive_period_in_seconds must be between 0 and 3600.')
+        return value
+
+    @model_validator(mode='after')
+    def _check_spot_settings(self) -> '_EstimatorConfig':
+        if not self.use_spot_instances:
+            if self.max_wait is not None:
+                raise ValueError('max_wait only applies to spot training, so set use_spot_instances as well.')
+            return self
+        if self.max_wait is None:
+            self.max_wait = self.max_run
+        elif self.max_wait < self.max_run:
+            raise ValueError('With spot training, max_wait must be at least max_run.')
+        if self.checkpoint_s3_uri is None:
+            logger.warning(
+                'Spot training without checkpoint_s3_uri: Interrupted jobs will restart from scratch.'
+            )
+        if self.keep_alive_period_in_seconds:
+            raise ValueError('Warm pools are not supported for spot training.')
+        return self
+
+
+class _TrainingInputConfig(BaseSettings):
+    """Config for a single training channel. Like processing inputs, it can also be given as just its S3 URI."""
+    s3_uri: str
+    content_type: str | None = None
+    # With FastFile, data is streamed on demand rather than downloaded before training starts. Defaults to the estimator's input mode.
+    input_mode: Literal['File', 'Pipe', 'FastFile'] | None = None
+    distribution: Literal['FullyReplicated', 'ShardedByS3Key'] = 'FullyReplicated'
+
+
+class _TrainingRunConfig(BaseSettings):
+    """Serves as input for constructing the channels passed to estimator.fit()."""
+    inputs: dict[str, _TrainingInputConfig]
+
+    @field_validator('inputs', mode='before')
+    @classmethod
+    def _expand_short_form(cls, value: Any) -> Any:
+        if not isinstance(value, dict):
+            return value
+        return {
+            name: {'s3_uri': config} if isinstance(config, str) else config
+            for name, config in value.items()
+        }
+
+
+class TrainingStepConfig(BaseSettings):
+    step_name: str
+    step_factory_class: str
+    estimator_config: _EstimatorConfig
+    training_run_config: _TrainingRunConfig
+    # If not set, the default from the shared config is used.
+    cache_config: StepCacheConfig | None = None
+    shared_config: SharedConfig
+
+
+# Implementation of StepFactory
+# =============================
+
+class TrainingStepFactory(StepFactoryInterface):
+    # Note: Same as for processing steps, this is public so that users can add support for additional estimators.
+    estimator_name_to_cls_mapping: ClassVar[Mapping[str, Any]] = estimator_registry
+
+    _config_model: ClassVar[type[TrainingStepConfig]] = TrainingStepConfig
+
+    def __init__(
+        self,
+        step_config_dict: dict[str, Any] | TrainingStepConfig,
+        role_arn: str,
+        pipeline_session: PipelineSession | LocalPipelineSession,
+        # Optionally, provide non-pipeline session to run training directly
+        sm_session: Session | LocalSession | None = None,
+        # Optionally, reuse step arguments from earlier builds if neither config nor code changed
+        step_args_cache: StepArgsCache | None = None,
+        # Optionally, share uploaded code between steps and builds, if neither changed
+        code_artifact_store: CodeArtifactStore | None = None,
+        # Dependencies on upstream steps, as inferred by the step factory façade
+        dependencies: StepDependencies | None = None,
+    ):
+        self._config: TrainingStepConfig = (
+            step_config_dict if isinstance(step_config_dict, self._config_model)
+            else self._config_model(**step_config_dict)
+        )
+        self._role_arn = role_arn
+        self._pipeline_session = pipeline_session
+        self._sm_session = sm_session
+        self._step_args_cache = step_args_cache
+        self._code_artifact_store = code_artifact_store
+        self._dependencies: StepDependencies = dependencies or StepDependencies()
+
+    @property
+    def _source_dir(self) -> str:
+        """Local source_dir from config, or the S3 URI of its shared code artifact (if using a code artifact store)."""
+        source_dir: str = self._config.estimator_config.source_dir
+        if self._code_artifact_store is None:
+            return source_dir
+        return self._code_artifact_store.get_artifact_uri(source_dir)
+
+    def get_estimator(self, as_pipeline: bool) -> Framework:
+        estimator_args: dict[str, Any] = self._config.estimator_config.model_dump(exclude_none=True)
+        estimator_cls: Any = lookup(self.estimator_name_to_cls_mapping, estimator_args.pop('estimator_cls_name'))
+        estimator_args['source_dir'] = self._source_dir
+        session = self._pipeline_session if as_pipeline else self._sm_session
+        return estimator_cls(
+            **estimator_args,
+            role=self._role_arn,
+            sagemaker_session=session,
+        )
+
+    def _construct_training_inputs(self) -> dict[str, TrainingInput]:
+        from sagemaker.inputs import TrainingInput
+
+        return {
+            input_name: TrainingInput(
+                # If input is the output of an upstream step, reference that output instead.
+                s3_data=self._dependencies.input_sources.get(input_name, input_config.s3_uri),
+                content_type=input_config.content_type,
+                input_mode=input_config.input_mode,
+                distribution=input_config.distribution,
+            )
+            for input_name, input_config in self._config.training_run_config.inputs.items()
+        }
+
+    def _create_step_args(self) -> _JobStepArguments:
+        pipeline_estimator = self.get_estimator(as_pipeline=True)
+        return pipeline_estimator.fit(inputs=self._construct_training_inputs())  # type: ignore[return-value]
+
+    def create_step(self) -> TrainingStep:
+        from sagemaker.workflow.steps import TrainingStep
+
+        cache_config = to_sagemaker_cache_config(get_cache_config(self._config))
+        if self._step_args_cache is None:
+            return TrainingStep(
+                name=self._config.step_name,
+                step_args=self._create_step_args(),
+                depends_on=self._dependencies.depends_on or None,  # type: ignore[arg-type]
+                cache_config=cache_config,
+            )
+
+        from sm_pipelines_oo.steps.memoized_steps import MemoizedTrainingStep
+        return MemoizedTrainingStep(
+            name=self._config.step_name,
+            step_args_cache=self._step_args_cache,
+            fingerprint=self._step_args_cache.fingerprint(
+                step_config=self._config,
+                role_arn=self._role_arn,
+                source_dir=self._config.estimator_config.source_dir,
+                dependencies=self._dependencies,
+                share_code_artifacts=self._code_artifact_store is not None,
+            ),
+            create_step_args=self._create_step_args,
+            depends_on=self._dependencies.depends_on or None,
+            cache_config=cache_config,
+        )
+
+    def run_training(self, wait=True) -> None:
+        """Runs the training job directly, bypassing the pipeline."""
+        direct_estimator = self.get_estimator(as_pipeline=False)
+        direct_estimator.fit(inputs=self._construct_training_inputs(), wait=wait)
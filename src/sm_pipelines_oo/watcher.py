@@ -0,0 +1,165 @@
+"""
+Watch mode: Keeps a built pipeline in memory and, whenever a config file or a step's source code changes, rebuilds only the affected steps.
+
+We poll file metadata (modification time and size) rather than relying on OS-specific file system events. This avoids an extra dependency and works the same on every platform (including mounted volumes in containers, where file system events are often unreliable).
+"""
+# Required to not make pipeline module a runtime dependency, avoiding a circular import.
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Callable
+from dataclasses import dataclass
+from pathlib import Path
+import hashlib
+import os
+import time
+
+from loguru import logger
+
+from sm_pipelines_oo.config_loader.implementations.file_loaders import BaseConfigLoader
+
+if TYPE_CHECKING:
+    from sm_pipelines_oo.pipeline import PipelineFacade
+
+
+# Fingerprints of watched files and folders
+# =========================================
+
+def _file_fingerprint(path: Path) -> tuple[int, int] | None:
+    """Returns (modification time, size) of a file, or None if it does not exist (anymore)."""
+    try:
+        stat_result = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat_result.st_mtime_ns, stat_result.st_size
+
+
+def _folder_fingerprint(folder: Path) -> str | None:
+    """Returns a hash over the relative path, modification time and size of all files in a folder."""
+    if not folder.is_dir():
+        return None
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(folder):
+        # Sort in place, so os.walk() traverses subfolders in a deterministic order.
+        dirnames.sort()
+        for filename in sorted(filenames):
+            file_path = Path(dirpath) / filename
+            fingerprint = _file_fingerprint(file_path)
+            digest.update(f'{file_path.relative_to(folder)}:{fingerprint}\n'.encode())
+    return digest.hexdigest()
+
+
+@dataclass
+class _WatchedStep:
+    """What we need to remember about a step in order to detect whether it must be rebuilt."""
+    step_name: str
+    config_fingerprint: tuple[int, int] | None
+    source_dir: Path | None
+    source_dir_fingerprint: str | None
+
+
+# Watcher
+# =======
+
+class PipelineWatcher:
+    """
+    Watches the config folder of a given environment as well as each step's `source_dir`, and incrementally updates the pipeline held by the pipeline façade:
+    - If a step config (or the code in its `source_dir`) changed, only that step is rebuilt and spliced into the cached pipeline.
+    - New step configs are added as new steps; deleted ones are removed from the pipeline.
+    - If the *shared* config changed, every step may be affected, so the whole pipeline is rebuilt.
+    """
+
+    def __init__(
+        self,
+        pipeline_facade: PipelineFacade,
+        config_loader: BaseConfigLoader,
+        poll_interval: float = 1.0,  # seconds
+    ):
+        self._pipeline_facade = pipeline_facade
+        self._config_loader = config_loader
+        self._poll_interval = poll_interval
+        self._shared_config_fingerprint: tuple[int, int] | None = None
+        self._watched_steps: dict[Path, _WatchedStep] = {}
+        self._take_snapshot()
+
+    def _take_snapshot(self) -> None:
+        """Records the current state of all watched files, without rebuilding anything."""
+        self._shared_config_fingerprint = _file_fingerprint(self._config_loader.shared_config_path)
+        self._watched_steps = {
+            config_file: self._watch_step(config_file, self._config_loader.load_step_config(config_file))
+            for config_file in self._config_loader.step_config_paths
+        }
+
+    @staticmethod
+    def _watch_step(config_file: Path, step_config_dict: dict[str, Any]) -> _WatchedStep:
+        # Not every kind of step necessarily has a source_dir, so don't assume this key exists.
+        source_dir_str: str | None = step_config_dict \
+            .get('processor_run_config', {}) \
+            .get('source_dir')
+        source_dir = None if source_dir_str is None else Path(source_dir_str)
+        return _WatchedStep(
+            step_name=step_config_dict['step_name'],
+            config_fingerprint=_file_fingerprint(config_file),
+            source_dir=source_dir,
+            source_dir_fingerprint=None if source_dir is None else _folder_fingerprint(source_dir),
+        )
+
+    def poll(self) -> list[str]:
+        """
+        Checks all watched files once, and rebuilds whatever is affected by changes since the last check.
+        Returns the names of all steps that were rebuilt or removed.
+        """
+        # If the shared config changed, every step may be affected.
+        if _file_fingerprint(self._config_loader.shared_config_path) != self._shared_config_fingerprint:
+            logger.info('Shared config changed. Rebuilding whole pipeline.')
+            self._pipeline_facade.rebuild()
+            self._take_snapshot()
+            return [watched_step.step_name for watched_step in self._watched_steps.values()]
+
+        affected_step_names: list[str] = []
+        current_config_files: list[Path] = self._config_loader.step_config_paths
+
+        # Step configs that were deleted
+        for config_file in set(self._watched_steps) - set(current_config_files):
+            removed_step = self._watched_steps.pop(config_file)
+            self._pipeline_facade.remove_step(removed_step.step_name)
+            affected_step_names.append(removed_step.step_name)
+
+        # Step configs that are new, or where either the config or the step's code changed
+        for config_file in current_config_files:
+            previously_watched: _WatchedStep | None = self._watched_steps.get(config_file)
+            if previously_watched is not None and not self._has_changed(config_file, previously_watched):
+                continue
+            step_config_dict = self._config_loader.load_step_config(config_file)
+            self._pipeline_facade.rebuild_step(
+                step_config_dict,
+                replaces=None if previously_watched is None else previously_watched.step_name,
+            )
+            self._watched_steps[config_file] = self._watch_step(config_file, step_config_dict)
+            affected_step_names.append(step_config_dict['step_name'])
+
+        return affected_step_names
+
+    @staticmethod
+    def _has_changed(config_file: Path, watched_step: _WatchedStep) -> bool:
+        if _file_fingerprint(config_file) != watched_step.config_fingerprint:
+            return True
+        if watched_step.source_dir is None:
+            return False
+        return _folder_fingerprint(watched_step.source_dir) != watched_step.source_dir_fingerprint
+
+    def watch(
+        self,
+        on_rebuild: Callable[[list[str]], None] | None = None,
+        max_polls: int | None = None,  # Mainly useful for testing. Default is to watch forever.
+    ) -> None:
+        """Polls for changes until interrupted (or until `max_polls` is reached)."""
+        logger.info(f'Watching {self._config_loader.shared_config_path.parent} for changes.')
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                affected_step_names = self.poll()
+                if affected_step_names and on_rebuild is not None:
+                    on_rebuild(affected_step_names)
+                polls += 1
+                time.sleep(self._poll_interval)
+        except KeyboardInterrupt:
+            logger.info('Stopped watching.')
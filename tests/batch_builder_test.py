@@ -0,0 +1,107 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from sm_pipelines_oo.aws_connector.concrete_connectors import AWSConnector
+from sm_pipelines_oo.batch_builder import BatchBuilder, BuildTarget, _connector_pool
+from sm_pipelines_oo.cli import main
+from sm_pipelines_oo.pipeline import PipelineFacade
+from sm_pipelines_oo.shared_config_schema import SharedConfig
+from sm_pipelines_oo.steps.step_factory_facade import StepFactoryFacade
+
+
+CONFIG_PATH = Path(__file__).parent / 'config_loader' / 'config_files'
+
+
+class FakePipeline:
+    def __init__(self, definition: str):
+        self._definition = definition
+        self.steps: list = []
+
+    def definition(self) -> str:
+        return self._definition
+
+
+@pytest.fixture
+def config_root(tmp_path: Path, monkeypatch) -> Path:
+    shutil.copytree(CONFIG_PATH, tmp_path / 'config')
+    (tmp_path / 'worker_code' / 'preprocess').mkdir(parents=True)
+    (tmp_path / 'worker_code' / 'preprocess' / 'preprocess.py').write_text('print(1)')
+    monkeypatch.chdir(tmp_path)
+    # Replace building steps (which requires AWS) with a fake pipeline.
+    def build_pipeline(self: PipelineFacade) -> None:
+        self._built_pipeline = FakePipeline(f'{{"pipeline": "{self.pipeline_name}"}}')  # type: ignore[assignment]
+        self._built_step_factory_facade = StepFactoryFacade([], role_arn='mock-role-arn', pipeline_session=None)  # type: ignore[arg-type]
+    monkeypatch.setattr(PipelineFacade, '_build_pipeline', build_pipeline)
+    _connector_pool.clear()
+    return tmp_path / 'config'
+
+
+def test_failed_targets_do_not_stop_others(config_root: Path, tmp_path: Path):
+    targets = [
+        BuildTarget(str(config_root), 'dev'),
+        BuildTarget(str(tmp_path / 'missing'), 'dev'),
+        BuildTarget(str(config_root), 'dev'),
+    ]
+
+    report = BatchBuilder(targets, max_workers=1, definition_cache_dir=str(tmp_path / 'cache'), export=False).build()
+
+    assert [result.succeeded for result in report.results] == [True, False, True]
+    assert report.results[0].pipeline_name == 'test-v0.0'
+    assert report.results[0].definition_sha256 == report.results[2].definition_sha256
+    assert 'FAILED' in report.format()
+    # Both pipelines are in the same region, so they share a connector's sessions and clients.
+    assert list(_connector_pool) == [(False, 'us-east-1')]
+
+
+def test_relative_source_dirs_are_resolved_per_target(config_root: Path, tmp_path: Path, monkeypatch):
+    # Arrange: Two packages in different folders, each with its own code under the same relative source_dir.
+    package_roots = [tmp_path / 'package_a', tmp_path / 'package_b']
+    for package_root in package_roots:
+        shutil.copytree(config_root, package_root / 'config')
+        (package_root / 'worker_code' / 'preprocess').mkdir(parents=True)
+    # Neither package is the working directory.
+    monkeypatch.chdir(tmp_path / 'worker_code')
+    source_dirs: list[str] = []
+    def build_pipeline(self: PipelineFacade) -> None:
+        source_dirs.append(self._config_loader.step_configs_as_dicts[0]['processor_run_config']['source_dir'])
+        self._built_pipeline = FakePipeline('{}')  # type: ignore[assignment]
+    monkeypatch.setattr(PipelineFacade, '_build_pipeline', build_pipeline)
+
+    # Act
+    report = BatchBuilder(
+        [BuildTarget(str(package_root / 'config'), 'dev') for package_root in package_roots],
+        max_workers=1, definition_cache_dir=None, export=False,
+    ).build()
+
+    # Assert
+    assert report.succeeded
+    assert source_dirs == [str(package_root.resolve() / 'worker_code' / 'preprocess') for package_root in package_roots]
+
+
+def test_connectors_adopt_resources_of_same_region():
+    def make_connector(region: str) -> AWSConnector:
+        shared_config = SharedConfig(
+            project_name='unit-testing', project_version='0', region=region, project_bucket_name='test-bucket',
+        )
+        return AWSConnector(environment='dev', shared_config=shared_config)
+    connector = make_connector('us-east-1')
+    s3_client = connector.s3_client
+
+    other_connector = make_connector('us-east-1')
+    other_connector.adopt_resources(connector)
+
+    assert other_connector.s3_client is s3_client
+    with pytest.raises(ValueError):
+        make_connector('eu-west-1').adopt_resources(connector)
+
+
+def test_cli_reports_and_fails_on_failed_targets(config_root: Path, tmp_path: Path, capsys):
+    with pytest.raises(SystemExit):
+        main([
+            'build-all', '--workers', '1', '--no-export',
+            '--target', f'{config_root}:dev', '--target', f'{tmp_path / "missing"}:dev',
+        ])
+
+    assert 'Pipelines: 1 of 2 built' in capsys.readouterr().out
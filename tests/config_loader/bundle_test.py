@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pytest
+
+from sm_pipelines_oo.cli import main
+from sm_pipelines_oo.config_loader.implementations.bundle_loader import (
+    BundleConfigLoader, compile_config_bundle
+)
+from sm_pipelines_oo.shared_config_schema import SharedConfig
+from sm_pipelines_oo.steps.framework_processing_step import StepConfig
+
+
+CONFIG_PATH = Path(__file__).parent / 'config_files/'
+
+
+def test_bundle_roundtrip(tmp_path: Path):
+    # Arrange
+    bundle_path = compile_config_bundle(
+        config_root_folder=str(CONFIG_PATH),
+        bundle_path=str(tmp_path / 'config.bundle'),
+    )
+
+    # Act
+    loader = BundleConfigLoader(env='dev', bundle_path=str(bundle_path))
+
+    # Assert
+    # Raw dictionaries are the same as when loading from YAML.
+    assert loader.shared_config_as_dict['project_name'] == 'test'
+    assert loader.step_configs_as_dicts[0]['step_name'] == 'preprocessing'
+    # Validated models are available as well, sharing one instance of the shared config.
+    shared_config = loader.validated_shared_config
+    step_config = loader.validated_step_configs[0]
+    assert isinstance(shared_config, SharedConfig)
+    assert isinstance(step_config, StepConfig)
+    assert step_config.shared_config is shared_config
+    assert step_config.processor_init_config.instance_type == 'ml.m5.xlarge'
+
+
+def test_bundle_does_not_contain_missing_environment(tmp_path: Path):
+    bundle_path = tmp_path / 'config.bundle'
+    main(['compile-config', '--config-root', str(CONFIG_PATH), '--output', str(bundle_path)])
+
+    loader = BundleConfigLoader(env='prod', bundle_path=str(bundle_path))
+    with pytest.raises(ValueError, match='does not contain environment prod'):
+        loader.shared_config_as_dict
+
+
+def test_bundle_of_changed_config_model_is_rejected(tmp_path: Path, monkeypatch):
+    bundle_path = compile_config_bundle(
+        config_root_folder=str(CONFIG_PATH),
+        bundle_path=str(tmp_path / 'config.bundle'),
+    )
+    # E.g., a field was added to the step config model since compiling the bundle.
+    original_schema = StepConfig.model_json_schema
+    monkeypatch.setattr(StepConfig, 'model_json_schema', lambda: {**original_schema(), 'new_field': {}})
+
+    loader = BundleConfigLoader(env='dev', bundle_path=str(bundle_path))
+    with pytest.raises(ValueError, match='framework_processing_step:StepConfig. Please recompile'):
+        loader.validated_step_configs
@@ -1,4 +1,8 @@
+import pickle
 from pathlib import Path
+
+import pytest
+
 from sm_pipelines_oo.config_loader.implementations.file_loaders import YamlConfigLoader
 
 
@@ -49,3 +53,58 @@ def test_load_yaml_config():
     # Assert
     assert shared_config == expected_shared_config
     assert step_configs == [expected_preprocessing_config]
+
+
+def test_load_yaml_config_concurrently_with_parse_cache(tmp_path: Path):
+    # Arrange
+    cache_dir = tmp_path / 'parse_cache'
+    loader = YamlConfigLoader(
+        env='dev',
+        config_root_folder=str(CONFIG_PATH),
+        max_workers=4,
+        parse_cache_dir=str(cache_dir),
+    )
+
+    # Act
+    shared_config = loader.shared_config_as_dict
+    step_configs = loader.step_configs_as_dicts
+
+    # Assert
+    assert shared_config == expected_shared_config
+    assert step_configs == [expected_preprocessing_config]
+    # One entry each for the shared config and the step config
+    assert len(list(cache_dir.iterdir())) == 2
+
+
+def test_parse_cache_skips_parsing_of_unchanged_files(tmp_path: Path, monkeypatch):
+    # Arrange: Populate cache
+    cache_dir = str(tmp_path / 'parse_cache')
+    YamlConfigLoader(
+        env='dev', config_root_folder=str(CONFIG_PATH), parse_cache_dir=cache_dir
+    ).step_configs_as_dicts
+
+    def fail_parsing(self, content: bytes):
+        raise AssertionError('Config should have been loaded from cache')
+    monkeypatch.setattr(YamlConfigLoader, '_parse_config', fail_parsing)
+
+    # Act
+    loader = YamlConfigLoader(
+        env='dev', config_root_folder=str(CONFIG_PATH), parse_cache_dir=cache_dir
+    )
+
+    # Assert
+    assert loader.shared_config_as_dict == expected_shared_config
+    assert loader.step_configs_as_dicts == [expected_preprocessing_config]
+
+
+def test_failed_parse_cache_write_leaves_no_temporary_file(tmp_path: Path):
+    # Arrange
+    cache_dir = tmp_path / 'parse_cache'
+    loader = YamlConfigLoader(env='dev', config_root_folder=str(CONFIG_PATH), parse_cache_dir=str(cache_dir))
+
+    # Act: Lambdas can't be pickled.
+    with pytest.raises((pickle.PicklingError, AttributeError)):
+        loader._write_cache_entry(cache_dir / 'entry.pickle', {'unpicklable': lambda: None})
+
+    # Assert
+    assert list(cache_dir.iterdir()) == []
@@ -0,0 +1,56 @@
+from typing import Any, Callable
+
+import pytest
+
+
+# Mock configs
+# ============
+
+@pytest.fixture
+def shared_config_dict() -> dict[str, Any]:
+    return {
+        'project_name': 'unit-testing',
+        'project_version': '0',
+        'region': 'us-east-1',
+        'project_bucket_name': 'test-bucket',
+        'role_name': 'test_role',
+    }
+
+
+@pytest.fixture
+def make_step_config_dict(shared_config_dict: dict[str, Any]) -> Callable[..., dict[str, Any]]:
+    """Returns a function for creating raw configs of processing steps (as provided by config loaders), with defaults for everything that a test doesn't set."""
+    def make_step_config_dict(
+        step_name: str,
+        # Default to a single input and output, under a prefix named after the step.
+        inputs: dict[str, Any] | None = None,
+        outputs: dict[str, Any] | None = None,
+        step_factory_class: str = 'FrameworkProcessor',
+        # Merged into the defaults
+        processor_init_config: dict[str, Any] | None = None,
+        processor_run_config: dict[str, Any] | None = None,
+        # Any other fields of the step config, e.g. `runtime_parameters` or `fan_out`
+        **fields: Any,
+    ) -> dict[str, Any]:
+        return {
+            'step_name': step_name,
+            'step_factory_class': step_factory_class,
+            'processor_init_config': {
+                'framework_version': '0.23-1',
+                'estimator_cls_name': 'SKLearn',
+                'instance_count': 1,
+                'instance_type': 'ml.m5.large',
+                **(processor_init_config or {}),
+            },
+            'processor_run_config': {
+                'code': 'code.py',
+                'source_dir': 'code_dir/',
+                'inputs': {'input_1': f's3://test-bucket/{step_name}/input_1'} if inputs is None else inputs,
+                'outputs': {'output_1': f's3://test-bucket/{step_name}/output_1'} if outputs is None else outputs,
+                **(processor_run_config or {}),
+            },
+            # Raw dict, as provided by config loaders
+            'shared_config': shared_config_dict,
+            **fields,
+        }
+    return make_step_config_dict
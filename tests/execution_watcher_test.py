@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import boto3
+from botocore.stub import Stubber
+from loguru import logger
+
+from sm_pipelines_oo.execution_watcher import ExecutionWatcher, StepEvent
+
+
+EXECUTION_ARN = 'arn:aws:sagemaker:us-east-1:123456789012:pipeline/test/execution/abc'
+JOB_ARN = 'arn:aws:sagemaker:us-east-1:123456789012:processing-job/pipelines-abc-step-a'
+START_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def execution_response(status: str) -> dict[str, Any]:
+    return {'PipelineExecutionArn': EXECUTION_ARN, 'PipelineExecutionStatus': status}
+
+
+def step_response(step_name: str, status: str, duration: float | None = None, **kwargs) -> dict[str, Any]:
+    response: dict[str, Any] = {'StepName': step_name, 'StepStatus': status, 'StartTime': START_TIME, **kwargs}
+    if duration is not None:
+        response['EndTime'] = START_TIME + timedelta(seconds=duration)
+    return response
+
+
+class _FakeLogsClient:
+    """Returns all log events since `startTime`, two per page."""
+    log_events: list[dict[str, Any]] = [
+        {'eventId': '1', 'timestamp': 1000, 'message': 'Loading data\n'},
+        {'eventId': '2', 'timestamp': 1000, 'message': 'Processing data\n'},
+        {'eventId': '3', 'timestamp': 2000, 'message': 'Done\n'},
+    ]
+
+    def filter_log_events(self, logGroupName: str, logStreamNamePrefix: str, startTime: int, nextToken: str | None = None) -> dict[str, Any]:
+        assert logGroupName == '/aws/sagemaker/ProcessingJobs'
+        assert logStreamNamePrefix == 'pipelines-abc-step-a/'
+        log_events = [log_event for log_event in self.log_events if log_event['timestamp'] >= startTime]
+        offset = int(nextToken or 0)
+        response: dict[str, Any] = {'events': log_events[offset:offset + 2]}
+        if offset + 2 < len(log_events):
+            response['nextToken'] = str(offset + 2)
+        return response
+
+
+def test_step_events_and_logs():
+    # Arrange
+    sagemaker_client = boto3.client('sagemaker', region_name='us-east-1')
+    events: list[StepEvent] = []
+    messages: list[str] = []
+    handler_id = logger.add(lambda message: messages.append(message.record['message']), level='INFO')
+    watcher = ExecutionWatcher(
+        sagemaker_client,
+        logs_client=_FakeLogsClient(),  # type: ignore[arg-type]
+        min_poll_interval=0,
+        on_event=events.append,
+    )
+    with Stubber(sagemaker_client) as stubber:
+        expected_params = {'PipelineExecutionArn': EXECUTION_ARN}
+        stubber.add_response('describe_pipeline_execution', execution_response('Executing'), expected_params)
+        stubber.add_response('list_pipeline_execution_steps', {'PipelineExecutionSteps': [
+            step_response('step_a', 'Executing', Metadata={'ProcessingJob': {'Arn': JOB_ARN}}),
+        ]}, expected_params)
+        # Throttling doesn't fail watching, but is retried after backing off.
+        stubber.add_client_error('describe_pipeline_execution', service_error_code='ThrottlingException', http_status_code=400)
+        stubber.add_response('describe_pipeline_execution', execution_response('Failed'), expected_params)
+        stubber.add_response('list_pipeline_execution_steps', {'PipelineExecutionSteps': [
+            # step_b was never seen running.
+            step_response('step_b', 'Failed', duration=5, FailureReason='ClientError: Out of memory'),
+            step_response('step_a', 'Succeeded', duration=60, Metadata={'ProcessingJob': {'Arn': JOB_ARN}}),
+        ]}, expected_params)
+
+        # Act
+        try:
+            [outcome] = watcher.watch([EXECUTION_ARN])
+        finally:
+            logger.remove(handler_id)
+
+        stubber.assert_no_pending_responses()
+    # Assert
+    assert not outcome.succeeded
+    assert [(event.step_name, event.kind, event.duration) for event in events] == [
+        ('step_a', 'Started', None),
+        ('step_b', 'Started', None),
+        ('step_b', 'Failed', 5),
+        ('step_a', 'Succeeded', 60),
+    ]
+    assert outcome.events == events
+    assert events[2].failure_reason == 'ClientError: Out of memory'
+    assert outcome.step_durations == {'step_a': 60, 'step_b': 5}
+    # Each log line is logged exactly once.
+    assert [message for message in messages if message.startswith('[step_a]')] == [
+        '[step_a] Loading data', '[step_a] Processing data', '[step_a] Done',
+    ]
+
+
+def test_polling_tightens_near_expected_completion():
+    watcher = ExecutionWatcher(
+        boto3.client('sagemaker', region_name='us-east-1'),
+        min_poll_interval=5,
+        max_poll_interval=120,
+        expected_step_durations={'step_a': 100, 'step_b': 10},
+    )
+    now = datetime.now(timezone.utc)
+    running_steps: list[dict[str, Any]] = [
+        {'StepName': 'step_a', 'StepStatus': 'Executing', 'StartTime': now - timedelta(seconds=80)},
+        # Overdue, so it doesn't affect polling
+        {'StepName': 'step_b', 'StepStatus': 'Executing', 'StartTime': now - timedelta(seconds=60)},
+    ]
+
+    # Backs off while nothing changes ...
+    assert watcher._next_delay(10, changed=False, steps=[]) == 15
+    assert watcher._next_delay(100, changed=False, steps=[]) == 120
+    # ... but not beyond the expected completion of running steps
+    assert 19 < watcher._next_delay(60, changed=False, steps=running_steps) <= 20
+    # Changes reset the interval.
+    assert watcher._next_delay(60, changed=True, steps=running_steps) == 5
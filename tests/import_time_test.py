@@ -0,0 +1,81 @@
+"""
+Import-time budget for config-only code.
+
+CLI and Lambda-based tooling pay the import cost of this package on every invocation, so modules that only deal with configs must not import heavy dependencies such as the SageMaker SDK (which takes seconds to import). These tests import them in a fresh interpreter to enforce this.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+SRC_PATH = Path(__file__).parents[1] / 'src'
+# Modules that must be importable without loading any heavy dependency
+CONFIG_ONLY_MODULES = [
+    'sm_pipelines_oo.shared_config_schema',
+    'sm_pipelines_oo.config_loader.implementations.file_loaders',
+    'sm_pipelines_oo.steps.framework_processing_step',
+    'sm_pipelines_oo.steps.step_factory_facade',
+    'sm_pipelines_oo.pipeline',
+]
+HEAVY_MODULES = ['sagemaker', 'boto3', 'botocore']
+# Budget for cumulative import time of *all* config-only modules. Can be overwritten for slow machines.
+IMPORT_TIME_BUDGET_MS = float(os.environ.get('SMP_OO_IMPORT_TIME_BUDGET_MS', 1500))
+
+
+def _run_importtime(modules: list[str]) -> list[tuple[str, int]]:
+    """
+    Imports modules in a fresh interpreter and returns every module that was imported (directly or indirectly), together with its cumulative import time in microseconds.
+    Module names keep their indentation, which reflects by which module they were imported.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {", ".join(modules)}'],
+        env={**os.environ, 'PYTHONPATH': str(SRC_PATH)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    import_times: list[tuple[str, int]] = []
+    # Lines have the format `import time: <self [us]> | <cumulative [us]> | <indentation><module>`
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _self_us, cumulative_us, module = line.removeprefix('import time:').split('|')
+        # Drop the space that separates the module from the column separator.
+        import_times.append((module[1:], int(cumulative_us)))
+    return import_times
+
+
+def _imported_heavy_modules(module: str) -> list[str]:
+    """Imports a module in a fresh interpreter and returns which heavy modules (or any of their submodules) it imported."""
+    result = subprocess.run(
+        [
+            sys.executable, '-c',
+            f'import sys, {module}\n'
+            f'for name in {HEAVY_MODULES!r}:\n'
+            '    if any(m == name or m.startswith(name + ".") for m in sys.modules):\n'
+            '        print(name)',
+        ],
+        env={**os.environ, 'PYTHONPATH': str(SRC_PATH)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.split()
+
+
+@pytest.mark.parametrize('module', CONFIG_ONLY_MODULES)
+def test_config_only_module_does_not_import_heavy_dependencies(module: str):
+    assert _imported_heavy_modules(module) == [], f'Importing {module} should not import any heavy dependency.'
+
+
+def test_import_time_of_config_only_modules_is_within_budget():
+    # Total import time is the sum over the top-level imports, i.e. the ones without indentation.
+    total_ms = sum(
+        cumulative_us for name, cumulative_us in _run_importtime(CONFIG_ONLY_MODULES)
+        if not name.startswith(' ')
+    ) / 1000
+    assert total_ms < IMPORT_TIME_BUDGET_MS, \
+        f'Importing config-only modules took {total_ms:.0f}ms (budget: {IMPORT_TIME_BUDGET_MS:.0f}ms).'
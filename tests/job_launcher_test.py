@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+from typing import Any
+import threading
+
+import boto3
+from botocore.stub import Stubber
+
+from sm_pipelines_oo.job_launcher import JobLauncher
+
+
+def describe_response(job_name: str, status: str, duration: float | None = None) -> dict[str, Any]:
+    response: dict[str, Any] = {
+        'ProcessingJobName': job_name,
+        'ProcessingJobArn': f'arn:aws:sagemaker:us-east-1:123456789012:processing-job/{job_name}',
+        'ProcessingJobStatus': status,
+        'ProcessingResources': {
+            'ClusterConfig': {'InstanceCount': 1, 'InstanceType': 'ml.m5.large', 'VolumeSizeInGB': 30},
+        },
+        'AppSpecification': {'ImageUri': 'image'},
+        'RoleArn': 'arn:aws:iam::123456789012:role/test',
+        'CreationTime': datetime(2024, 1, 1),
+    }
+    if status == 'Failed':
+        response['FailureReason'] = 'AlgorithmError'
+    if duration is not None:
+        response['ProcessingStartTime'] = datetime(2024, 1, 1)
+        response['ProcessingEndTime'] = datetime(2024, 1, 1) + timedelta(seconds=duration)
+    return response
+
+
+def test_jobs_are_tracked_until_done():
+    # Arrange
+    sagemaker_client = boto3.client('sagemaker', region_name='us-east-1')
+    # Run one job at a time, so that the order of requests is deterministic.
+    launcher = JobLauncher(sagemaker_client, max_concurrent_jobs=1, poll_interval=0)
+    with Stubber(sagemaker_client) as stubber:
+        stubber.add_response('describe_processing_job', describe_response('job-a', 'InProgress'), {'ProcessingJobName': 'job-a'})
+        # Throttling doesn't fail the job, but is retried after backing off.
+        stubber.add_client_error('describe_processing_job', service_error_code='ThrottlingException', http_status_code=400)
+        stubber.add_response('describe_processing_job', describe_response('job-a', 'Completed', duration=60), {'ProcessingJobName': 'job-a'})
+        stubber.add_response('describe_processing_job', describe_response('job-b', 'Failed', duration=5), {'ProcessingJobName': 'job-b'})
+
+        # Act
+        summary = launcher.launch(
+            submitters={
+                'step_a': lambda: 'job-a',
+                'step_b': lambda: 'job-b',
+                'step_c': lambda: 'job-c',
+                'step_d': _raise_error,
+            },
+            # step_c must not run, since step_b failed.
+            upstream={'step_c': {'step_b'}},
+        )
+
+        stubber.assert_no_pending_responses()
+    # Assert
+    assert [(outcome.step_name, outcome.status) for outcome in summary.outcomes] == [
+        ('step_a', 'Completed'), ('step_b', 'Failed'), ('step_c', 'Skipped'), ('step_d', 'SubmissionFailed'),
+    ]
+    assert summary.outcomes[0].duration == 60
+    assert summary.outcomes[1].failure_reason == 'AlgorithmError'
+    assert not summary.succeeded
+
+
+def _raise_error() -> str:
+    raise RuntimeError('Quota exceeded')
+
+
+class _FakeSageMakerClient:
+    """Completes every job on its second poll."""
+    def __init__(self):
+        self._polls: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def describe_processing_job(self, ProcessingJobName: str) -> dict[str, Any]:
+        with self._lock:
+            self._polls[ProcessingJobName] = self._polls.get(ProcessingJobName, 0) + 1
+            status = 'Completed' if self._polls[ProcessingJobName] > 1 else 'InProgress'
+        return describe_response(ProcessingJobName, status)
+
+
+def test_concurrency_is_bounded():
+    running_jobs: set[str] = set()
+    max_running_jobs = 0
+    lock = threading.Lock()
+
+    class _Client(_FakeSageMakerClient):
+        def describe_processing_job(self, ProcessingJobName: str) -> dict[str, Any]:
+            response = super().describe_processing_job(ProcessingJobName)
+            if response['ProcessingJobStatus'] == 'Completed':
+                with lock:
+                    running_jobs.discard(ProcessingJobName)
+            return response
+
+    def make_submitter(job_name: str):
+        def submit() -> str:
+            nonlocal max_running_jobs
+            with lock:
+                running_jobs.add(job_name)
+                max_running_jobs = max(max_running_jobs, len(running_jobs))
+            return job_name
+        return submit
+
+    launcher = JobLauncher(_Client(), max_concurrent_jobs=3, poll_interval=0)  # type: ignore[arg-type]
+    summary = launcher.launch({f'step_{i}': make_submitter(f'job-{i}') for i in range(10)})
+
+    assert summary.succeeded
+    assert max_running_jobs == 3
@@ -0,0 +1,145 @@
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+from sm_pipelines_oo.config_loader.implementations.mock_config_loader import MockConfigLoader
+from sm_pipelines_oo.local_executor import LocalExecutionError, LocalExecutor, run_locally
+
+
+# Each step appends its name to the content of its (single) input file, and writes the result to its output.
+STEP_CODE = '''
+import os
+from pathlib import Path
+
+processing_dir = Path(os.environ['SM_PROCESSING_DIR'])
+content = (processing_dir / 'data').glob('*.txt').__next__().read_text()
+if os.environ.get('FAIL'):
+    raise SystemExit(1)
+(processing_dir / 'result' / 'data.txt').write_text(content + os.environ['STEP'])
+'''
+
+
+@pytest.fixture
+def source_dir(tmp_path: Path) -> Path:
+    source_dir = tmp_path / 'code'
+    source_dir.mkdir()
+    (source_dir / 'step.py').write_text(STEP_CODE)
+    return source_dir
+
+
+@pytest.fixture
+def make_local_step_config_dict(
+    make_step_config_dict: Callable[..., dict[str, Any]],
+    source_dir: Path,
+) -> Callable[..., dict[str, Any]]:
+    """Config of a step that runs STEP_CODE with a single input and output."""
+    def make_local_step_config_dict(step_name: str, input_uri: str, output_uri: str, env: dict[str, str] | None = None) -> dict[str, Any]:
+        return make_step_config_dict(
+            step_name,
+            inputs={'data': input_uri},
+            outputs={'result': output_uri},
+            processor_init_config={'env': {'STEP': step_name, **(env or {})}},
+            processor_run_config={'code': 'step.py', 'source_dir': str(source_dir)},
+        )
+    return make_local_step_config_dict
+
+
+@pytest.fixture
+def local_s3_root(tmp_path: Path) -> Path:
+    raw_data = tmp_path / 'local_s3' / 'bucket' / 'raw' / 'data.txt'
+    raw_data.parent.mkdir(parents=True)
+    raw_data.write_text('raw')
+    return tmp_path / 'local_s3'
+
+
+def test_steps_run_in_dependency_order(
+    tmp_path: Path,
+    make_local_step_config_dict: Callable[..., dict[str, Any]],
+    local_s3_root: Path,
+):
+    # Arrange
+    executor = LocalExecutor(
+        step_configs=[
+            make_local_step_config_dict('second', 's3://bucket/first', 's3://bucket/second'),
+            make_local_step_config_dict('first', 's3://bucket/raw/data.txt', 's3://bucket/first'),
+            make_local_step_config_dict('independent', 's3://bucket/raw', 's3://bucket/independent'),
+        ],
+        local_s3_root=local_s3_root,
+        work_dir=tmp_path / 'work',
+        max_workers=2,
+    )
+
+    # Act
+    results = executor.run()
+
+    # Assert
+    assert all(result.succeeded for result in results.values())
+    assert (local_s3_root / 'bucket' / 'second' / 'data.txt').read_text() == 'rawfirstsecond'
+    assert (local_s3_root / 'bucket' / 'independent' / 'data.txt').read_text() == 'rawindependent'
+
+
+def test_steps_downstream_of_failed_steps_are_skipped(
+    tmp_path: Path,
+    make_local_step_config_dict: Callable[..., dict[str, Any]],
+    local_s3_root: Path,
+):
+    executor = LocalExecutor(
+        step_configs=[
+            make_local_step_config_dict('first', 's3://bucket/raw', 's3://bucket/first', env={'FAIL': '1'}),
+            make_local_step_config_dict('second', 's3://bucket/first', 's3://bucket/second'),
+        ],
+        local_s3_root=local_s3_root,
+        work_dir=tmp_path / 'work',
+    )
+
+    with pytest.raises(LocalExecutionError) as exc_info:
+        executor.run()
+
+    assert [result.step_name for result in exc_info.value.failed_steps] == ['first']
+    assert exc_info.value.skipped_step_names == ['second']
+
+
+def test_missing_inputs_are_reported_as_failed_steps(
+    tmp_path: Path,
+    make_local_step_config_dict: Callable[..., dict[str, Any]],
+    local_s3_root: Path,
+):
+    executor = LocalExecutor(
+        step_configs=[
+            make_local_step_config_dict('missing', 's3://bucket/missing', 's3://bucket/first'),
+            make_local_step_config_dict('independent', 's3://bucket/raw', 's3://bucket/independent'),
+        ],
+        local_s3_root=local_s3_root,
+        work_dir=tmp_path / 'work',
+    )
+
+    with pytest.raises(LocalExecutionError, match='Input data') as exc_info:
+        executor.run()
+
+    [failed_step] = exc_info.value.failed_steps
+    assert failed_step.step_name == 'missing'
+    assert failed_step.returncode is None
+    assert 's3://bucket/missing' in failed_step.log_file.read_text()
+    # Independent steps still run.
+    assert (local_s3_root / 'bucket' / 'independent' / 'data.txt').read_text() == 'rawindependent'
+
+
+def test_configs_are_run_without_building_steps(
+    shared_config_dict: dict[str, Any],
+    make_local_step_config_dict: Callable[..., dict[str, Any]],
+    local_s3_root: Path,
+):
+    # No AWS role, credentials or session is needed.
+    config_loader = MockConfigLoader(
+        shared_config_dict=shared_config_dict,
+        step_configs_dicts=[
+            make_local_step_config_dict('second', 's3://bucket/first', 's3://bucket/second'),
+            make_local_step_config_dict('first', 's3://bucket/raw', 's3://bucket/first'),
+        ],
+    )
+
+    results = run_locally(config_loader, local_s3_root=local_s3_root)
+
+    assert list(results) == ['first', 'second']
+    assert (local_s3_root / 'bucket' / 'second' / 'data.txt').read_text() == 'rawfirstsecond'
@@ -0,0 +1,165 @@
+import gzip
+from pathlib import Path
+from typing import Any, Callable
+
+import boto3
+import pytest
+from botocore.stub import ANY, Stubber
+
+from sm_pipelines_oo.pipeline_definition import (
+    PipelineDefinitionCache, hash_definition, upload_pipeline_definition, upsert_pipeline,
+)
+
+
+definition = '{"Version": "2020-12-01", "Steps": []}'
+role_arn = 'arn:aws:iam::123456789012:role/test'
+
+
+@pytest.mark.parametrize('fields, is_cacheable', [
+    ({}, True),
+    ({'processor_init_config': {'instance_type': 'auto', 'instance_count': 'auto'}}, False),
+    ({'fan_out': {'input_name': 'input_1', 'strategy': 'prefix'}}, False),
+])
+def test_definitions_that_depend_on_s3_contents_are_not_fingerprinted(
+    fields: dict[str, Any],
+    is_cacheable: bool,
+    tmp_path: Path,
+    shared_config_dict: dict[str, Any],
+    make_step_config_dict: Callable[..., dict[str, Any]],
+):
+    fingerprint = PipelineDefinitionCache(tmp_path).fingerprint(
+        pipeline_name='unit-testing-v0',
+        shared_config=shared_config_dict,
+        step_configs=[make_step_config_dict('step_0'), make_step_config_dict('step_1', **fields)],
+        build_options={},
+    )
+
+    assert (fingerprint is not None) == is_cacheable
+
+
+def test_unchanged_definition_is_not_uploaded():
+    s3_client = boto3.client('s3', region_name='us-east-1')
+    with Stubber(s3_client) as stubber:
+        # Any call to put_object would fail, since no response is stubbed for it.
+        stubber.add_response(
+            'head_object',
+            {'Metadata': {'definition-sha256': hash_definition(definition)}},
+            {'Bucket': 'test-bucket', 'Key': 'definition.json'},
+        )
+
+        uploaded = upload_pipeline_definition(s3_client, definition, 'test-bucket', 'definition.json')
+
+        stubber.assert_no_pending_responses()
+    assert not uploaded
+
+
+def test_changed_definition_is_uploaded_compressed():
+    s3_client = boto3.client('s3', region_name='us-east-1')
+    with Stubber(s3_client) as stubber:
+        stubber.add_response(
+            'head_object',
+            {'Metadata': {'definition-sha256': 'outdated'}},
+            {'Bucket': 'test-bucket', 'Key': 'definition.json.gz'},
+        )
+        stubber.add_response('put_object', {}, {
+            'Bucket': 'test-bucket',
+            'Key': 'definition.json.gz',
+            'Body': gzip.compress(definition.encode(), mtime=0),
+            'ContentType': 'application/json',
+            'ContentEncoding': 'gzip',
+            # Hash is computed over the uncompressed definition.
+            'Metadata': {'definition-sha256': hash_definition(definition)},
+        })
+
+        uploaded = upload_pipeline_definition(
+            s3_client, definition, 'test-bucket', 'definition.json.gz', compress=True,
+        )
+
+        stubber.assert_no_pending_responses()
+    assert uploaded
+
+
+def test_missing_definition_is_uploaded():
+    s3_client = boto3.client('s3', region_name='us-east-1')
+    with Stubber(s3_client) as stubber:
+        stubber.add_client_error('head_object', service_error_code='404', http_status_code=404)
+        stubber.add_response('put_object', {}, {
+            'Bucket': 'test-bucket', 'Key': 'definition.json', 'Body': definition.encode(),
+            'ContentType': 'application/json', 'Metadata': ANY,
+        })
+
+        assert upload_pipeline_definition(s3_client, definition, 'test-bucket', 'definition.json')
+
+
+# Deploying
+# =========
+
+def _upsert(sm_client) -> str:
+    return upsert_pipeline(
+        sm_client, 'test-pipeline', definition, bucket='test-bucket', key='definition.json', role_arn=role_arn,
+    )
+
+
+def test_missing_pipeline_is_created():
+    sm_client = boto3.client('sagemaker', region_name='us-east-1')
+    with Stubber(sm_client) as stubber:
+        stubber.add_client_error('describe_pipeline', service_error_code='ResourceNotFound', http_status_code=400)
+        stubber.add_response('create_pipeline', {}, {
+            'PipelineName': 'test-pipeline',
+            'PipelineDefinitionS3Location': {'Bucket': 'test-bucket', 'ObjectKey': 'definition.json'},
+            'RoleArn': role_arn,
+        })
+
+        assert _upsert(sm_client) == 'created'
+        stubber.assert_no_pending_responses()
+
+
+@pytest.mark.parametrize('deployed_definition, deployed_role_arn, expected_result', [
+    # Formatting doesn't matter
+    ('{"Steps": [], "Version": "2020-12-01"}', role_arn, 'unchanged'),
+    ('{"Version": "2020-12-01", "Steps": [{"Name": "old"}]}', role_arn, 'updated'),
+    (definition, 'arn:aws:iam::123456789012:role/other', 'updated'),
+])
+def test_existing_pipeline_is_only_updated_if_changed(deployed_definition, deployed_role_arn, expected_result):
+    sm_client = boto3.client('sagemaker', region_name='us-east-1')
+    with Stubber(sm_client) as stubber:
+        stubber.add_response(
+            'describe_pipeline',
+            {'PipelineDefinition': deployed_definition, 'RoleArn': deployed_role_arn},
+            {'PipelineName': 'test-pipeline'},
+        )
+        # If the pipeline is unchanged, any call to update_pipeline would fail, since its response is never reached.
+        if expected_result == 'updated':
+            stubber.add_response('update_pipeline', {}, {
+                'PipelineName': 'test-pipeline',
+                'PipelineDefinitionS3Location': {'Bucket': 'test-bucket', 'ObjectKey': 'definition.json'},
+                'RoleArn': role_arn,
+            })
+
+        assert _upsert(sm_client) == expected_result
+        stubber.assert_no_pending_responses()
+
+
+def test_changed_parallelism_is_updated():
+    sm_client = boto3.client('sagemaker', region_name='us-east-1')
+    with Stubber(sm_client) as stubber:
+        stubber.add_response(
+            'describe_pipeline',
+            {
+                'PipelineDefinition': definition, 'RoleArn': role_arn,
+                'ParallelismConfiguration': {'MaxParallelExecutionSteps': 50},
+            },
+            {'PipelineName': 'test-pipeline'},
+        )
+        stubber.add_response('update_pipeline', {}, {
+            'PipelineName': 'test-pipeline',
+            'PipelineDefinitionS3Location': {'Bucket': 'test-bucket', 'ObjectKey': 'definition.json'},
+            'RoleArn': role_arn,
+            'ParallelismConfiguration': {'MaxParallelExecutionSteps': 10},
+        })
+
+        assert upsert_pipeline(
+            sm_client, 'test-pipeline', definition, bucket='test-bucket', key='definition.json', role_arn=role_arn,
+            max_parallel_execution_steps=10,
+        ) == 'updated'
+        stubber.assert_no_pending_responses()
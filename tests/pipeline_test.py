@@ -0,0 +1,82 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from sm_pipelines_oo.cli import main
+from sm_pipelines_oo.config_loader.implementations.file_loaders import YamlConfigLoader
+from sm_pipelines_oo.pipeline import PipelineFacade
+from sm_pipelines_oo.steps.step_factory_facade import StepFactoryFacade
+
+
+CONFIG_PATH = Path(__file__).parent / 'config_loader' / 'config_files'
+
+
+class FakePipeline:
+    def __init__(self, definition: str):
+        self._definition = definition
+        self.steps: list = []
+        self.parameters: list = []
+
+    def definition(self) -> str:
+        return self._definition
+
+
+@pytest.fixture
+def config_root(tmp_path: Path, monkeypatch) -> Path:
+    shutil.copytree(CONFIG_PATH, tmp_path / 'config')
+    # source_dir in config is relative to the current directory
+    (tmp_path / 'worker_code' / 'preprocess').mkdir(parents=True)
+    (tmp_path / 'worker_code' / 'preprocess' / 'preprocess.py').write_text('print(1)')
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / 'config'
+
+
+@pytest.fixture
+def builds(monkeypatch) -> list[int]:
+    """Replaces building steps (which requires AWS) with a fake pipeline. Records the number of builds."""
+    builds: list[int] = []
+
+    def build_pipeline(self: PipelineFacade) -> None:
+        builds.append(1)
+        self._built_pipeline = FakePipeline(f'{{"build": {len(builds)}}}')  # type: ignore[assignment]
+        self._built_step_factory_facade = StepFactoryFacade([], role_arn='mock-role-arn', pipeline_session=None)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(PipelineFacade, '_build_pipeline', build_pipeline)
+    return builds
+
+
+def _create_facade(config_root: Path, cache_dir: Path) -> PipelineFacade:
+    return PipelineFacade(
+        env='dev',
+        custom_config_loader=YamlConfigLoader('dev', str(config_root)),
+        definition_cache_dir=str(cache_dir),
+    )
+
+
+def test_cached_definition_is_reused_until_code_changes(config_root: Path, tmp_path: Path, builds: list[int]):
+    cache_dir = tmp_path / 'cache'
+    assert _create_facade(config_root, cache_dir).definition() == '{"build": 1}'
+
+    # Nothing changed, so nothing is built.
+    facade = _create_facade(config_root, cache_dir)
+    assert facade.definition() == '{"build": 1}'
+    assert len(builds) == 1
+
+    # Once the pipeline is modified, its definition is generated again.
+    facade.remove_step('preprocessing')
+    assert facade.definition() == '{"build": 2}'
+
+    # Changing code invalidates the cached definition.
+    Path('worker_code/preprocess/preprocess.py').write_text('print(2)')
+    assert _create_facade(config_root, cache_dir).definition() == '{"build": 3}'
+
+
+def test_cli_prints_cached_definition(config_root: Path, tmp_path: Path, builds: list[int], capsys):
+    cache_dir = tmp_path / 'cache'
+    _create_facade(config_root, cache_dir).definition()
+
+    main(['definition', 'dev', '--config-root', str(config_root), '--cache-dir', str(cache_dir)])
+
+    assert capsys.readouterr().out == '{"build": 1}'
+    assert len(builds) == 1
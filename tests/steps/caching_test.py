@@ -0,0 +1,60 @@
+from typing import Any, Callable
+
+from sm_pipelines_oo.shared_config_schema import StepCacheConfig
+from sm_pipelines_oo.steps.caching import create_cache_report, find_changed_values, get_cache_config
+from sm_pipelines_oo.steps.framework_processing_step import StepConfig
+
+
+def test_step_cache_config_overrides_shared_default(
+    shared_config_dict: dict[str, Any],
+    make_step_config_dict: Callable[..., dict[str, Any]],
+):
+    shared_default = {**shared_config_dict, 'step_cache_config': {'enabled': True, 'expire_after': 'P30D'}}
+    inheriting_step = StepConfig(**{**make_step_config_dict('step_0'), 'shared_config': shared_default})
+    overriding_step = StepConfig(**{
+        **make_step_config_dict('step_1'),
+        'shared_config': shared_default,
+        'cache_config': {'enabled': False},
+    })
+
+    assert get_cache_config(inheriting_step) == StepCacheConfig(enabled=True, expire_after='P30D')
+    assert get_cache_config(overriding_step) == StepCacheConfig(enabled=False)
+
+
+def test_report_flags_volatile_interpolations(make_step_config_dict: Callable[..., dict[str, Any]]):
+    # Arrange
+    volatile_step_config_dict = make_step_config_dict('volatile')
+    volatile_step_config_dict['processor_init_config']['env'] = {'RUN_ID': 'run-${now:%Y%m%d%H%M}'}
+    static_step_config_dict = make_step_config_dict('static', inputs={'raw': 's3://test-bucket/raw/date=2024-01-01/'})
+    static_step_config_dict['processor_init_config']['env'] = {'RUN_DATE': '2024-05-01T12:00:00'}
+    step_configs = [
+        StepConfig(**{**step_config_dict, 'cache_config': {'enabled': True}})
+        for step_config_dict in [static_step_config_dict, volatile_step_config_dict]
+    ]
+
+    # Act
+    static_report, volatile_report = create_cache_report(step_configs)
+
+    # Assert
+    # Values that merely look like timestamps don't change between builds.
+    assert static_report.is_cacheable
+    assert not volatile_report.is_cacheable
+    assert list(volatile_report.volatile_values) == ['processor_init_config.env.RUN_ID']
+
+
+def test_report_flags_values_that_change_between_loads(make_step_config_dict: Callable[..., dict[str, Any]]):
+    # Arrange
+    first_load = [make_step_config_dict('stable'), make_step_config_dict('volatile')]
+    second_load = [make_step_config_dict('stable'), make_step_config_dict('volatile')]
+    first_load[1]['processor_init_config']['env'] = {'STARTED_AT': '2024-05-01T12:00:00'}
+    second_load[1]['processor_init_config']['env'] = {'STARTED_AT': '2024-05-01T12:00:01'}
+    step_configs = [StepConfig(**{**step_config_dict, 'cache_config': {'enabled': True}}) for step_config_dict in first_load]
+
+    # Act
+    stable_report, volatile_report = create_cache_report(
+        step_configs, changed_values=find_changed_values(first_load, second_load),
+    )
+
+    # Assert
+    assert stable_report.is_cacheable
+    assert list(volatile_report.volatile_values) == ['processor_init_config.env.STARTED_AT']
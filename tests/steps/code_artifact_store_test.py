@@ -0,0 +1,62 @@
+import os
+from pathlib import Path
+
+import boto3
+import pytest
+from botocore.stub import ANY, Stubber
+
+from sm_pipelines_oo.steps.code_artifact_store import CodeArtifactStore, create_deterministic_tarball
+
+
+@pytest.fixture
+def source_dir(tmp_path: Path) -> Path:
+    source_dir = tmp_path / 'code'
+    (source_dir / 'utils').mkdir(parents=True)
+    (source_dir / 'code.py').write_text('print("hello")')
+    (source_dir / 'utils' / 'helpers.py').write_text('VALUE = 1')
+    return source_dir
+
+
+def test_tarball_only_depends_on_content(source_dir: Path):
+    original_tarball = create_deterministic_tarball(source_dir)
+
+    # Touching files or adding byte code does not change the tarball ...
+    os.utime(source_dir / 'code.py', (0, 0))
+    (source_dir / '__pycache__').mkdir()
+    (source_dir / '__pycache__' / 'code.cpython-311.pyc').write_bytes(b'bytecode')
+    assert create_deterministic_tarball(source_dir) == original_tarball
+
+    # ... but changing code does.
+    (source_dir / 'utils' / 'helpers.py').write_text('VALUE = 2')
+    assert create_deterministic_tarball(source_dir) != original_tarball
+
+
+def test_artifact_is_uploaded_once_and_shared(source_dir: Path):
+    # Arrange
+    s3_client = boto3.client('s3', region_name='us-east-1')
+    store = CodeArtifactStore(s3_client=s3_client, bucket_name='test-bucket')
+    with Stubber(s3_client) as stubber:
+        # Artifact does not exist yet, so it is uploaded. (No further requests are expected.)
+        stubber.add_client_error('head_object', service_error_code='404', http_status_code=404)
+        stubber.add_response('put_object', {}, {'Bucket': 'test-bucket', 'Key': ANY, 'Body': ANY})
+
+        # Act
+        uris = [store.get_artifact_uri(str(source_dir)) for _ in range(3)]
+
+        # Assert
+        stubber.assert_no_pending_responses()
+    assert len(set(uris)) == 1
+    assert uris[0].startswith('s3://test-bucket/code_artifacts/')
+    assert uris[0].endswith('/sourcedir.tar.gz')
+
+
+def test_existing_artifact_is_not_uploaded_again(source_dir: Path):
+    s3_client = boto3.client('s3', region_name='us-east-1')
+    store = CodeArtifactStore(s3_client=s3_client, bucket_name='test-bucket')
+    with Stubber(s3_client) as stubber:
+        # Any call to put_object would fail, since no response is stubbed for it.
+        stubber.add_response('head_object', {}, {'Bucket': 'test-bucket', 'Key': ANY})
+
+        store.get_artifact_uri(str(source_dir))
+
+        stubber.assert_no_pending_responses()
@@ -0,0 +1,69 @@
+from typing import Any, Callable
+
+import pytest
+from sagemaker.workflow.pipeline_context import LocalPipelineSession
+
+from sm_pipelines_oo.steps.dag import CyclicDependencyError, Edge, StepDag
+from sm_pipelines_oo.steps.step_factory_facade import StepFactoryFacade
+
+
+@pytest.fixture
+def step_config_dicts(make_step_config_dict: Callable[..., dict[str, Any]]) -> list[dict[str, Any]]:
+    """Diamond: extract -> (clean, features) -> train. Plus an independent step."""
+    return [
+        make_step_config_dict('train', {'clean': 's3://bucket/clean/', 'features': 's3://bucket/features/part-0.csv'}, {'model': 's3://bucket/model'}),
+        make_step_config_dict('clean', {'raw': 's3://bucket/raw'}, {'clean': 's3://bucket/clean'}),
+        make_step_config_dict('features', {'raw': 's3://bucket/raw'}, {'features': 's3://bucket/features'}),
+        make_step_config_dict('extract', {'source': 's3://external/source'}, {'raw': 's3://bucket/raw'}),
+        make_step_config_dict('report', {'source': 's3://external/source'}, {'report': 's3://bucket/report'}),
+    ]
+
+
+def test_edges_and_generations(step_config_dicts: list[dict[str, Any]]):
+    dag = StepDag(step_config_dicts)
+
+    assert dag.edges['train'] == [
+        # Exact match (ignoring trailing slash) is referenced via its output ...
+        Edge(upstream_step_name='clean', input_name='clean', output_name='clean'),
+        # ... while an input *within* an output is not.
+        Edge(upstream_step_name='features', input_name='features', output_name=None),
+    ]
+    assert dag.generations() == [['extract', 'report'], ['clean', 'features'], ['train']]
+
+
+def test_cycles_are_detected(make_step_config_dict: Callable[..., dict[str, Any]]):
+    dag = StepDag([
+        make_step_config_dict('a', {'in': 's3://bucket/c'}, {'out': 's3://bucket/a'}),
+        make_step_config_dict('b', {'in': 's3://bucket/a'}, {'out': 's3://bucket/b'}),
+        make_step_config_dict('c', {'in': 's3://bucket/b'}, {'out': 's3://bucket/c'}),
+        make_step_config_dict('d', {'in': 's3://external/source'}, {'out': 's3://bucket/d'}),
+    ])
+
+    with pytest.raises(CyclicDependencyError) as exc_info:
+        dag.generations()
+
+    assert exc_info.value.cycle == ['a', 'c', 'b', 'a']
+
+
+def test_steps_reference_upstream_outputs(step_config_dicts: list[dict[str, Any]]):
+    # Arrange
+    facade = StepFactoryFacade(
+        step_config_dicts=step_config_dicts,
+        role_arn='mock-role-arn',
+        pipeline_session=LocalPipelineSession(),
+    )
+
+    # Act
+    steps = {step.name: step for step in facade.create_all_steps()}
+
+    # Assert
+    train_inputs = {
+        processing_input.input_name: processing_input.source
+        for processing_input in steps['train'].step_args.func_kwargs['inputs']  # type: ignore[attr-defined]
+    }
+    assert train_inputs['clean'].expr == {
+        'Get': "Steps.clean.ProcessingOutputConfig.Outputs['clean'].S3Output.S3Uri"
+    }
+    assert train_inputs['features'] == 's3://bucket/features/part-0.csv'
+    assert steps['train'].depends_on == [steps['features']]
+    assert steps['report'].depends_on is None
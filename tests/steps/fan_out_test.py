@@ -0,0 +1,140 @@
+import json
+from typing import Any, Callable
+
+import pytest
+from pydantic import ValidationError
+
+from sm_pipelines_oo.steps.dag import Edge, StepDag
+from sm_pipelines_oo.steps.fan_out import expand_fan_out
+from sm_pipelines_oo.steps.framework_processing_step import StepConfig
+
+
+class FakeS3Client:
+    """Lists (and stores) objects of a single bucket in memory."""
+    def __init__(self, keys: list[str]):
+        self.objects: dict[str, bytes] = {key: b'' for key in keys}
+
+    def get_paginator(self, operation_name: str) -> 'FakeS3Client':
+        assert operation_name == 'list_objects_v2'
+        return self
+
+    def paginate(self, Bucket: str, Prefix: str, Delimiter: str | None = None) -> list[dict[str, Any]]:
+        keys = sorted(key for key in self.objects if key.startswith(Prefix))
+        if Delimiter is None:
+            return [{'Contents': [{'Key': key} for key in keys]}]
+        common_prefixes = sorted({
+            Prefix + key.removeprefix(Prefix).split(Delimiter)[0] + Delimiter
+            for key in keys if Delimiter in key.removeprefix(Prefix)
+        })
+        return [{'CommonPrefixes': [{'Prefix': prefix} for prefix in common_prefixes]}]
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes) -> None:
+        self.objects[Key] = Body
+
+
+@pytest.fixture
+def make_fanned_out_config(make_step_config_dict: Callable[..., dict[str, Any]]) -> Callable[[dict[str, Any]], StepConfig]:
+    def make_fanned_out_config(fan_out: dict[str, Any]) -> StepConfig:
+        return StepConfig(**make_step_config_dict(
+            'features',
+            inputs={'raw': 's3://test-bucket/raw/', 'lookup': 's3://test-bucket/lookup/'},
+            outputs={'features': 's3://test-bucket/features/'},
+            fan_out=fan_out,
+        ))
+    return make_fanned_out_config
+
+
+@pytest.fixture
+def make_downstream_config_dict(make_step_config_dict: Callable[..., dict[str, Any]]) -> Callable[[str], dict[str, Any]]:
+    """Config of a step that reads the given S3 URI."""
+    return lambda input_uri: make_step_config_dict(
+        'train', inputs={'features': input_uri}, outputs={'model': 's3://test-bucket/model/'},
+    )
+
+
+def test_partitions_are_fanned_out_and_merged(
+    make_fanned_out_config: Callable[[dict[str, Any]], StepConfig],
+    make_downstream_config_dict: Callable[[str], dict[str, Any]],
+):
+    s3_client = FakeS3Client([
+        'raw/date=2024-01-01/a.csv',
+        'raw/date=2024-01-02/b.csv',
+        'raw/other=1/c.csv',
+        'raw/_SUCCESS',
+    ])
+    step_config = make_fanned_out_config({
+        'input_name': 'raw', 'strategy': 'partition', 'partition_key': 'date', 'merge': {'code': 'merge.py'},
+    })
+
+    shard_1, shard_2, merge = expand_fan_out(step_config, s3_client)  # type: ignore[arg-type]
+
+    assert shard_1.step_name == 'features-date-2024-01-01'
+    assert shard_1.processor_run_config.inputs['raw'].s3_uri == 's3://test-bucket/raw/date=2024-01-01/'
+    # Other inputs are read in full by every shard.
+    assert shard_2.processor_run_config.inputs['lookup'].s3_uri == 's3://test-bucket/lookup/'
+    assert shard_2.processor_run_config.outputs['features'].s3_uri == 's3://test-bucket/features-shards/date=2024-01-02/'
+    assert merge.step_name == 'features-merge'
+    assert merge.processor_run_config.code == 'merge.py'
+    assert merge.processor_run_config.source_dir == 'code_dir/'
+    assert list(merge.processor_run_config.inputs) == ['features_shards']
+    assert merge.processor_run_config.inputs['features_shards'].s3_uri == 's3://test-bucket/features-shards/'
+    assert merge.processor_run_config.outputs['features'].s3_uri == 's3://test-bucket/features/'
+
+    # Downstream steps read the merged output.
+    dag = StepDag([shard_1, shard_2, merge, make_downstream_config_dict('s3://test-bucket/features/')])
+    assert dag.edges['features-merge'] == [
+        Edge('features-date-2024-01-01', 'features_shards', output_name=None),
+        Edge('features-date-2024-01-02', 'features_shards', output_name=None),
+    ]
+    assert dag.edges['train'] == [Edge('features-merge', 'features', 'features')]
+    assert dag.generations() == [['features-date-2024-01-01', 'features-date-2024-01-02'], ['features-merge'], ['train']]
+
+
+def test_hash_buckets_are_read_through_manifests(
+    make_fanned_out_config: Callable[[dict[str, Any]], StepConfig],
+    make_downstream_config_dict: Callable[[str], dict[str, Any]],
+):
+    keys = [f'raw/part-{i}.csv' for i in range(20)]
+    s3_client = FakeS3Client(keys)
+    step_config = make_fanned_out_config({'input_name': 'raw', 'strategy': 'hash', 'n_buckets': 3})
+
+    shard_configs = expand_fan_out(step_config, s3_client)  # type: ignore[arg-type]
+
+    assert [config.step_name for config in shard_configs] == ['features-bucket-0', 'features-bucket-1', 'features-bucket-2']
+    listed_keys: list[str] = []
+    for shard_config in shard_configs:
+        shard_input = shard_config.processor_run_config.inputs['raw']
+        assert shard_input.s3_data_type == 'ManifestFile'
+        assert shard_input.s3_uri.startswith('s3://test-bucket/fan_out_manifests/features/')
+        prefix_entry, *relative_keys = json.loads(s3_client.objects[shard_input.s3_uri.removeprefix('s3://test-bucket/')])
+        assert prefix_entry == {'prefix': 's3://test-bucket/raw/'}
+        listed_keys.extend(relative_keys)
+    # Every object is in exactly one bucket.
+    assert sorted(listed_keys) == sorted(key.removeprefix('raw/') for key in keys)
+
+    # Without merge step, downstream steps that read the whole output depend on all shards.
+    dag = StepDag([*shard_configs, make_downstream_config_dict('s3://test-bucket/features')])
+    assert [edge.upstream_step_name for edge in dag.edges['train']] == [config.step_name for config in shard_configs]
+    assert all(edge.output_name is None for edge in dag.edges['train'])
+
+
+def test_too_many_shards_are_rejected(make_fanned_out_config: Callable[[dict[str, Any]], StepConfig]):
+    s3_client = FakeS3Client([f'raw/customer={i}/data.csv' for i in range(3)])
+    step_config = make_fanned_out_config({'input_name': 'raw', 'strategy': 'prefix', 'max_shards': 2})
+
+    with pytest.raises(ValueError, match='max_shards'):
+        expand_fan_out(step_config, s3_client)  # type: ignore[arg-type]
+
+
+@pytest.mark.parametrize('fan_out, error_message', [
+    ({'input_name': 'missing', 'strategy': 'prefix'}, 'S3 input'),
+    ({'input_name': 'raw', 'strategy': 'hash'}, 'n_buckets'),
+    ({'input_name': 'raw', 'strategy': 'prefix', 'partition_key': 'date'}, 'partition_key'),
+])
+def test_invalid_fan_out_configs(
+    fan_out: dict[str, Any],
+    error_message: str,
+    make_fanned_out_config: Callable[[dict[str, Any]], StepConfig],
+):
+    with pytest.raises(ValidationError, match=error_message):
+        make_fanned_out_config(fan_out)
@@ -169,3 +169,122 @@ def test_construct_processing_input_output(run_config_dict: dict[str, Any], expe
         # Ignore type error - we know that the source and destination are strings, not PipelineVars.
         assert_directories_are_equal(actual_output.source, expected_output.source) # type: ignore
         assert_directories_are_equal(actual_output.destination, expected_output.destination) # type: ignore
+
+
+def test_long_form_inputs_and_outputs():
+    step_config_dict = {
+        'step_name': 'testing',
+        'step_factory_class': 'FrameworkProcessingStepFactory',
+        'processor_init_config': {
+            'framework_version': '0.23-1',
+            'estimator_cls_name': 'SKLearn',
+            'instance_count': 4,
+            'instance_type': 'ml.m5.large'
+        },
+        'processor_run_config': {
+            'code': 'code.py',
+            'source_dir': 'code_dir/',
+            'inputs': {
+                # Long form
+                'sharded': {
+                    's3_uri': 's3://test_bucket/sharded/',
+                    's3_data_distribution_type': 'ShardedByS3Key',
+                    's3_input_mode': 'Pipe',
+                    's3_compression_type': 'Gzip',
+                },
+                # Short form (which keeps defaults)
+                'replicated': 's3://test_bucket/replicated/',
+            },
+            'outputs': {
+                'output_1': {'s3_uri': 's3://test_bucket/output_1/', 's3_upload_mode': 'Continuous'},
+            },
+        },
+        'shared_config': {
+            'project_name': 'unit-testing',
+            'project_version': '0',
+            'region': 'us-east-1',
+            'project_bucket_name': 'test-bucket',
+            'role_name': 'test_role'
+        }
+    }
+    run_args: RunArgs = StepFactory(
+        step_config_dict=step_config_dict,
+        role_arn='mock-role-arn',
+        pipeline_session=LocalPipelineSession()
+    )._construct_run_args()
+
+    sharded_input, replicated_input = run_args['inputs']
+    assert sharded_input.source == 's3://test_bucket/sharded/'
+    assert sharded_input.s3_data_distribution_type == 'ShardedByS3Key'
+    assert sharded_input.s3_input_mode == 'Pipe'
+    assert sharded_input.s3_compression_type == 'Gzip'
+    assert replicated_input.s3_data_distribution_type == 'FullyReplicated'
+    assert replicated_input.s3_input_mode == 'File'
+    assert run_args['outputs'][0].s3_upload_mode == 'Continuous'
+
+
+def test_athena_input():
+    step_config_dict = {
+        'step_name': 'testing',
+        'step_factory_class': 'FrameworkProcessingStepFactory',
+        'processor_init_config': {
+            'framework_version': '0.23-1',
+            'estimator_cls_name': 'SKLearn',
+            'instance_count': 1,
+            'instance_type': 'ml.m5.large'
+        },
+        'processor_run_config': {
+            'code': 'code.py',
+            'source_dir': 'code_dir/',
+            'inputs': {
+                'events': {
+                    'athena_query': {
+                        'database': 'analytics',
+                        'query_string': "SELECT user_id, amount FROM events WHERE dt = '2024-01-01'",
+                        'output_s3_uri': 's3://test_bucket/athena/',
+                    },
+                    's3_data_distribution_type': 'ShardedByS3Key',
+                },
+            },
+            'outputs': {
+                'output_1': 's3://test_bucket/output_1/',
+            },
+        },
+        'shared_config': {
+            'project_name': 'unit-testing',
+            'project_version': '0',
+            'region': 'us-east-1',
+            'project_bucket_name': 'test-bucket',
+            'role_name': 'test_role'
+        }
+    }
+    run_args: RunArgs = StepFactory(
+        step_config_dict=step_config_dict,
+        role_arn='mock-role-arn',
+        pipeline_session=LocalPipelineSession()
+    )._construct_run_args()
+
+    request_dict = run_args['inputs'][0]._to_request_dict()
+    assert 'S3Input' not in request_dict
+    assert request_dict['DatasetDefinition'] == {
+        'AthenaDatasetDefinition': {
+            'Catalog': 'AwsDataCatalog',
+            'Database': 'analytics',
+            'QueryString': "SELECT user_id, amount FROM events WHERE dt = '2024-01-01'",
+            'OutputS3Uri': 's3://test_bucket/athena/',
+            'OutputFormat': 'PARQUET',
+        },
+        'LocalPath': '/opt/ml/processing/events',
+        'DataDistributionType': 'ShardedByS3Key',
+        'InputMode': 'File',
+    }
+
+
+def test_input_requires_single_source():
+    with pytest.raises(ValueError, match='exactly one'):
+        _RunConfig(
+            code='code.py',
+            source_dir='code_dir/',
+            inputs={'input_1': {'s3_data_distribution_type': 'ShardedByS3Key'}},
+            outputs={},
+        )
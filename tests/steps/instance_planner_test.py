@@ -0,0 +1,151 @@
+from typing import Any
+import io
+import json
+
+import boto3
+import pytest
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+from sagemaker.workflow.pipeline_context import LocalPipelineSession
+
+from sm_pipelines_oo.steps.framework_processing_step import StepFactory
+from sm_pipelines_oo.steps.instance_planner import InputStats, InstancePlanner, SizingTier
+
+
+sizing_policy: list[SizingTier] = [
+    SizingTier(max_input_bytes=1000, instance_type='ml.m5.large'),
+    SizingTier(max_input_bytes=100_000, max_object_count=10, instance_type='ml.m5.xlarge'),
+    SizingTier(instance_type='ml.m5.4xlarge', instance_count=4),
+]
+
+
+def stub_listing(stubber: Stubber, prefix: str, pages: list[list[int]]) -> None:
+    """Stubs a paginated listing of the given prefix, with one page per list of object sizes."""
+    for i, sizes in enumerate(pages):
+        is_last_page = i == len(pages) - 1
+        response: dict[str, Any] = {
+            'Contents': [{'Key': f'{prefix}/{i}_{j}', 'Size': size} for j, size in enumerate(sizes)],
+            'IsTruncated': not is_last_page,
+        }
+        expected_params: dict[str, Any] = {'Bucket': 'test-bucket', 'Prefix': prefix}
+        if not is_last_page:
+            response['NextContinuationToken'] = f'token_{i}'
+        if i > 0:
+            expected_params['ContinuationToken'] = f'token_{i - 1}'
+        stubber.add_response('list_objects_v2', response, expected_params)
+
+
+@pytest.mark.parametrize('pages, expected_instance_type, expected_instance_count', [
+    ([[100, 200]], 'ml.m5.large', 1),
+    ([[500] * 5, [500] * 5], 'ml.m5.xlarge', 1),
+    # Small, but too many objects for the second tier
+    ([[200] * 5, [200] * 6], 'ml.m5.4xlarge', 4),
+])
+def test_plan_picks_first_fitting_tier(pages, expected_instance_type, expected_instance_count):
+    s3_client = boto3.client('s3', region_name='us-east-1')
+    planner = InstancePlanner(s3_client=s3_client, max_workers=1)
+    with Stubber(s3_client) as stubber:
+        stub_listing(stubber, 'data', pages)
+
+        decision = planner.plan(['s3://test-bucket/data'], sizing_policy=sizing_policy)
+
+        stubber.assert_no_pending_responses()
+    assert decision.instance_type == expected_instance_type
+    assert decision.instance_count == expected_instance_count
+    assert decision.input_stats == InputStats(
+        total_bytes=sum(map(sum, pages)), object_count=sum(map(len, pages))
+    )
+
+
+def test_manifest_inputs_are_measured_by_listed_objects():
+    s3_client = boto3.client('s3', region_name='us-east-1')
+    planner = InstancePlanner(s3_client=s3_client, max_workers=1)
+    manifest = json.dumps([{'prefix': 's3://test-bucket/data'}, '/0_0', '/0_2']).encode()
+    with Stubber(s3_client) as stubber:
+        stubber.add_response(
+            'get_object',
+            {'Body': StreamingBody(io.BytesIO(manifest), len(manifest))},
+            {'Bucket': 'test-bucket', 'Key': 'manifests/shard.manifest'},
+        )
+        # Objects that are not listed in the manifest (such as the one of size 5000) are read by other shards.
+        stub_listing(stubber, 'data', [[100, 5000, 200]])
+
+        decision = planner.plan(
+            [], sizing_policy=sizing_policy, manifest_uris=['s3://test-bucket/manifests/shard.manifest'],
+        )
+
+        stubber.assert_no_pending_responses()
+    assert decision.input_stats == InputStats(total_bytes=300, object_count=2)
+    assert decision.instance_type == 'ml.m5.large'
+
+
+def test_plan_fails_without_unbounded_tier():
+    s3_client = boto3.client('s3', region_name='us-east-1')
+    planner = InstancePlanner(s3_client=s3_client)
+    with Stubber(s3_client) as stubber:
+        stub_listing(stubber, 'data', [[2000]])
+
+        with pytest.raises(ValueError, match='No tier'):
+            planner.plan(['s3://test-bucket/data'], sizing_policy=sizing_policy[:1])
+
+
+def test_step_factory_resolves_auto_sizing():
+    # Arrange
+    step_config_dict: dict[str, Any] = {
+        'step_name': 'testing',
+        'step_factory_class': 'FrameworkProcessor',
+        'processor_init_config': {
+            'framework_version': '0.23-1',
+            'estimator_cls_name': 'SKLearn',
+            'instance_count': 'auto',
+            'instance_type': 'auto',
+            'sizing_policy': [tier.model_dump() for tier in sizing_policy],
+        },
+        'processor_run_config': {
+            'code': 'code.py',
+            'source_dir': 'code_dir/',
+            'inputs': {'input_1': 's3://test-bucket/data'},
+            'outputs': {'output_1': 's3://test-bucket/output_1'},
+        },
+        'shared_config': {
+            'project_name': 'unit-testing',
+            'project_version': '0',
+            'region': 'us-east-1',
+            'project_bucket_name': 'test-bucket',
+            'role_name': 'test_role',
+        },
+    }
+    s3_client = boto3.client('s3', region_name='us-east-1')
+    step_factory = StepFactory(
+        step_config_dict=step_config_dict,
+        role_arn='mock-role-arn',
+        pipeline_session=LocalPipelineSession(),
+        instance_planner=InstancePlanner(s3_client=s3_client),
+    )
+
+    with Stubber(s3_client) as stubber:
+        stub_listing(stubber, 'data', [[50_000]])
+
+        # Act
+        processor = step_factory.get_processor(as_pipeline=True)
+        # Inputs are only measured once per step.
+        step_factory.get_processor(as_pipeline=True)
+
+        stubber.assert_no_pending_responses()
+    # Assert
+    assert step_factory.sizing_decision is not None
+    assert step_factory.sizing_decision.tier == 1
+    assert processor.instance_type == 'ml.m5.xlarge'
+    assert processor.instance_count == 1
+
+
+def test_auto_sizing_requires_both_type_and_count():
+    from sm_pipelines_oo.steps.framework_processing_step import _InitConfig
+
+    with pytest.raises(ValueError, match='auto sizing'):
+        _InitConfig(
+            framework_version='0.23-1',
+            estimator_cls_name='SKLearn',
+            instance_count=2,
+            instance_type='auto',
+        )
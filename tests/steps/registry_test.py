@@ -0,0 +1,44 @@
+import sys
+from importlib.metadata import EntryPoint
+
+import pytest
+
+from sm_pipelines_oo.steps import registry
+from sm_pipelines_oo.steps.registry import LazyRegistry
+
+
+def test_entries_are_imported_only_when_used(monkeypatch: pytest.MonkeyPatch):
+    # Arrange
+    # Entry point of a (fake) plugin, pointing to a module that is not imported yet
+    monkeypatch.delitem(sys.modules, 'json.tool', raising=False)
+    monkeypatch.setattr(
+        registry, 'entry_points',
+        lambda group: [EntryPoint(name='Plugin', value='json.tool:main', group=group)],
+    )
+    test_registry: LazyRegistry = LazyRegistry(
+        entry_point_group='sm_pipelines_oo.test',
+        builtins={'Builtin': 'json:JSONDecoder'},
+    )
+
+    # Act & Assert
+    assert set(test_registry) == {'Builtin', 'Plugin'}
+    assert 'Plugin' in test_registry
+    assert 'json.tool' not in sys.modules
+
+    import json.tool
+    assert test_registry['Plugin'] is json.tool.main
+    assert test_registry['Builtin'] is json.JSONDecoder
+
+
+def test_registered_entries_take_precedence(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(registry, 'entry_points', lambda group: [])
+    test_registry: LazyRegistry = LazyRegistry(
+        entry_point_group='sm_pipelines_oo.test',
+        builtins={'Estimator': 'json:JSONDecoder'},
+    )
+
+    test_registry.register('Estimator', dict)
+
+    assert test_registry['Estimator'] is dict
+    with pytest.raises(KeyError, match='Available: Estimator'):
+        test_registry['Unknown']
@@ -0,0 +1,91 @@
+from typing import Any, Callable
+
+import pytest
+from pydantic import ValidationError
+from sagemaker.workflow.parameters import ParameterInteger, ParameterString
+from sagemaker.workflow.pipeline_context import LocalPipelineSession
+
+from sm_pipelines_oo.steps.framework_processing_step import StepConfig, StepFactory
+from sm_pipelines_oo.steps.runtime_parameters import merge_pipeline_parameters
+from sm_pipelines_oo.steps.step_factory_facade import StepFactoryFacade
+
+
+@pytest.fixture
+def make_parameterized_config_dict(make_step_config_dict: Callable[..., dict[str, Any]]) -> Callable[[dict[str, str]], dict[str, Any]]:
+    return lambda runtime_parameters: make_step_config_dict(
+        'testing',
+        inputs={'raw': 's3://test-bucket/raw/', 'lookup': 's3://test-bucket/lookup/'},
+        outputs={'features': {'s3_uri': 's3://test-bucket/features/', 's3_upload_mode': 'Continuous'}},
+        processor_init_config={'instance_count': 2},
+        runtime_parameters=runtime_parameters,
+    )
+
+
+def test_runtime_parameters_replace_config_values_in_pipeline_steps(
+    make_parameterized_config_dict: Callable[[dict[str, str]], dict[str, Any]],
+):
+    step_factory = StepFactory(
+        step_config_dict=make_parameterized_config_dict({
+            'processor_init_config.instance_count': 'InstanceCount',
+            'processor_run_config.inputs.raw': 'RawDataUri',
+            'processor_run_config.outputs.features': 'FeaturesUri',
+        }),
+        role_arn='mock-role-arn',
+        pipeline_session=LocalPipelineSession(),
+    )
+
+    pipeline_run_args = step_factory._construct_run_args(as_pipeline=True)
+    direct_run_args = step_factory._construct_run_args()
+
+    parameters = step_factory.pipeline_parameters
+    assert isinstance(parameters['processor_init_config.instance_count'], ParameterInteger)
+    assert parameters['processor_init_config.instance_count'].default_value == 2
+    assert step_factory.get_processor(as_pipeline=True).instance_count is parameters['processor_init_config.instance_count']
+    raw_input, lookup_input = pipeline_run_args['inputs']
+    assert raw_input.source is parameters['processor_run_config.inputs.raw']
+    assert raw_input.source.default_value == 's3://test-bucket/raw/'
+    assert lookup_input.source == 's3://test-bucket/lookup/'
+    assert pipeline_run_args['outputs'][0].destination.default_value == 's3://test-bucket/features/'
+    # Direct runs use the config values.
+    assert direct_run_args['inputs'][0].source == 's3://test-bucket/raw/'
+
+
+@pytest.mark.parametrize('runtime_parameters, error_message', [
+    ({'processor_run_config.code': 'Code'}, 'cannot be a runtime parameter'),
+    ({'processor_run_config.inputs.missing': 'MissingUri'}, 'missing config field'),
+    ({'processor_init_config.instance_type': 'Instance Type'}, 'Invalid parameter name'),
+])
+def test_invalid_runtime_parameters(
+    runtime_parameters: dict[str, str],
+    error_message: str,
+    make_parameterized_config_dict: Callable[[dict[str, str]], dict[str, Any]],
+):
+    with pytest.raises(ValidationError, match=error_message):
+        StepConfig(**make_parameterized_config_dict(runtime_parameters))
+
+
+def test_parameterized_inputs_cannot_be_upstream_outputs(
+    make_parameterized_config_dict: Callable[[dict[str, str]], dict[str, Any]],
+    make_step_config_dict: Callable[..., dict[str, Any]],
+):
+    facade = StepFactoryFacade(
+        step_config_dicts=[
+            make_step_config_dict('producer', outputs={'raw': 's3://test-bucket/raw/'}),
+            make_parameterized_config_dict({'processor_run_config.inputs.raw': 'RawDataUri'}),
+        ],
+        role_arn='mock-role-arn',
+        pipeline_session=LocalPipelineSession(),
+    )
+
+    with pytest.raises(ValueError, match='Input raw of step testing is the output of an upstream step'):
+        facade.create_all_steps()
+
+
+def test_steps_can_share_parameters_with_same_default():
+    parameters: dict = {}
+    merge_pipeline_parameters(parameters, [ParameterString('Date', default_value='2024-01-01')])
+    merge_pipeline_parameters(parameters, [ParameterString('Date', default_value='2024-01-01')])
+    assert list(parameters) == ['Date']
+
+    with pytest.raises(ValueError, match='disagree'):
+        merge_pipeline_parameters(parameters, [ParameterString('Date', default_value='2024-02-01')])
@@ -0,0 +1,103 @@
+from pathlib import Path
+from typing import Any, Callable
+
+from sagemaker.workflow.parameters import ParameterString
+from sagemaker.workflow.pipeline_context import LocalPipelineSession
+
+from sm_pipelines_oo.steps.framework_processing_step import StepConfig
+from sm_pipelines_oo.steps.memoized_steps import MemoizedProcessingStep
+from sm_pipelines_oo.steps.step_args_cache import StepArgsCache
+from sm_pipelines_oo.steps.step_factory_facade import StepFactoryFacade
+
+
+cached_arguments = {
+    'ProcessingResources': {'ClusterConfig': {'InstanceCount': 1, 'InstanceType': 'ml.m5.large'}},
+    'AppSpecification': {'ImageUri': 'mock-image-uri'},
+    'RoleArn': 'mock-role-arn',
+}
+
+
+def test_fingerprint_changes_only_if_config_or_code_changes(
+    tmp_path: Path,
+    make_step_config_dict: Callable[..., dict[str, Any]],
+):
+    # Arrange
+    source_dir = tmp_path / 'code'
+    source_dir.mkdir()
+    (source_dir / 'code.py').write_text('print("v1")')
+    step_config = StepConfig(**make_step_config_dict('step_0'))
+    cache = StepArgsCache(tmp_path / 'cache')
+
+    def fingerprint(config: StepConfig = step_config) -> str:
+        return cache.fingerprint(config, role_arn='mock-role-arn', source_dir=str(source_dir))
+
+    # Act & Assert
+    original_fingerprint = fingerprint()
+    assert fingerprint() == original_fingerprint
+    assert fingerprint(StepConfig(**make_step_config_dict('step_1'))) != original_fingerprint
+    (source_dir / 'code.py').write_text('print("v2")')
+    assert fingerprint() != original_fingerprint
+
+
+def test_arguments_with_pipeline_variables_are_not_cached(tmp_path: Path):
+    cache = StepArgsCache(tmp_path)
+
+    assert not cache.put('fingerprint', {'RoleArn': ParameterString(name='RoleArn')})
+    assert cache.get('fingerprint') is None
+
+
+def test_step_is_created_from_cached_arguments(tmp_path: Path):
+    # Arrange
+    cache = StepArgsCache(tmp_path)
+    cache.put('fingerprint', cached_arguments)
+
+    def create_step_args():
+        raise AssertionError('Step args should not be created on a cache hit.')
+
+    # Act
+    step = MemoizedProcessingStep(
+        name='step_0',
+        step_args_cache=cache,
+        fingerprint='fingerprint',
+        create_step_args=create_step_args,
+    )
+
+    # Assert
+    assert step.is_cache_hit
+    assert step.arguments == cached_arguments
+
+
+def test_cached_arguments_are_not_reused_once_step_has_upstream_producer(
+    tmp_path: Path,
+    make_step_config_dict: Callable[..., dict[str, Any]],
+):
+    # Arrange
+    cache = StepArgsCache(tmp_path)
+    consumer_config_dict = make_step_config_dict(
+        'consumer', inputs={'features': 's3://bucket/features'}, outputs={'model': 's3://bucket/model'},
+    )
+    producer_config_dict = make_step_config_dict(
+        'producer', inputs={'raw': 's3://bucket/raw'}, outputs={'features': 's3://bucket/features'},
+    )
+
+    def build(step_config_dicts: list[dict[str, Any]]) -> dict[str, Any]:
+        facade = StepFactoryFacade(
+            step_config_dicts=step_config_dicts,
+            role_arn='mock-role-arn',
+            pipeline_session=LocalPipelineSession(),
+            step_args_cache=cache,
+        )
+        return {step.name: step for step in facade.create_all_steps()}
+
+    # Act: Build consumer on its own, and cache its arguments (which reference the S3 URI literally).
+    consumer = build([consumer_config_dict])['consumer']
+    cache.put(consumer._fingerprint, cached_arguments)
+    # Once its input is the output of another step, it has to reference that output instead.
+    steps = build([consumer_config_dict, producer_config_dict])
+
+    # Assert
+    assert not steps['consumer'].is_cache_hit
+    [features_input] = steps['consumer'].step_args.func_kwargs['inputs']
+    assert features_input.source.expr == {
+        'Get': "Steps.producer.ProcessingOutputConfig.Outputs['features'].S3Output.S3Uri"
+    }
@@ -0,0 +1,185 @@
+from typing import Any, Callable, ClassVar
+import time
+
+import pytest
+
+from sm_pipelines_oo.shared_config_schema import SharedConfig
+from sm_pipelines_oo.steps.framework_processing_step import StepConfig
+from sm_pipelines_oo.steps.interfaces import StepFactoryInterface
+from sm_pipelines_oo.steps.step_factory_facade import StepCreationError, StepFactoryFacade, StreamingStepFactoryFacade
+
+
+# Mock step factories
+# ===================
+
+@pytest.fixture
+def make_mock_step_config_dict(make_step_config_dict: Callable[..., dict[str, Any]]) -> Callable[[str], dict[str, Any]]:
+    return lambda step_name: make_step_config_dict(step_name, step_factory_class='Mock')
+
+
+class MockStepFactory(StepFactoryInterface):
+    """Instead of creating an actual step, returns the config it received."""
+    _config_model: ClassVar[type[StepConfig]] = StepConfig
+
+    def __init__(self, step_config_dict, role_arn, pipeline_session, sm_session=None):
+        self.config = step_config_dict
+
+    def create_step(self):
+        return self.config  # type: ignore[return-value]
+
+
+class SlowFailingStepFactory(MockStepFactory):
+    """Finishes steps out of order (earlier steps take longer), and fails for steps whose name contains 'fail'."""
+    def create_step(self):
+        step_index = int(self.config.step_name.split('_')[-1])
+        time.sleep(0.01 * (10 - step_index))
+        if 'fail' in self.config.step_name:
+            raise ValueError(f'Cannot create {self.config.step_name}')
+        return self.config  # type: ignore[return-value]
+
+
+# Tests
+# =====
+
+def test_step_configs_are_validated_in_one_batch_and_share_validated_shared_config(
+    shared_config_dict: dict[str, Any],
+    make_mock_step_config_dict: Callable[[str], dict[str, Any]],
+):
+    # Arrange
+    shared_config = SharedConfig(**shared_config_dict)
+    facade = StepFactoryFacade(
+        step_config_dicts=[make_mock_step_config_dict(f'step_{i}') for i in range(3)],
+        role_arn='mock-role-arn',
+        pipeline_session=None,  # type: ignore[arg-type]
+        custom_stepfactory_lookup_table={'Mock': MockStepFactory},
+        shared_config=shared_config,
+    )
+
+    # Act
+    configs: list[Any] = facade.create_all_steps()
+
+    # Assert
+    # Order is preserved, and factories receive validated models ...
+    assert [config.step_name for config in configs] == ['step_0', 'step_1', 'step_2']
+    assert all(isinstance(config, StepConfig) for config in configs)
+    # ... which all reference the single validated shared config, rather than a copy each.
+    assert all(config.shared_config is shared_config for config in configs)
+
+
+def test_validated_configs_are_passed_through(make_mock_step_config_dict: Callable[[str], dict[str, Any]]):
+    step_config = StepConfig(**make_mock_step_config_dict('step_0'))
+    facade = StepFactoryFacade(
+        step_config_dicts=[step_config],
+        role_arn='mock-role-arn',
+        pipeline_session=None,  # type: ignore[arg-type]
+        custom_stepfactory_lookup_table={'Mock': MockStepFactory},
+    )
+
+    assert facade.create_all_steps() == [step_config]
+
+
+def test_streaming_facade_consumes_configs_lazily(make_mock_step_config_dict: Callable[[str], dict[str, Any]]):
+    # Arrange
+    n_steps, batch_size = 10, 3
+    loaded_step_names: list[str] = []
+
+    def iter_step_configs():
+        for i in range(n_steps):
+            loaded_step_names.append(f'step_{i}')
+            yield make_mock_step_config_dict(f'step_{i}')
+
+    facade = StreamingStepFactoryFacade(
+        step_configs=iter_step_configs(),
+        role_arn='mock-role-arn',
+        pipeline_session=None,  # type: ignore[arg-type]
+        custom_stepfactory_lookup_table={'Mock': MockStepFactory},
+        batch_size=batch_size,
+    )
+
+    # Act & Assert
+    created_step_names: list[str] = []
+    for config in facade.iter_steps():
+        created_step_names.append(config.step_name)  # type: ignore[attr-defined]
+        # Never more than one batch of configs is loaded ahead of the steps created so far.
+        assert len(loaded_step_names) - len(created_step_names) < batch_size
+    assert created_step_names == [f'step_{i}' for i in range(n_steps)]
+
+
+def test_concurrent_step_creation_preserves_order(make_mock_step_config_dict: Callable[[str], dict[str, Any]]):
+    facade = StepFactoryFacade(
+        step_config_dicts=[make_mock_step_config_dict(f'step_{i}') for i in range(10)],
+        role_arn='mock-role-arn',
+        pipeline_session=None,  # type: ignore[arg-type]
+        custom_stepfactory_lookup_table={'Mock': SlowFailingStepFactory},
+        max_workers=4,
+    )
+
+    configs: list[Any] = facade.create_all_steps()
+
+    assert [config.step_name for config in configs] == [f'step_{i}' for i in range(10)]
+
+
+def test_concurrent_step_creation_raises_all_errors_together(make_mock_step_config_dict: Callable[[str], dict[str, Any]]):
+    step_names = ['step_0', 'fail_1', 'step_2', 'fail_3']
+    facade = StepFactoryFacade(
+        step_config_dicts=[make_mock_step_config_dict(step_name) for step_name in step_names],
+        role_arn='mock-role-arn',
+        pipeline_session=None,  # type: ignore[arg-type]
+        custom_stepfactory_lookup_table={'Mock': SlowFailingStepFactory},
+        max_workers=4,
+    )
+
+    with pytest.raises(StepCreationError) as exc_info:
+        facade.create_all_steps()
+
+    assert list(exc_info.value.errors) == ['fail_1', 'fail_3']
+    assert all(isinstance(error, ValueError) for error in exc_info.value.errors.values())
+
+
+def test_factories_without_dependencies_argument_still_work(make_step_config_dict: Callable[..., dict[str, Any]]):
+    # MockStepFactory has the signature of StepFactoryInterface.__init__, i.e. without `dependencies`.
+    facade = StepFactoryFacade(
+        step_config_dicts=[
+            make_step_config_dict('upstream', step_factory_class='Mock', outputs={'data': 's3://test-bucket/data'}),
+            make_step_config_dict('downstream', step_factory_class='Mock', inputs={'data': 's3://test-bucket/data'}),
+        ],
+        role_arn='mock-role-arn',
+        pipeline_session=None,  # type: ignore[arg-type]
+        custom_stepfactory_lookup_table={'Mock': MockStepFactory},
+    )
+
+    configs: list[Any] = facade.create_all_steps()
+
+    assert [config.step_name for config in configs] == ['upstream', 'downstream']
+
+
+@pytest.mark.parametrize('infer_dependencies', [True, False])
+def test_duplicate_step_names_are_rejected(
+    infer_dependencies: bool,
+    make_mock_step_config_dict: Callable[[str], dict[str, Any]],
+):
+    facade = StepFactoryFacade(
+        step_config_dicts=[make_mock_step_config_dict(step_name) for step_name in ['step_0', 'step_1', 'step_0']],
+        role_arn='mock-role-arn',
+        pipeline_session=None,  # type: ignore[arg-type]
+        custom_stepfactory_lookup_table={'Mock': MockStepFactory},
+        infer_dependencies=infer_dependencies,
+    )
+
+    with pytest.raises(ValueError, match='used by several steps: step_0'):
+        facade.create_all_steps()
+
+
+def test_streaming_facade_rejects_duplicate_step_names_across_batches(
+    make_mock_step_config_dict: Callable[[str], dict[str, Any]],
+):
+    facade = StreamingStepFactoryFacade(
+        step_configs=(make_mock_step_config_dict(step_name) for step_name in ['step_0', 'step_1', 'step_2', 'step_0']),
+        role_arn='mock-role-arn',
+        pipeline_session=None,  # type: ignore[arg-type]
+        custom_stepfactory_lookup_table={'Mock': MockStepFactory},
+        batch_size=2,
+    )
+
+    with pytest.raises(ValueError, match='used by several steps: step_0'):
+        facade.create_all_steps()
@@ -0,0 +1,140 @@
+from pathlib import Path
+from typing import Any
+
+import pytest
+from pydantic import ValidationError
+from sagemaker.workflow.pipeline_context import LocalPipelineSession
+
+from sm_pipelines_oo.steps.dag import StepDag
+from sm_pipelines_oo.steps.registry import step_factory_registry
+from sm_pipelines_oo.steps.step_args_cache import StepArgsCache
+from sm_pipelines_oo.steps.training_step import TrainingStepFactory, _EstimatorConfig
+
+
+estimator_config_dict: dict[str, Any] = {
+    'estimator_cls_name': 'PyTorch',
+    'framework_version': '2.0.1',
+    'py_version': 'py310',
+    'entry_point': 'train.py',
+    'source_dir': 'code_dir/',
+    'instance_type': 'ml.p4d.24xlarge',
+    'instance_count': 2,
+    'output_path': 's3://test-bucket/models',
+    'use_spot_instances': True,
+    'max_run': 3600,
+    'checkpoint_s3_uri': 's3://test-bucket/checkpoints',
+    'distribution': {'pytorchddp': {'enabled': True}},
+}
+
+step_config_dict: dict[str, Any] = {
+    'step_name': 'training',
+    'step_factory_class': 'FrameworkEstimator',
+    'estimator_config': estimator_config_dict,
+    'training_run_config': {
+        'inputs': {
+            'train': 's3://test-bucket/features/train',
+            'validation': {'s3_uri': 's3://test-bucket/features/validation', 'input_mode': 'FastFile'},
+        },
+    },
+    'shared_config': {
+        'project_name': 'unit-testing',
+        'project_version': '0',
+        'region': 'us-east-1',
+        'project_bucket_name': 'test-bucket',
+        'role_name': 'test_role',
+    },
+}
+
+
+def test_factory_is_registered():
+    assert step_factory_registry['FrameworkEstimator'] is TrainingStepFactory
+
+
+def test_estimator_uses_spot_checkpointing_and_distribution():
+    step_factory = TrainingStepFactory(
+        step_config_dict=step_config_dict,
+        role_arn='mock-role-arn',
+        pipeline_session=LocalPipelineSession(),
+    )
+
+    estimator = step_factory.get_estimator(as_pipeline=True)
+    training_inputs = step_factory._construct_training_inputs()
+
+    assert estimator.use_spot_instances
+    # Defaults to max_run
+    assert estimator.max_wait == 3600
+    assert estimator.checkpoint_s3_uri == 's3://test-bucket/checkpoints'
+    assert estimator.instance_count == 2
+    # (The SDK translates distribution settings into its own format.)
+    assert estimator.distribution
+    assert training_inputs['train'].config['DataSource']['S3DataSource']['S3Uri'] == 's3://test-bucket/features/train'
+    assert training_inputs['validation'].config['InputMode'] == 'FastFile'
+
+
+def test_training_step_is_created_from_cached_arguments(tmp_path: Path):
+    # Arrange
+    cache = StepArgsCache(tmp_path)
+
+    def create_step():
+        return TrainingStepFactory(
+            step_config_dict=step_config_dict,
+            role_arn='mock-role-arn',
+            pipeline_session=LocalPipelineSession(),
+            step_args_cache=cache,
+        ).create_step()
+
+    cached_arguments = {'AlgorithmSpecification': {'TrainingImage': 'mock-image-uri'}, 'RoleArn': 'mock-role-arn'}
+
+    # Act: Cache arguments under the step's fingerprint, then build the step again.
+    cache.put(create_step()._fingerprint, cached_arguments)
+    step = create_step()
+
+    # Assert
+    assert step.is_cache_hit
+    assert step.arguments == cached_arguments
+
+
+@pytest.mark.parametrize('invalid_settings', [
+    {'max_wait': 1800},  # shorter than max_run
+    {'keep_alive_period_in_seconds': 600},  # warm pools don't work with spot instances
+    {'use_spot_instances': False, 'max_wait': 7200},
+])
+def test_invalid_spot_settings(invalid_settings: dict[str, Any]):
+    with pytest.raises(ValidationError):
+        _EstimatorConfig(**{**estimator_config_dict, **invalid_settings})
+
+
+def test_warm_pool():
+    estimator_config = _EstimatorConfig(
+        **{**estimator_config_dict, 'use_spot_instances': False, 'keep_alive_period_in_seconds': 1800}
+    )
+    assert estimator_config.keep_alive_period_in_seconds == 1800
+    with pytest.raises(ValidationError):
+        _EstimatorConfig(**{**estimator_config_dict, 'use_spot_instances': False, 'keep_alive_period_in_seconds': 7200})
+
+
+def test_downstream_steps_depend_on_model():
+    evaluation_config_dict: dict[str, Any] = {
+        'step_name': 'evaluation',
+        'processor_run_config': {
+            'inputs': {
+                'model': 's3://test-bucket/models',
+                'test': 's3://test-bucket/features/test',
+            },
+            'outputs': {'metrics': 's3://test-bucket/metrics'},
+        },
+    }
+    feature_config_dict: dict[str, Any] = {
+        'step_name': 'features',
+        'processor_run_config': {
+            'inputs': {'raw': 's3://test-bucket/raw'},
+            'outputs': {'features': 's3://test-bucket/features'},
+        },
+    }
+
+    dag = StepDag([feature_config_dict, step_config_dict, evaluation_config_dict])
+
+    assert dag.generations() == [['features'], ['training'], ['evaluation']]
+    assert [(edge.upstream_step_name, edge.output_name) for edge in dag.edges['evaluation']] == [
+        ('training', 'model'), ('features', None)
+    ]
@@ -0,0 +1,124 @@
+import os
+import shutil
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from sm_pipelines_oo.aws_connector.base_connector import BaseConnector
+from sm_pipelines_oo.config_loader.implementations.file_loaders import YamlConfigLoader
+from sm_pipelines_oo.pipeline import PipelineFacade
+from sm_pipelines_oo.watcher import PipelineWatcher
+
+
+CONFIG_PATH = Path(__file__).parent / 'config_loader' / 'config_files'
+
+
+class FakePipelineFacade:
+    """Records which steps the watcher asks to rebuild, instead of actually building them."""
+    def __init__(self):
+        self.rebuilt: list[tuple[str, str | None]] = []
+        self.removed: list[str] = []
+        self.full_rebuilds = 0
+
+    def rebuild_step(self, step_config_dict: dict[str, Any], replaces: str | None = None):
+        self.rebuilt.append((step_config_dict['step_name'], replaces))
+
+    def remove_step(self, step_name: str):
+        self.removed.append(step_name)
+
+    def rebuild(self):
+        self.full_rebuilds += 1
+
+
+@pytest.fixture
+def config_root(tmp_path: Path, monkeypatch) -> Path:
+    shutil.copytree(CONFIG_PATH, tmp_path / 'config')
+    # source_dir in config is relative to the current directory
+    (tmp_path / 'worker_code' / 'preprocess').mkdir(parents=True)
+    (tmp_path / 'worker_code' / 'preprocess' / 'preprocess.py').write_text('print(1)')
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / 'config'
+
+
+def _touch(path: Path, content: str) -> None:
+    path.write_text(content)
+    # Make sure modification time changes, even on file systems with coarse timestamps.
+    stat_result = path.stat()
+    os.utime(path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10**9))
+
+
+def test_nothing_is_rebuilt_without_changes(config_root: Path):
+    facade = FakePipelineFacade()
+    watcher = PipelineWatcher(facade, YamlConfigLoader('dev', str(config_root)))  # type: ignore[arg-type]
+    assert watcher.poll() == []
+    assert facade.rebuilt == []
+
+
+def test_only_changed_step_is_rebuilt(config_root: Path):
+    facade = FakePipelineFacade()
+    watcher = PipelineWatcher(facade, YamlConfigLoader('dev', str(config_root)))  # type: ignore[arg-type]
+    # Add second step
+    new_config = config_root / 'dev' / 'training.yaml'
+    new_config.write_text(
+        (config_root / 'dev' / 'preprocessing.yaml').read_text()
+        .replace('step_name: preprocessing', 'step_name: training')
+    )
+    assert watcher.poll() == ['training']
+
+    # Change code of first step only
+    _touch(Path('worker_code/preprocess/preprocess.py'), 'print(2)')
+    # Note that both steps use the same source_dir in this example.
+    assert sorted(watcher.poll()) == ['preprocessing', 'training']
+
+    # Delete second step
+    new_config.unlink()
+    assert watcher.poll() == ['training']
+
+    assert facade.rebuilt == [
+        ('training', None), ('preprocessing', 'preprocessing'), ('training', 'training')
+    ]
+    assert facade.removed == ['training']
+    assert facade.full_rebuilds == 0
+
+
+def test_change_of_shared_config_rebuilds_everything(config_root: Path):
+    facade = FakePipelineFacade()
+    watcher = PipelineWatcher(facade, YamlConfigLoader('dev', str(config_root)))  # type: ignore[arg-type]
+    shared_config = config_root / 'dev' / 'shared_config.yaml'
+    _touch(shared_config, shared_config.read_text().replace("'0.0'", "'0.1'"))
+
+    assert watcher.poll() == ['preprocessing']
+    assert facade.full_rebuilds == 1
+    assert facade.rebuilt == []
+
+
+def test_renamed_output_rebuilds_downstream_steps(config_root: Path, monkeypatch):
+    # Build actual steps, but locally (and without looking up the role).
+    monkeypatch.setattr(BaseConnector, 'role_arn', 'mock-role-arn')
+    shutil.copytree(config_root / 'dev', config_root / 'local')
+    upstream_config = config_root / 'local' / 'preprocessing.yaml'
+    # Add a step that reads the output of the existing step
+    (config_root / 'local' / 'training.yaml').write_text(
+        upstream_config.read_text()
+        .replace('step_name: preprocessing', 'step_name: training')
+        .replace('input_1: s3://smp-oo-test/examples/data/input_1', 'input_1: s3://smp-oo-test/examples/data/output_1')
+        .replace('output_1: s3://smp-oo-test/examples/data/output_1', 'model: s3://smp-oo-test/examples/model')
+    )
+    config_loader = YamlConfigLoader('local', str(config_root))
+    facade = PipelineFacade(env='local', custom_config_loader=config_loader)
+    watcher = PipelineWatcher(facade, config_loader)
+
+    _touch(upstream_config, upstream_config.read_text().replace('output_1:', 'features:'))
+    assert watcher.poll() == ['preprocessing']
+
+    steps = {step.name: step for step in facade._pipeline.steps}
+    training_input = steps['training'].step_args.func_kwargs['inputs'][0]  # type: ignore[attr-defined]
+    assert training_input.source.expr == {
+        'Get': "Steps.preprocessing.ProcessingOutputConfig.Outputs['features'].S3Output.S3Uri"
+    }
+    # Configs used for running steps outside of the pipeline are up to date as well.
+    assert {
+        config.step_name: list(config.processor_run_config.outputs)
+        for config in facade._step_factory_facade.validated_step_configs
+    } == {'preprocessing': ['features'], 'training': ['model']}